@@ -1,9 +1,8 @@
 # %%
 from __future__ import annotations
 
-import json
+import contextlib
 import os
-import pickle
 from collections import defaultdict
 from concurrent.futures import as_completed
 from concurrent.futures import ThreadPoolExecutor
@@ -12,12 +11,17 @@ from tqdm.autonotebook import tqdm
 from wasabi import msg
 
 import src
+from src.datasets import CampaignSink
+from src.models import Recorder
 from src.pipeline import SituationProcessor
+from src.viz.batch import BatchRenderer
 
 results_dir = 'results/final'
 traits = ['Openness', 'Conscientiousness', 'Extraversion', 'Agreeableness', 'Neuroticism']
 n_item = 21
 max_workers = len(traits) * n_item
+# 设置 LLM_RECORD 时录制本次运行的所有 LLM 调用, 供 benchmarks/replay.py 回放
+record_path = os.getenv('LLM_RECORD')
 
 tasks = [(trait, str(item_id)) for trait in traits for item_id in range(n_item + 1)]
 dm = src.DataManager()
@@ -26,7 +30,7 @@ situs = dm.read('situation_judgment_test', 'SJTs', extract_stiu=True)
 failed_tasks = []
 
 # %%
-def task(trait, item_id, model='gpt-4o', ref_you='Ye', max_attempts=10):
+def task(trait, item_id, model=None, ref_you='Ye', max_attempts=10):
     situ = situs[trait[0]][item_id]
     attempts = 0
     while attempts < max_attempts:
@@ -47,34 +51,22 @@ def task(trait, item_id, model='gpt-4o', ref_you='Ye', max_attempts=10):
                 failed_tasks.append((trait, item_id))
                 return trait, item_id, None
 
-all_results = {trait: {} for trait in traits}
-with ThreadPoolExecutor(max_workers=max_workers) as executor:
-    futures = {executor.submit(task, trait, item_id): (trait, item_id) for trait, item_id in tasks}
-    for future in tqdm(as_completed(futures), total=len(futures), desc='Processing all'):
-        trait, item_id, res = future.result()
-        all_results[trait][item_id] = res
-#%%
-for trait, items in tqdm(all_results.items(), desc='Processing traits'):
-    this_dir = f'{results_dir}/{trait[0]}'
-    fig_dir = f'{this_dir}/figs'
-    data_dir = f'{this_dir}/data'
-    os.makedirs(fig_dir, exist_ok=True)
-    os.makedirs(data_dir, exist_ok=True)
-    for item_id, res in tqdm(items.items(), desc=f'Saving {trait} items', leave=False):
-        if res is None:
-            tqdm.write(f'Skipping {trait}_{item_id} (result is None)')
-            continue
-        fig_G = src.draw_G(res['situation_graph'])
-        fig_Gs = src.draw_Gs(res['vng_graphs'])
-        fig_intergarted_Gs = src.draw_Gs(res['intergrated_Gs'])
-        fig_G.savefig(f'{fig_dir}/G_{trait[0]}_{item_id}.tif', dpi=300, bbox_inches='tight')
-        fig_Gs.savefig(f'{fig_dir}/Gs_{trait[0]}_{item_id}.tif', dpi=300, bbox_inches='tight')
-        fig_intergarted_Gs.savefig(f'{fig_dir}/GsEnriched_{trait[0]}_{item_id}.tif', dpi=300, bbox_inches='tight')
+# 图片由 BatchRenderer 绘制 (复用 Figure 与布局缓存, 见 src/viz/batch.py), 直接得到 LZW 压缩的 TIFF
+renderer = BatchRenderer(format='tif', dpi=300)
 
-        with open(f'{data_dir}/{trait[0]}_{item_id}_all.pkl', 'wb') as f:
-            pickle.dump(res, f)
-
-        for re in res:
-            if re in ['cues', 'enriched_cues', 'Gs_prompt', 'Gs_prompt_polished']:
-                with open(f'{data_dir}/{trait[0]}_{item_id}_{re}.json', 'w') as f:
-                    json.dump(res[re], f, indent=4)
+# 每个条目完成后立即交给后台写线程写入 campaign 数据库 (见 src/datasets/sink.py),
+# 中途崩溃时已完成的条目不会丢失, 重新运行时跳过它们
+sink = CampaignSink(f'{results_dir}/campaign.sqlite', figures=renderer.render_result, format='tif')
+todo = [(trait, item_id) for trait, item_id in tasks if (trait[0], item_id) not in sink]
+msg.info(f'{len(tasks) - len(todo)} items already done, {len(todo)} to run')
+with sink, Recorder(record_path) if record_path else contextlib.nullcontext():
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(task, trait, item_id): (trait, item_id) for trait, item_id in todo}
+        for future in tqdm(as_completed(futures), total=len(futures), desc='Processing all'):
+            trait, item_id, res = future.result()
+            del futures[future]
+            if res is None:
+                sink.fail(trait[0], item_id, 'maximum retry attempts reached')
+            else:
+                sink.put(trait[0], item_id, res)
+            del res
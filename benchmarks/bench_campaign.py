@@ -0,0 +1,24 @@
+"""CampaignStore 写入与读回的基准。"""
+from __future__ import annotations
+
+from src.datasets.campaign import CampaignStore
+from src.datasets.campaign import VNG_ORDER
+
+
+def test_campaign_round_trip(bench, tmp_path, sjt_Gs, sjt_vngs):
+    """写入并读回一个条目; VNG 面板按写入时的叙事顺序 (E, I, Pr, P) 返回, 而不是按主键排序。"""
+    # SJT 数据没有 Pr 面板, 借用其它面板凑齐四个, 使 Pr 与 P 的顺序不同于字母序
+    panels = list(sjt_vngs['O_1'].values())
+    Gs = {vng: panels[i % len(panels)] for i, vng in enumerate(VNG_ORDER)}
+    res = {'situation_graph': sjt_Gs['O_1'], 'vng_graphs': Gs, 'intergrated_Gs': Gs}
+    campaign = CampaignStore(str(tmp_path / 'campaign.sqlite'))
+
+    def round_trip():
+        campaign.write('O', '1', res)
+        return campaign.read('O', '1')
+
+    back = bench(round_trip)
+    assert list(back['vng_graphs']) == list(Gs)
+    assert list(back['intergrated_Gs']) == list(Gs)
+    assert list(campaign.read_kind('vng_graphs', trait='O')['1']) == list(Gs)
+    campaign.close()
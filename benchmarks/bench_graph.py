@@ -0,0 +1,106 @@
+"""图的构建、序列化、知识提取/映射与 cue 挂载的基准。"""
+from __future__ import annotations
+
+import random
+
+import networkx as nx
+import pytest
+
+from src.utils.graph_hash import canonical_json
+from src.utils.graph_hash import hash_G
+from src.utils.graph_query import CUE_QUERIES
+from src.utils.graph_utils import build_G
+from src.utils.graph_utils import dic_G
+from src.utils.graph_utils import extract_knowledge
+from src.utils.graph_utils import map_knowledge
+
+CUE_TYPES = list(CUE_QUERIES)
+
+
+def test_build_G(bench, scaled_G):
+    payload = dic_G(scaled_G)
+    G = bench(build_G, payload)
+    assert G.number_of_nodes() == scaled_G.number_of_nodes()
+
+
+def test_build_G_strict(bench, scaled_G):
+    payload = dic_G(scaled_G)
+    bench(build_G, payload, strict=True)
+
+
+def test_dic_G(bench, scaled_G):
+    payload = bench(dic_G, scaled_G)
+    assert len(payload['edges']) == scaled_G.number_of_edges()
+
+
+def test_build_G_corpus(bench, sjt_Gs):
+    """SJT 全部情景图各构建一次, 即一次批量运行中 build_G 的典型负载。"""
+    payloads = [dic_G(G) for G in sjt_Gs.values()]
+    bench(lambda: [build_G(p) for p in payloads])
+
+
+def shuffled(G, seed):
+    """节点与边按随机顺序重新插入的 G 的副本。"""
+    rng = random.Random(seed)
+    nodes, edges = list(G.nodes(data=True)), list(G.edges(data=True))
+    rng.shuffle(nodes)
+    rng.shuffle(edges)
+    H = nx.DiGraph()
+    H.add_nodes_from(nodes)
+    H.add_edges_from(edges)
+    return H
+
+
+def test_canonical_json_insertion_order(sjt_vngs):
+    """插入顺序不同的同一个图 (含挂在多个对象上的属性节点) 得到相同的规范形式。"""
+    for Gs in sjt_vngs.values():
+        for G in Gs.values():
+            expected = canonical_json(G)
+            for seed in range(5):
+                assert canonical_json(shuffled(G, seed)) == expected
+
+
+def test_hash_G(bench, scaled_G):
+    bench(hash_G, scaled_G)
+
+
+def test_canonical_json(bench, scaled_G):
+    bench(canonical_json, scaled_G)
+
+
+@pytest.mark.parametrize('cue_type', CUE_TYPES)
+def test_extract_knowledge(bench, scaled_G, cue_type):
+    bench(extract_knowledge, scaled_G, cue_type)
+
+
+@pytest.mark.parametrize('cue_type', CUE_TYPES)
+def test_map_knowledge(bench, scaled_G, cue_type):
+    knowledge = extract_knowledge(scaled_G, cue_type)[:50]
+    if not knowledge:
+        pytest.skip(f'no {cue_type} knowledge in graph')
+    bench(lambda: [map_knowledge(scaled_G, k, cue_type) for k in knowledge])
+
+
+@pytest.fixture(scope='module')
+def processor(sjt_situs):
+    from src.pipeline import SituationProcessor
+    return SituationProcessor(situ=sjt_situs['O']['1'], trait='Openness')
+
+
+def enriched_cues(Gs):
+    """为每个 VNG 图中的全部对象节点生成 character/scene/object 三类 enriched cues。"""
+    cues = {}
+    for idx, G in Gs.items():
+        objects = [d['value'] for _, d in G.nodes(data=True) if d.get('type') == 'object_node']
+        cues[idx] = {
+            'character': {o: {'body': f'{o} body', 'facial': f'{o} face'} for o in objects[:2]},
+            'scene': {o: f'{o} scene' for o in objects[2:3]},
+            'object': {o: f'{o} object' for o in objects[3:]},
+        }
+    return cues
+
+
+def test_add_cues_to_Gs(bench, processor, sjt_vngs, sjt_Gs):
+    items = list(sjt_vngs)
+    work = [(enriched_cues(sjt_vngs[i]), sjt_vngs[i], sjt_Gs.get(i)) for i in items]
+    bench(lambda: [processor._add_cues_to_Gs(cues, Gs, G) for cues, Gs, G in work])
@@ -0,0 +1,64 @@
+"""LLM 输出的 JSON 提取与 prompt 渲染的基准。"""
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from src.prompts import PromptTemplateManager
+from src.utils.graph_utils import dic_G
+from src.utils.llm_utils import extract_json
+
+
+@pytest.fixture(scope='module')
+def manager():
+    return PromptTemplateManager()
+
+
+@pytest.fixture(scope='module')
+def replies(manager):
+    """各模板 few-shot 中的 assistant 回答, 以 LLM 常见的三种回复形态给出。"""
+    outputs = []
+    for info in manager._templates.values():
+        for message in info['template']:
+            if message.get('role') != 'assistant':
+                continue
+            try:
+                outputs.append(extract_json(message['content']))
+            except ValueError:
+                continue
+    corpus = {}
+    for obj in outputs:
+        pretty = json.dumps(obj, ensure_ascii=False, indent=4)
+        corpus.setdefault('plain', []).append(pretty)
+        corpus.setdefault('fenced', []).append(f'Here is the result:\n```json\n{pretty}\n```\nDone.')
+        corpus.setdefault('preamble', []).append(f'Sure! The answer is {json.dumps(obj, ensure_ascii=False)} as requested.')
+    return corpus
+
+
+@pytest.mark.parametrize('variant', ['plain', 'fenced', 'preamble'])
+def test_extract_json(bench, replies, variant):
+    texts = replies[variant]
+    bench(lambda: [extract_json(text) for text in texts])
+
+
+def test_make_prompt_sg(bench, manager, sjt_situs):
+    situs = [situ for items in sjt_situs.values() for situ in items.values()]
+    bench(lambda: [manager.make_prompt('sg_generation_prompt', situ) for situ in situs])
+
+
+def test_make_prompt_vng(bench, manager, sjt_situs, sjt_Gs):
+    situ = sjt_situs['O']['1']
+    graphs = [str(dic_G(G)) for G in sjt_Gs.values()]
+    bench(lambda: [manager.make_prompt('vng_from_graph_prompt', situ, graph=g) for g in graphs])
+
+
+def test_make_prompt_cues(bench, manager, sjt_situs, sjt_vngs):
+    """cues_extraction 的输入包含全部四个 VNG 图, 是最长的 prompt 之一。"""
+    situ = sjt_situs['O']['1']
+    graphs = [str({k: dic_G(G) for k, G in Gs.items()}) for Gs in sjt_vngs.values()]
+    bench(
+        lambda: [
+            manager.make_prompt('cues_extraction_prompt', situ, trait='Openness', graphs=g) for g in graphs
+        ],
+    )
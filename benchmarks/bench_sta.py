@@ -0,0 +1,63 @@
+"""sta 心理测量统计的基准, 数据为按单因子模型生成的合成作答 (5 个维度 x 22 题)。"""
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+pytest.importorskip('factor_analyzer')
+
+from sta import cronbach_alpha  # noqa: E402
+from sta import convergent_validity  # noqa: E402
+from sta import correlation_matrix  # noqa: E402
+from sta import descriptive_stats  # noqa: E402
+from sta import factor_analysis  # noqa: E402
+from sta import split_half_reliability  # noqa: E402
+from sta.item import pomit_biserial  # noqa: E402
+
+N_TRAITS = 5
+N_ITEMS = 22
+
+
+@pytest.fixture(scope='module', params=[200, 2000], ids=['n200', 'n2000'])
+def responses(request):
+    """(被试数, 5 x 22) 的 0/1 作答矩阵, 每个维度的题目由同一个潜在因子决定。"""
+    rng = np.random.default_rng(464365)
+    n = request.param
+    latent = rng.normal(size=(n, N_TRAITS))
+    difficulty = rng.normal(size=N_TRAITS * N_ITEMS)
+    logits = np.repeat(latent, N_ITEMS, axis=1) * 1.5 - difficulty + rng.normal(size=(n, N_TRAITS * N_ITEMS))
+    return (logits > 0).astype(float)
+
+
+@pytest.fixture(scope='module')
+def factors():
+    return [list(range(i * N_ITEMS, (i + 1) * N_ITEMS)) for i in range(N_TRAITS)]
+
+
+def test_cronbach_alpha(bench, responses):
+    bench(cronbach_alpha, responses)
+
+
+def test_split_half_reliability(bench, responses):
+    bench(split_half_reliability, responses)
+
+
+def test_pomit_biserial(bench, responses):
+    bench(pomit_biserial, responses)
+
+
+@pytest.mark.parametrize('method', ['pearson', 'spearman'])
+def test_correlation_matrix(bench, responses, method):
+    bench(correlation_matrix, responses, method=method)
+
+
+def test_descriptive_stats(bench, responses):
+    bench(descriptive_stats, responses)
+
+
+def test_factor_analysis(bench, responses):
+    bench(factor_analysis, responses, n_factors=N_TRAITS)
+
+
+def test_convergent_validity(bench, responses, factors):
+    bench(convergent_validity, responses, factors)
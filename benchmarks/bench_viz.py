@@ -0,0 +1,88 @@
+"""场景图绘制与图像拼接的基准。"""
+from __future__ import annotations
+
+import io
+
+import matplotlib
+import matplotlib.pyplot as plt
+import pytest
+from PIL import Image
+
+from src.utils.iamge_utils import make_sequence
+from src.viz import draw_G
+from src.viz import draw_G_fast
+from src.viz import draw_Gs
+from src.viz.batch import BatchRenderer
+from src.viz.html_export import svg_G
+from src.viz.layout import LayoutCache
+
+matplotlib.use('Agg')
+
+
+def _draw_G(G):
+    fig = draw_G(G)
+    plt.close(fig)
+
+
+def _draw_Gs(Gs):
+    fig = draw_Gs(Gs)
+    plt.close(fig)
+
+
+def test_draw_G(bench, sjt_Gs):
+    bench(_draw_G, sjt_Gs['O_1'])
+
+
+def test_draw_G_scaled(bench, scaled_G):
+    if scaled_G.number_of_nodes() > 1000:
+        pytest.skip('spring layout on graphs this large is too slow to benchmark per commit')
+    if scaled_G.number_of_nodes() >= 500:
+        # networkx 在 500 个节点以上使用 scipy 的稀疏实现计算 spring 布局
+        pytest.importorskip('scipy')
+    bench(_draw_G, scaled_G)
+
+
+@pytest.mark.parametrize('drawer', [draw_G, draw_G_fast], ids=['networkx', 'fast'])
+def test_draw_G_png(bench, scaled_G, drawer):
+    """绘制并编码为 png (draw_G_fast 的几何在 draw 时才计算, 只比较 draw_G 的调用不公平); 布局已缓存。"""
+    if scaled_G.number_of_nodes() > 1000:
+        pytest.skip('spring layout on graphs this large is too slow to benchmark per commit')
+    if scaled_G.number_of_nodes() >= 500:
+        pytest.importorskip('scipy')
+    pos = LayoutCache().get(scaled_G)
+
+    def render():
+        fig = drawer(scaled_G, pos=pos, dpi=100)
+        fig.savefig(io.BytesIO(), format='png')
+        plt.close(fig)
+
+    bench(render)
+
+
+def test_draw_Gs(bench, sjt_vngs):
+    bench(_draw_Gs, sjt_vngs['O_1'])
+
+
+@pytest.mark.parametrize('fast', [False, True], ids=['networkx', 'fast'])
+@pytest.mark.parametrize('format', ['png', 'svg', 'tif'])
+def test_render_result(bench, sjt_Gs, sjt_vngs, format, fast):
+    """BatchRenderer 绘制一个条目的三张图 (布局已缓存, 只计绘制与编码)。"""
+    res = {'situation_graph': sjt_Gs['O_1'], 'vng_graphs': sjt_vngs['O_1'], 'intergrated_Gs': sjt_vngs['O_1']}
+    renderer = BatchRenderer(format=format, dpi=100, layout_cache=LayoutCache(), fast=fast)
+    bench(renderer.render_result, res)
+
+
+def test_svg_G(bench, scaled_G):
+    """html_export.svg_G 生成 SVG 文本 (布局已缓存), 对照 test_draw_G_png。"""
+    if scaled_G.number_of_nodes() > 1000:
+        pytest.skip('spring layout on graphs this large is too slow to benchmark per commit')
+    if scaled_G.number_of_nodes() >= 500:
+        pytest.importorskip('scipy')
+    pos = LayoutCache().get(scaled_G)
+    bench(svg_G, scaled_G, pos=pos)
+
+
+@pytest.mark.parametrize('size', [512, 1024])
+def test_make_sequence(bench, size):
+    images = [Image.new('RGBA', (size, size), color) for color in ('red', 'green', 'blue', 'white')]
+    bench(make_sequence, images)
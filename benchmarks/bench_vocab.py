@@ -0,0 +1,31 @@
+"""any_scene_graph 词表查找的基准 (内存映射的 .vocab 文件, 首次运行时由 JSON 构建)。"""
+from __future__ import annotations
+
+import pytest
+
+from src.datasets.vocab import load_vocab
+
+QUERIES = ['man', 'person', 'car', 'cup', 'colleague', 'coworker', 'table', 'Cross-Vine']
+
+
+@pytest.fixture(scope='module')
+def objects():
+    return load_vocab('objects')
+
+
+def test_exact_sense_tagged(objects):
+    """带词义标注的名词按去掉标注后的词命中, 并返回全部词义。"""
+    terms = [term for term, _ in objects.exact('cup')]
+    assert 'cup (container)' in terms
+    assert all(term.startswith('cup (') for term in terms)
+    for value in ('man', 'Person', 'car'):
+        assert objects.exact(value), value
+    assert objects.lookup('man')[2] == 1.0
+
+
+def test_exact(bench, objects):
+    bench(lambda: [objects.exact(q) for q in QUERIES])
+
+
+def test_fuzzy(bench, objects):
+    bench(lambda: [objects.fuzzy(q, limit=5) for q in QUERIES])
@@ -0,0 +1,112 @@
+"""
+非 LLM 热路径的基准测试 (pytest-benchmark)。
+
+每个基准记录耗时 (pytest-benchmark 的统计) 与峰值内存 (tracemalloc, 记录在
+extra_info['peak_kib']), 保存后可跨提交比较:
+
+    pip install pytest-benchmark
+    pytest benchmarks --benchmark-autosave                       # 保存到 .benchmarks/
+    pytest benchmarks --benchmark-compare --benchmark-compare-fail=mean:15%
+
+数据来自 src/datasets 的 G.graphs.json / Gs.graphs.json (SJT 情景图与 VNG 图) 以及由其拼接放大的合成图。
+全部基准离线运行 (LLM_BACKEND=mock), 不会发出网络请求。
+"""
+from __future__ import annotations
+
+import os
+import sys
+import tracemalloc
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('LLM_BACKEND', 'mock')
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+import networkx as nx  # noqa: E402
+
+# 合成图的放大倍数: 由多少个 SJT 情景图拼接而成
+SCALES = [1, 10, 100]
+
+
+def peak_memory(func, *args, **kwargs):
+    """单独运行一次 func, 返回 tracemalloc 统计的峰值内存 (KiB)。"""
+    tracemalloc.start()
+    try:
+        func(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024
+
+
+@pytest.fixture
+def bench(benchmark):
+    """
+    与 benchmark 相同的调用方式; 计时前先单独运行一次以记录峰值内存 (tracemalloc 会拖慢执行, 不参与计时)。
+
+        bench(build_G, dic)
+    """
+    def run(func, *args, **kwargs):
+        benchmark.extra_info['peak_kib'] = round(peak_memory(func, *args, **kwargs), 1)
+        return benchmark(func, *args, **kwargs)
+    return run
+
+
+@pytest.fixture(scope='session')
+def data_manager():
+    from src.datasets import DataManager
+    return DataManager()
+
+
+@pytest.fixture(scope='session')
+def sjt_Gs(data_manager):
+    """SJT 情景图 {item: DiGraph}。"""
+    return data_manager.read('situation_judgement_test_G', 'G', frozen=True)
+
+
+@pytest.fixture(scope='session')
+def sjt_vngs(data_manager):
+    """SJT 的 VNG 图 {item: {'E'|'I'|'Pr'|'P': DiGraph}}。"""
+    return data_manager.read('situation_judgement_test_G', 'Gs', frozen=True)
+
+
+@pytest.fixture(scope='session')
+def sjt_situs(data_manager):
+    return data_manager.read('situation_judgment_test', 'SJTs', extract_stiu=True, frozen=True)
+
+
+def scale_G(graphs, n):
+    """
+    将 graphs 中的前 n 个图 (不足时循环使用) 重新编号后拼接为一个大图,
+    并以关系边把相邻子图的第一个对象节点相连, 使结果保持连通。
+    """
+    graphs = list(graphs)
+    H = nx.DiGraph()
+    anchors = []
+    for i in range(n):
+        G = graphs[i % len(graphs)]
+        H.update(nx.relabel_nodes(G, {node: _scaled_id(node, i) for node in G}))
+        objects = [node for node, d in G.nodes(data=True) if d.get('type') == 'object_node']
+        if objects:
+            anchors.append(_scaled_id(objects[0], i))
+    for u, v in zip(anchors, anchors[1:]):
+        H.add_edge(u, v, type='relation_edge', value='next to')
+    return H
+
+
+def _scaled_id(node, i):
+    """第 i 个子图的对象编号加上 i * 1000, 保持 graph_utils 的节点编号格式 (object_<n> / attribute|<obj>|<n>)。"""
+    if node.startswith('object_'):
+        return f'object_{int(node[len("object_"):]) + i * 1000}'
+    kind, obj, n = node.split('|')
+    return f'{kind}|{int(obj) + i * 1000}|{n}'
+
+
+@pytest.fixture(scope='session', params=SCALES, ids=[f'x{n}' for n in SCALES])
+def scaled_G(request, sjt_Gs):
+    """由 SJT 情景图拼接而成的合成图, 规模为 SCALES 中的倍数。"""
+    return scale_G(sjt_Gs.values(), request.param)
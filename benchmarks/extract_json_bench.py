@@ -0,0 +1,149 @@
+"""
+extract_json 基准: 对比旧实现 (正则 + 逐字符扫描 + json.loads) 与当前实现。
+
+语料取自 src/prompts 中各模板的 few-shot 输出, 并派生出 LLM 常见的几种回复形态
+(代码块、前后缀说明文字、字符串内花括号、尾逗号、智能引号、智能引号字符串中的撇号)。
+
+用法:
+    python benchmarks/extract_json_bench.py [--repeat 200]
+"""
+from __future__ import annotations
+
+import argparse
+import ast
+import glob
+import importlib.util
+import json
+import os
+import re
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _load(name, *parts):
+    """直接按文件加载模块, 避免导入 src 时初始化 LLM 客户端。"""
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, *parts))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+llm_utils = _load('src.utils.llm_utils', 'src', 'utils', 'llm_utils.py')
+_load('src.prompts.schemas', 'src', 'prompts', 'schemas.py')
+
+
+def legacy_extract_json(text):
+    """优化前的 extract_json, 原样保留用于对比。"""
+    fence_pattern = r'```json\s*(\{.*?\})\s*```'
+    m = re.search(fence_pattern, text, re.DOTALL)
+    if m:
+        candidate = m.group(1)
+    else:
+        brace_stack = []
+        start_idx = None
+        for i, ch in enumerate(text):
+            if ch == '{':
+                if start_idx is None:
+                    start_idx = i
+                brace_stack.append(ch)
+            elif ch == '}' and brace_stack:
+                brace_stack.pop()
+                if not brace_stack and start_idx is not None:
+                    candidate = text[start_idx:i+1]
+                    break
+        else:
+            raise json.JSONDecodeError('No JSON object found in text', text, 0)
+    candidate = candidate.replace(r'\n', '\n')
+    return json.loads(candidate)
+
+
+def few_shot_outputs():
+    """收集 src/prompts 下所有模板中 assistant 的 few-shot 输出, 转为标准 JSON 文本。"""
+    outputs = []
+    for path in sorted(glob.glob(os.path.join(ROOT, 'src', 'prompts', '**', '*prompt*.py'), recursive=True)):
+        spec = importlib.util.spec_from_file_location('_tpl', path)
+        module = importlib.util.module_from_spec(spec)
+        # 与 PromptTemplateManager 一致, 使模板可以相对导入 src.prompts.schemas
+        rel = os.path.relpath(os.path.dirname(path), ROOT)
+        module.__package__ = rel.replace(os.sep, '.')
+        try:
+            spec.loader.exec_module(module)
+        except Exception:
+            continue
+        for turn in getattr(module, 'prompt_template', []):
+            if turn.get('role') != 'assistant':
+                continue
+            content = turn.get('content')
+            content = getattr(content, 'template', content)
+            try:
+                obj = json.loads(content)
+            except (TypeError, ValueError):
+                try:
+                    obj = ast.literal_eval(content.strip())
+                except (AttributeError, ValueError, SyntaxError):
+                    continue
+            if isinstance(obj, dict):
+                outputs.append(obj)
+    return outputs
+
+
+_DQ_STRING = re.compile(r'"((?:[^"\\]|\\.)*)"')
+
+
+def build_corpus(objs):
+    """由 few-shot 输出派生出 (名称, 文本) 语料。"""
+    corpus = []
+    for obj in objs:
+        compact = json.dumps(obj, ensure_ascii=False)
+        pretty = json.dumps(obj, ensure_ascii=False, indent=4)
+        corpus += [
+            ('plain', pretty),
+            ('fenced', f'Here is the result:\n```json\n{pretty}\n```\nLet me know if you need more.'),
+            ('preamble', f'Sure! Based on the situation, the answer is {compact} as requested.'),
+            ('brace_in_string', json.dumps({'note': 'keep {these} braces } intact', 'data': obj}, ensure_ascii=False)),
+            ('trailing_comma', re.sub(r'(\]|\}|"|\d)(\s*\n\s*)(\}|\])', r'\1,\2\3', pretty)),
+            ('smart_quotes', f'```json\n{pretty}\n```'.replace('{\n    "', '{\n    “', 1).replace('": ', '”: ', 1)),
+            ('smart_apostrophe', 'Here: ' + _DQ_STRING.sub(r'“\1”', json.dumps({'note': "Ye's friend", 'data': obj}, ensure_ascii=False))),
+        ]
+    return corpus
+
+
+def timed(func, text, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(text)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    corpus = build_corpus(few_shot_outputs())
+    print(f'corpus: {len(corpus)} texts, orjson: {llm_utils.orjson is not None}')
+
+    stats = {}
+    for name, text in corpus:
+        row = stats.setdefault(name, {'n': 0, 'legacy_ok': 0, 'new_ok': 0, 'legacy_t': 0.0, 'new_t': 0.0})
+        row['n'] += 1
+        for key, func in (('legacy', legacy_extract_json), ('new', llm_utils.extract_json)):
+            try:
+                func(text)
+            except (ValueError, SyntaxError):
+                continue
+            row[f'{key}_ok'] += 1
+            row[f'{key}_t'] += timed(func, text, args.repeat)
+
+    print(f'{"variant":<16}{"n":>4}{"legacy ok":>11}{"new ok":>8}{"legacy µs":>12}{"new µs":>10}')
+    for name, row in stats.items():
+        legacy_us = row['legacy_t'] / max(row['legacy_ok'], 1) * 1e6
+        new_us = row['new_t'] / max(row['new_ok'], 1) * 1e6
+        print(f'{name:<16}{row["n"]:>4}{row["legacy_ok"]:>11}{row["new_ok"]:>8}{legacy_us:>12.1f}{new_us:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
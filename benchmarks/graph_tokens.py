@@ -0,0 +1,113 @@
+"""
+比较场景图在 prompt 中的两种写法的 token 数与回答质量:
+  - dict:    SituationProcessor 默认写法, 即 str(dic_G(G))
+  - compact: graph_codec.compact_G(G) (含格式说明)
+
+token 数在 SJT 语料 (situation_judgement_test 的 G 与 Gs) 上统计, 使用 prompt 预算相同的
+src/prompts/budget.count_tokens (LLMConfig.model 的编码; 未安装 tiktoken 时为字符估计)。
+
+--quality N 时对前 N 个情景图分别以两种写法调用 graph2prompt (需要 LLM_API),
+以生成的图像 prompt 中出现的节点/关系 value 的比例作为信息保留度。
+
+用法:
+    python benchmarks/graph_tokens.py [--quality 10]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def make_counter():
+    """与 PromptTemplateManager 的预算计数相同的 (名称, 计数函数)。"""
+    from src.config import LLMConfig
+    from src.prompts.budget import count_tokens
+    from src.prompts.budget import tiktoken
+
+    model = LLMConfig.model
+    name = f'{model} (tiktoken)' if tiktoken is not None else f'{model} (chars estimate)'
+    return name, lambda text: count_tokens(text, model)
+
+
+def corpus():
+    import src
+    dm = src.DataManager()
+    graphs = {f'G/{k}': G for k, G in dm.read('situation_judgement_test_G', 'G').items()}
+    for k, Gs in dm.read('situation_judgement_test_G', 'Gs').items():
+        for vng, G in Gs.items():
+            graphs[f'Gs/{k}/{vng}'] = G
+    return graphs
+
+
+def token_report(graphs, count):
+    from src.utils.graph_codec import compact_G
+    from src.utils.graph_codec import decode_G
+    from src.utils.graph_codec import encode_G
+    from src.utils.graph_utils import dic_G
+
+    totals = {'dict': 0, 'json': 0, 'compact': 0}
+    lossless = 0
+    for G in graphs.values():
+        totals['dict'] += count(str(dic_G(G)))
+        totals['json'] += count(json.dumps(dic_G(G), ensure_ascii=False))
+        totals['compact'] += count(compact_G(G))
+        H = decode_G(json.loads(json.dumps(encode_G(G))))
+        lossless += (
+            dict(H.nodes(data=True)) == dict(G.nodes(data=True))
+            and {(u, v): d for u, v, d in H.edges(data=True)} == {(u, v): d for u, v, d in G.edges(data=True)}
+        )
+    n = len(graphs)
+    print(f'graphs: {n}, lossless round trips: {lossless}/{n}')
+    print(f'{"format":<10}{"total":>10}{"per graph":>12}{"vs dict":>10}')
+    for name, total in totals.items():
+        print(f'{name:<10}{total:>10}{total / n:>12.1f}{total / totals["dict"]:>10.2f}')
+
+
+def coverage(G, text):
+    """G 中 object/attribute value 与关系 value 在 text 中出现的比例 (不区分大小写)。"""
+    text = text.lower()
+    values = [d.get('value') for _, d in G.nodes(data=True)]
+    values += [d.get('value') for _, _, d in G.edges(data=True) if d.get('type') == 'relation_edge']
+    values = [v for v in values if isinstance(v, str) and v]
+    return sum(v.lower() in text for v in values) / max(len(values), 1)
+
+
+def quality_report(graphs, n, count):
+    from src.models.llms import TempletLLM
+    from src.utils.graph_codec import compact_G
+    from src.utils.graph_utils import dic_G
+
+    llm = TempletLLM('graph2prompt')
+    scores = {'dict': [], 'compact': []}
+    used = {'dict': 0, 'compact': 0}
+    for key in [k for k in graphs if k.startswith('G/')][:n]:
+        G = graphs[key]
+        for name, text in (('dict', dic_G(G)), ('compact', compact_G(G))):
+            res = llm.unwrap(llm.call(text, size='1024x1024', style='realistic'))
+            scores[name].append(coverage(G, res))
+            used[name] += count(str(text))
+        print(f'{key}: dict {scores["dict"][-1]:.2f}  compact {scores["compact"][-1]:.2f}')
+    for name, values in scores.items():
+        print(f'{name:<10}coverage {sum(values) / len(values):.3f}  graph tokens {used[name]}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--quality', type=int, default=0, help='number of graphs to send to graph2prompt')
+    args = parser.parse_args()
+
+    name, count = make_counter()
+    print(f'tokenizer: {name}')
+    graphs = corpus()
+    token_report(graphs, count)
+    if args.quality:
+        quality_report(graphs, args.quality, count)
+
+
+if __name__ == '__main__':
+    main()
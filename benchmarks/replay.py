@@ -0,0 +1,61 @@
+"""
+以录制的 LLM 响应回放 SJT 条目, 度量流水线自身的开销并逐模板比较 prompt。
+
+录制 (真实或 mock 后端均可):
+    LLM_RECORD=runs/batch.jsonl.gz python EXAMPLE_batch.py
+
+回放:
+    python benchmarks/replay.py runs/batch.jsonl.gz [--items O/1 C/3] [--strict] [--latency recorded]
+
+未给定 --items 时回放全部 5 x 22 个条目。回放时不发出网络请求, 未命中录制的 prompt
+由 mock 后端合成响应 (--strict 时报错)。
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+TRAITS = ['Openness', 'Conscientiousness', 'Extraversion', 'Agreeableness', 'Neuroticism']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('archive', help='archive written by Recorder')
+    parser.add_argument('--items', nargs='*', help='items as <trait initial>/<item id>, e.g. O/1')
+    parser.add_argument('--strict', action='store_true', help='fail on prompts missing from the archive')
+    parser.add_argument('--latency', default=None, help="'recorded' to sleep for the recorded latencies")
+    parser.add_argument('--diff', type=int, default=20, help='max diff lines printed per template')
+    args = parser.parse_args()
+
+    import src
+    from src.models import Replayer
+
+    situs = src.DataManager().read('situation_judgment_test', 'SJTs', extract_stiu=True)
+    traits = {trait[0]: trait for trait in TRAITS}
+    items = args.items or [f'{t}/{i}' for t in traits for i in range(22)]
+    items = [item.split('/') for item in items]
+
+    def run():
+        return {
+            f'{t}/{i}': src.SituationProcessor(situ=situs[t][i], trait=traits[t]).fit(verbose=False)
+            for t, i in items
+        }
+
+    replayer = Replayer(args.archive)
+    report = replayer.run(run, latency=args.latency, strict=args.strict)
+    print(f'archive: {len(replayer.records)} calls, items replayed: {len(items)}')
+    print(f'requests: {report["calls"]}, replayed from archive: {report["replayed"]}')
+    print(f'wall {report["wall"]:.3f}s  cpu {report["cpu"]:.3f}s  recorded LLM latency {report["recorded_latency"]:.1f}s')
+    print(f'{"template":<40}{"recorded":>10}{"new":>8}{"matched":>10}')
+    for task, stage in report['stages'].items():
+        print(f'{str(task):<40}{stage["recorded"]:>10}{stage["new"]:>8}{stage["matched"]:>10}')
+        for line in stage['diff'][:args.diff]:
+            print(f'    {line}')
+
+
+if __name__ == '__main__':
+    main()
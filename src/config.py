@@ -63,11 +63,28 @@ class LLMConfig:
     model: str = LLM_MODEL
     api_key: str | None = os.getenv('openai_api')
     base_url: str | None = os.getenv('openai_url')
+    # 客户端后端 (见 models/llm.py 的 BACKENDS): 'openai' 或离线的 'mock'; None 时读取环境变量 LLM_BACKEND
+    backend: str | None = None
     response_format: ClassVar[dict] = {'type': 'json_object'}
+    # 模板声明了 output_schema 时以 json_schema 结构化输出发送; 后端不支持时自动退回 response_format
+    structured_output: bool = True
     temperature: float | None = LLM_TEMPERATURE
     top_p: float | None = LLM_TOP_P
     top_k: int | None = LLM_TOP_K
     max_tokens: int | None = LLM_MAX_TOKENS
+    # prompt 的 token 预算: 上下文窗口, 及 max_tokens 未设置时为输出预留的 token 数
+    context_window: int = 128000
+    output_reserve: int = 4096
+    # 按模板记录输出 token 数的 JSON 文件, 用于估计 max_tokens; None 时只在进程内记录
+    output_history: str | None = None
+    # 按模板选择模型的路由配置 (JSON, 见 models/routing.py); None 时读取环境变量 LLM_ROUTING 或使用默认路由
+    routing: str | None = None
+    # 单次请求的超时 (秒), timeouts 按模板名 (如 'sg_generation') 覆盖默认值
+    timeout: float | None = 120
+    timeouts: ClassVar[dict] = {}
+    # 对冲请求: 请求耗时超过该模板历史延迟的 hedge_quantile 分位数时, 再发出一个相同的请求并取先返回者
+    hedge: bool = False
+    hedge_quantile: float = 0.95
     frequency_penalty: float | None = LLM_FREQUENCY_PENALTY
     presence_penalty: float | None = LLM_PRESENCE_PENALTY
     stop: bool | None = LLM_STOP
@@ -1,3 +1,10 @@
 from __future__ import annotations
 
+from .campaign import CampaignStore
 from .data_manager import DataManager
+from .graph_store import GraphStore
+from .results import ResultStore
+from .sink import CampaignSink
+from .sink import ResultStoreSink
+from .vocab import load_vocab
+from .vocab import Vocabulary
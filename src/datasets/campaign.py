@@ -0,0 +1,413 @@
+"""
+一次批量运行 (campaign) 的全部产物保存在单个 SQLite 文件中, 取代 results/final/{T}/data/*.json|pkl
+与 figs/*.tif 等数千个小文件。
+
+- WAL 模式: 读不阻塞写, 多个线程 (每个线程一个连接) 与多个进程可以同时写入, 冲突时按 busy_timeout 等待
+- 每个条目的所有产物在一个事务中写入 (BEGIN IMMEDIATE), 中途失败不会留下半个条目
+- 每种产物一张表, 主键为 (trait, item, vng); situation_graph 的 vng 为空字符串, 其余产物按 VNG 面板拆成多行,
+  因此 "某个特质全部条目的 P 面板 prompt" 只是一次索引查找
+- 图与 JSON 的编码与 results.py 相同; 图片 (matplotlib Figure、PIL Image 或已编码的字节) 以 BLOB 保存在 figures 表
+
+用法:
+    campaign = CampaignStore('results/final/campaign.sqlite')
+    campaign.write('O', '1', res, figures={'G': fig_G})
+    campaign.read_kind('Gs_prompt_polished', trait='N', vng='P')    # {item: prompt}
+    campaign.load_vng_pics('N', '1')                                # {'E': Image, 'I': ..., ...}
+
+旧的目录结构可以用 import_dir 导入: python -m src.datasets.campaign results/final results/final/campaign.sqlite
+GraphStore (graph_store.py) 的表名与这里不冲突, 需要节点/边索引时可以指向同一个文件。
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from PIL import Image
+
+from .results import _loads
+from .results import decode_tree
+from .results import encode_tree
+from .results import ResultStore
+
+# fit() 输出的产物 -> 是否为 {vng: ...} 形式
+KINDS = {
+    'situation_graph': False,
+    'vng_graphs': True,
+    'cues': True,
+    'enriched_cues': True,
+    'enriched_Gs': True,
+    'intergrated_Gs': True,
+    'Gs_prompt': True,
+    'Gs_prompt_polished': True,
+}
+VNG_ORDER = ('E', 'I', 'Pr', 'P')
+
+_ARTIFACT_TABLE = """
+CREATE TABLE IF NOT EXISTS {kind} (
+    trait TEXT NOT NULL,
+    item TEXT NOT NULL,
+    vng TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (trait, item, vng)
+) WITHOUT ROWID;
+"""
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    trait TEXT NOT NULL,
+    item TEXT NOT NULL,
+    status TEXT NOT NULL,
+    error TEXT,
+    updated REAL NOT NULL,
+    PRIMARY KEY (trait, item)
+);
+CREATE TABLE IF NOT EXISTS extra (
+    trait TEXT NOT NULL,
+    item TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (trait, item, kind)
+);
+CREATE TABLE IF NOT EXISTS figures (
+    trait TEXT NOT NULL,
+    item TEXT NOT NULL,
+    name TEXT NOT NULL,
+    format TEXT NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (trait, item, name)
+);
+CREATE INDEX IF NOT EXISTS items_status ON items (status);
+""" + ''.join(_ARTIFACT_TABLE.format(kind=kind) for kind in KINDS)
+
+
+def _dumps(data):
+    return json.dumps(encode_tree(data), ensure_ascii=False, default=str)
+
+
+def _encode_figure(figure, format, **savefig):
+    """matplotlib Figure / PIL Image / bytes -> (格式, 字节)。"""
+    if isinstance(figure, (bytes, bytearray, memoryview)):
+        return format, bytes(figure)
+    buffer = io.BytesIO()
+    if isinstance(figure, Image.Image):
+        figure.save(buffer, format=format)
+    else:
+        figure.savefig(buffer, format=format, **savefig)
+    return format, buffer.getvalue()
+
+
+def _load_pickle(path):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def _vng_key(vng):
+    """VNG 面板的排序键: 按 VNG_ORDER (叙事顺序), 其余面板排在后面。"""
+    return (VNG_ORDER.index(vng) if vng in VNG_ORDER else len(VNG_ORDER), vng)
+
+
+def _item_key(key):
+    trait, item = key
+    return (trait, int(item) if item.isdigit() else float('inf'), item)
+
+
+class CampaignStore:
+    """
+    单文件的批量运行结果库, 见模块说明。实例可以在线程间共享, 每个线程使用自己的连接。
+
+    :param path: SQLite 文件路径
+    :param timeout: 等待其它写入者释放锁的秒数
+    """
+
+    def __init__(self, path: str, timeout: float = 60.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self.conn
+        conn.execute('PRAGMA journal_mode = WAL')
+        with conn:
+            conn.executescript(_SCHEMA)
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """当前线程的连接 (autocommit 模式, 事务由 _transaction 显式开启)。"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA synchronous = NORMAL')
+            conn.execute(f'PRAGMA busy_timeout = {int(self.timeout * 1000)}')
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def close(self):
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM items WHERE status = 'done'").fetchone()[0]
+
+    def __contains__(self, key):
+        trait, item = key
+        return self.status(trait, item) == 'done'
+
+    def __repr__(self):
+        return f'CampaignStore({self.path!r}, {len(self)} items)'
+
+    def _repr_html_(self):
+        rows = self.conn.execute('SELECT status, COUNT(*) AS n FROM items GROUP BY status').fetchall()
+        body = ''.join(f'<tr><td>{r["status"]}</td><td>{r["n"]}</td></tr>' for r in rows)
+        return f"""
+            <h3 style="color: #9FE2BF;">CampaignStore: {self.path}</h3>
+            <table><tr><th>status</th><th>items</th></tr>{body}</table>
+        """
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        """BEGIN IMMEDIATE ... COMMIT; 出错时回滚。写锁在事务开始时获取, 避免读后写的死锁。"""
+        conn = self.conn
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    # ---- 写入 ----
+    def write(self, trait, item, res: dict, figures: dict | None = None, format='png', **savefig) -> None:
+        """
+        在一个事务中写入一个条目的 fit() 输出与图片, 替换该条目已有的内容。
+
+        :param trait: 特质名或缩写
+        :param item: 条目 id
+        :param res: SituationProcessor.fit() 返回的字典
+        :param figures: {名称: Figure | Image | bytes}, 如 {'G': fig_G, 'Gs': fig_Gs}
+        :param format: 图片格式, 如 'png'、'tif'
+        :param savefig: 传给 Figure.savefig 的参数, 如 dpi=300, bbox_inches='tight'
+        """
+        trait, item = str(trait), str(item)
+        rows = {}
+        extra = []
+        for kind, value in res.items():
+            if kind not in KINDS:
+                extra.append((trait, item, kind, _dumps(value)))
+            elif KINDS[kind] and isinstance(value, dict) and value:
+                rows[kind] = [(trait, item, str(vng), _dumps(v)) for vng, v in value.items()]
+            else:
+                rows[kind] = [(trait, item, '', _dumps(value))]
+        blobs = [
+            (trait, item, name, *_encode_figure(figure, format, **savefig))
+            for name, figure in (figures or {}).items()
+        ]
+        with self._transaction() as conn:
+            self._delete(conn, trait, item, figures=False)
+            for kind, values in rows.items():
+                conn.executemany(f'INSERT INTO {kind} VALUES (?, ?, ?, ?)', values)
+            conn.executemany('INSERT INTO extra VALUES (?, ?, ?, ?)', extra)
+            conn.executemany('INSERT OR REPLACE INTO figures VALUES (?, ?, ?, ?, ?)', blobs)
+            conn.execute(
+                'INSERT OR REPLACE INTO items VALUES (?, ?, ?, NULL, ?)', (trait, item, 'done', time.time()),
+            )
+
+    def put_figure(self, trait, item, name, figure, format='png', **savefig) -> None:
+        """写入 (或替换) 单张图片, 如生成的 VNG 图像。"""
+        fmt, data = _encode_figure(figure, format, **savefig)
+        with self._transaction() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO figures VALUES (?, ?, ?, ?, ?)', (str(trait), str(item), name, fmt, data),
+            )
+
+    def mark_failed(self, trait, item, error='') -> None:
+        """记录失败的条目 (不会覆盖已完成的结果)。"""
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO items VALUES (?, ?, 'failed', ?, ?) ON CONFLICT (trait, item) "
+                "DO UPDATE SET error = excluded.error, updated = excluded.updated WHERE status != 'done'",
+                (str(trait), str(item), str(error), time.time()),
+            )
+
+    def delete(self, trait, item) -> None:
+        with self._transaction() as conn:
+            self._delete(conn, str(trait), str(item), figures=True)
+
+    @staticmethod
+    def _delete(conn, trait, item, figures):
+        for table in (*KINDS, 'extra', 'items', *(('figures',) if figures else ())):
+            conn.execute(f'DELETE FROM {table} WHERE trait = ? AND item = ?', (trait, item))
+
+    # ---- 查询 ----
+    def items(self, trait=None, status='done') -> list[tuple[str, str]]:
+        """(trait, item) 列表, 按 trait 与数字 id 排序; status 为 None 时包含失败的条目。"""
+        conds, params = [], []
+        if trait is not None:
+            conds.append('trait = ?')
+            params.append(str(trait))
+        if status is not None:
+            conds.append('status = ?')
+            params.append(status)
+        where = ' AND '.join(conds) or '1'
+        rows = self.conn.execute(f'SELECT trait, item FROM items WHERE {where}', params)
+        return sorted(((r['trait'], r['item']) for r in rows), key=_item_key)
+
+    def status(self, trait, item) -> str | None:
+        row = self.conn.execute(
+            'SELECT status FROM items WHERE trait = ? AND item = ?', (str(trait), str(item)),
+        ).fetchone()
+        return row['status'] if row else None
+
+    def failed(self) -> list[dict]:
+        return [dict(r) for r in self.conn.execute("SELECT * FROM items WHERE status = 'failed'")]
+
+    def read(self, trait, item, kinds=None) -> dict | None:
+        """
+        读取一个条目, 返回与 fit() 输出相同结构的字典 (图为 nx.DiGraph); 不存在时返回 None。
+
+        :param kinds: 只读取这些产物
+        """
+        trait, item = str(trait), str(item)
+        res = {}
+        for kind in (kinds or KINDS):
+            if kind not in KINDS:
+                continue
+            rows = self.conn.execute(
+                f'SELECT vng, data FROM {kind} WHERE trait = ? AND item = ?', (trait, item),
+            ).fetchall()
+            if not rows:
+                continue
+            if KINDS[kind] and rows[0]['vng'] != '':
+                # 行按主键 (vng 的字母序) 返回, 面板需按叙事顺序 E, I, Pr, P 重建
+                rows = sorted(rows, key=lambda r: _vng_key(r['vng']))
+                res[kind] = {r['vng']: decode_tree(_loads(r['data'])) for r in rows}
+            else:
+                res[kind] = decode_tree(_loads(rows[0]['data']))
+        for r in self.conn.execute('SELECT kind, data FROM extra WHERE trait = ? AND item = ?', (trait, item)):
+            if kinds is None or r['kind'] in kinds:
+                res[r['kind']] = decode_tree(_loads(r['data']))
+        return res or None
+
+    def read_kind(self, kind: str, trait=None, vng=None) -> dict:
+        """
+        读取一种产物的全部条目。
+
+        :param trait: 给定时返回 {item: data}, 否则返回 {(trait, item): data}
+        :param vng: 给定时只读取该 VNG 面板, data 为面板的值而不是 {vng: 值}
+        """
+        if kind not in KINDS:
+            raise ValueError(f'未知的产物: {kind!r}, 可用: {list(KINDS)}')
+        conds, params = [], []
+        if trait is not None:
+            conds.append('trait = ?')
+            params.append(str(trait))
+        if vng is not None:
+            conds.append('vng = ?')
+            params.append(vng)
+        where = ' AND '.join(conds) or '1'
+        results = {}
+        rows = self.conn.execute(f'SELECT trait, item, vng, data FROM {kind} WHERE {where}', params).fetchall()
+        for r in sorted(rows, key=lambda r: _vng_key(r['vng'])):
+            data = decode_tree(_loads(r['data']))
+            key = (r['trait'], r['item'])
+            if vng is None and KINDS[kind] and r['vng'] != '':
+                results.setdefault(key, {})[r['vng']] = data
+            else:
+                results[key] = data
+        ordered = sorted(results.items(), key=lambda kv: _item_key(kv[0]))
+        return {(k[1] if trait is not None else k): v for k, v in ordered}
+
+    def figure_names(self, trait, item) -> list[str]:
+        rows = self.conn.execute(
+            'SELECT name FROM figures WHERE trait = ? AND item = ? ORDER BY name', (str(trait), str(item)),
+        )
+        return [r['name'] for r in rows]
+
+    def figure_bytes(self, trait, item, name) -> tuple[str, bytes] | None:
+        """(格式, 字节), 不存在时返回 None。"""
+        row = self.conn.execute(
+            'SELECT format, data FROM figures WHERE trait = ? AND item = ? AND name = ?',
+            (str(trait), str(item), name),
+        ).fetchone()
+        return (row['format'], row['data']) if row else None
+
+    def figure(self, trait, item, name) -> Image.Image | None:
+        """以 PIL Image 读取一张图片, 不存在时返回 None。"""
+        blob = self.figure_bytes(trait, item, name)
+        if blob is None:
+            return None
+        image = Image.open(io.BytesIO(blob[1]))
+        image.load()
+        return image
+
+    def load_vng_pics(self, trait, item, order=VNG_ORDER) -> dict[str, Image.Image]:
+        """按 VNG 面板顺序读取条目的生成图像 {vng: Image} (图片名为面板名, 如 'E'), 缺失的面板跳过。"""
+        pics = {}
+        for vng in order:
+            image = self.figure(trait, item, vng)
+            if image is not None:
+                pics[vng] = image
+        return pics
+
+    def query(self, sql, params=()):
+        """执行任意只读 SQL (表: items、figures、extra 及 KINDS 中的每种产物), 返回字典列表。"""
+        return [dict(r) for r in self.conn.execute(sql, params)]
+
+    # ---- 导入 ----
+    def import_dir(self, results_dir: str, pictures_dir: str | None = None) -> int:
+        """
+        导入旧的目录结构: <results_dir>/results (ResultStore) 或 {T}/data/{T}_{id}_all.pkl,
+        {T}/figs/{name}_{T}_{id}.tif, 以及 pictures_dir/{T}/{T}_{id}/{vng}.*.png 的生成图像。
+
+        :return: 导入的条目数
+        """
+        results = {}
+        if os.path.exists(os.path.join(results_dir, 'results', 'manifest.json')):
+            store = ResultStore(os.path.join(results_dir, 'results'))
+            results = {key: (lambda key=key: store.read(*key)) for key in store.items()}
+        for path in sorted(glob.glob(os.path.join(results_dir, '*', 'data', '*_all.pkl'))):
+            key = tuple(os.path.basename(path)[:-len('_all.pkl')].split('_', 1))
+            results.setdefault(key, lambda path=path: _load_pickle(path))
+
+        for (trait, item), load in results.items():
+            self.write(trait, item, load())
+            for path in glob.glob(os.path.join(results_dir, trait, 'figs', f'*_{trait}_{item}.*')):
+                name, ext = os.path.splitext(os.path.basename(path))
+                with open(path, 'rb') as f:
+                    self.put_figure(trait, item, name[:-len(f'_{trait}_{item}')], f.read(), format=ext.lstrip('.'))
+            if pictures_dir is not None:
+                for path in glob.glob(os.path.join(pictures_dir, trait, f'{trait}_{item}', '*.png')):
+                    with open(path, 'rb') as f:
+                        self.put_figure(trait, item, os.path.basename(path).split('.')[0], f.read())
+        return len(results)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='将结果目录导入单个 campaign 数据库')
+    parser.add_argument('results_dir')
+    parser.add_argument('database')
+    parser.add_argument('--pictures', help='生成图像的目录, 如 results/final/output')
+    args = parser.parse_args()
+    with CampaignStore(args.database) as campaign:
+        print(f'imported {campaign.import_dir(args.results_dir, args.pictures)} items into {campaign}')
@@ -1,13 +1,17 @@
 from __future__ import annotations
 
+import copy
 import json
 import os
 import pickle
+import threading
+from dataclasses import asdict
 from dataclasses import dataclass
 from dataclasses import field
 from typing import Any
 from typing import Dict
 
+import networkx as nx
 import pandas as pd
 base_path = os.path.dirname(os.path.abspath(__file__))
 
@@ -93,15 +97,15 @@ G = DatasetMetadata(
     data={
         'Gs': {
             'description': 'G after VNG.',
-            'path': os.path.join(base_path, 'Gs.pkl'),
+            'path': os.path.join(base_path, 'Gs.graphs.json'),
         },
         'G': {
             'description': 'original G.',
-            'path': os.path.join(base_path, 'G.pkl'),
+            'path': os.path.join(base_path, 'G.graphs.json'),
         },
         'clean_G': {
             'description': 'G after trait-relavant cues extraction.',
-            'path': os.path.join(base_path, 'clean_G.pkl'),
+            'path': os.path.join(base_path, 'clean_G.graphs.json'),
         },
     },
 )
@@ -131,19 +135,120 @@ image_schema = DatasetMetadata(
         },
     },
 )
+
+
+class FrozenDict(dict):
+    """只读的 dict: 仍是 dict 的实例 (可直接 json.dump), 但任何修改都抛出 TypeError。"""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError('DataManager.read(..., frozen=True) 返回的数据是只读的, 需要修改时请去掉 frozen=True')
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self):
+        return type(self), (dict(self),)
+
+    def __deepcopy__(self, memo):
+        return {copy.deepcopy(k, memo): copy.deepcopy(v, memo) for k, v in self.items()}
+
+
+class FrozenList(list):
+    """只读的 list, 见 FrozenDict。"""
+
+    _readonly = FrozenDict._readonly
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _readonly
+    append = clear = extend = insert = pop = remove = reverse = sort = _readonly
+
+    def __reduce__(self):
+        return type(self), (list(self),)
+
+    def __deepcopy__(self, memo):
+        return [copy.deepcopy(v, memo) for v in self]
+
+
+def freeze(data):
+    """递归地将 dict/list 转为只读的 FrozenDict/FrozenList, networkx 图以 nx.freeze 冻结 (原地)。"""
+    if isinstance(data, dict):
+        return FrozenDict({k: freeze(v) for k, v in data.items()})
+    if isinstance(data, list):
+        return FrozenList(freeze(v) for v in data)
+    if isinstance(data, nx.Graph):
+        return nx.freeze(data)
+    return data
+
+
+def thaw(data):
+    """freeze 的逆操作, 返回可修改的深拷贝 (冻结的图以 copy() 复制)。"""
+    if isinstance(data, dict):
+        return {k: thaw(v) for k, v in data.items()}
+    if isinstance(data, list):
+        return [thaw(v) for v in data]
+    if isinstance(data, nx.Graph):
+        return data.copy()
+    return data
+
+
+# 进程内的数据集缓存: key -> ((mtime_ns, size), data); 文件被修改后下一次读取时重新加载
+_CACHE = {}
+_CACHE_LOCKS = {}
+_LOCK = threading.Lock()
+
+
+def _cached(key, path, load):
+    """返回 key 对应的缓存数据; 未缓存或 path 的 mtime/大小变化时调用 load() 重新加载。同一个 key 只加载一次。"""
+    stat = os.stat(path)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    with _LOCK:
+        lock = _CACHE_LOCKS.setdefault(key, threading.Lock())
+    with lock:
+        hit = _CACHE.get(key)
+        if hit is not None and hit[0] == stamp:
+            return hit[1]
+        data = load()
+        _CACHE[key] = (stamp, data)
+        return data
+
+
+def clear_cache():
+    """清空数据集缓存。"""
+    with _LOCK:
+        _CACHE.clear()
+
+
+def _load_file(data_path):
+    if data_path.endswith('.graphs.json'):
+        from .results import load_graphs
+        return freeze(load_graphs(data_path))
+    elif data_path.endswith('.json'):
+        with open(data_path, encoding='utf-8') as f:
+            return freeze(json.load(f))
+    elif data_path.endswith('.pkl'):
+        with open(data_path, 'rb') as f:
+            return freeze(pickle.load(f))
+    else:
+        raise ValueError(f'Unsupported file format: {data_path}')
+
+
+METADATA = freeze({
+    'any_scene_graph': asdict(meta_SceneGraph),
+    'situation_DIAMONDS': asdict(situation_DIAMONDS),
+    'situation_judgment_test': asdict(situation_judgment_test),
+    'situation_judgement_test_G': asdict(G),
+    'image_schema': asdict(image_schema),
+})
+
+
 class DataManager():
+    """
+    数据集的统一入口。文件在进程内解析一次并缓存 (所有 DataManager 实例与线程共享),
+    文件的修改时间或大小变化后自动重新加载。read 默认返回缓存数据的可修改副本;
+    只读取不修改的调用方可以用 read(..., frozen=True) 直接取得共享的只读数据
+    (FrozenDict/FrozenList, 图为 nx.freeze 冻结的图), 省去复制。
+    """
+
     def __init__(self):
-        self.metadata = json.loads(
-            json.dumps(
-                {
-                    'any_scene_graph': meta_SceneGraph.__dict__,
-                    'situation_DIAMONDS': situation_DIAMONDS.__dict__,
-                    'situation_judgment_test': situation_judgment_test.__dict__,
-                    'situation_judgement_test_G': G.__dict__,
-                    'image_schema': image_schema.__dict__,
-                }, default=lambda o: o.__dict__,
-            ),
-        )
+        self.metadata = thaw(METADATA)
 
     def _repr_html_(self):
         """
@@ -164,8 +269,11 @@ class DataManager():
         return df.to_html(index=False, header=True, escape=True)
 
     def read(
-        self, data_head, data_name, extract_stiu=False,replace_you = False,
+        self, data_head, data_name, extract_stiu=False,replace_you = False, frozen=False,
     ):
+        """
+        :param frozen: 为 True 时返回共享的只读数据, 否则返回可修改的副本
+        """
 
         if extract_stiu and data_head != 'situation_judgment_test':
             raise ValueError(
@@ -176,32 +284,34 @@ class DataManager():
             raise ValueError(f'Data head {data_name} not found in metadata.')
 
         data_path = self.metadata[data_head]['data'][data_name]['path']
-        if data_path.endswith('.json'):
-            with open(data_path, encoding='utf-8') as f:
-                data = json.load(f)
-        elif data_path.endswith('.pkl'):
-            with open(data_path, 'rb') as f:
-                data = pickle.load(f)
-        else:
-            raise ValueError(f'Unsupported file format: {data_path}')
-
         if extract_stiu or replace_you:
-            situs = {
-            triat: {
-                i: '.'.join(
-                data[triat][i]['situ']
-                .replace('your', "Ye's")
-                .replace('you', 'Ye')
-                .replace('are', 'is')
-                .replace('You', 'Ye')
-                .replace('Your', "Ye's")
-                .split('.')[:-1] if extract_stiu else data[triat][i]['situ'],
-                ) if replace_you else '.'.join(data[triat][i]['situ'].split('.')[:-1])
-                for i in data[triat]
-            }
-            for triat in data
-            }
-            return situs
+            key = (data_path, extract_stiu, replace_you)
+            data = _cached(key, data_path, lambda: freeze(self._situs(data_path, extract_stiu, replace_you)))
+        else:
+            data = _cached(data_path, data_path, lambda: _load_file(data_path))
+        return data if frozen else thaw(data)
 
+    def vocab(self, name):
+        """any_scene_graph 词表 name 的内存映射视图 (见 vocab.py), 支持完全、前缀与三元组近似查找。"""
+        from .vocab import load_vocab
+        return load_vocab(name)
 
-        return data
+    @staticmethod
+    def _situs(data_path, extract_stiu, replace_you):
+        data = _cached(data_path, data_path, lambda: _load_file(data_path))
+        situs = {
+        triat: {
+            i: '.'.join(
+            data[triat][i]['situ']
+            .replace('your', "Ye's")
+            .replace('you', 'Ye')
+            .replace('are', 'is')
+            .replace('You', 'Ye')
+            .replace('Your', "Ye's")
+            .split('.')[:-1] if extract_stiu else data[triat][i]['situ'],
+            ) if replace_you else '.'.join(data[triat][i]['situ'].split('.')[:-1])
+            for i in data[triat]
+        }
+        for triat in data
+        }
+        return situs
@@ -0,0 +1,305 @@
+from __future__ import annotations
+
+import glob
+import json
+import os
+import pickle
+import sqlite3
+
+import networkx as nx
+
+from ..utils.graph_hash import hash_G
+
+# fit() 输出中需要入库的图, 及其是否为 {vng: G} 形式
+GRAPH_KINDS = {
+    'situation_graph': False,
+    'vng_graphs': True,
+    'intergrated_Gs': True,
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS graphs (
+    gid INTEGER PRIMARY KEY,
+    trait TEXT NOT NULL,
+    item TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    vng TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    UNIQUE (trait, item, kind, vng)
+);
+CREATE TABLE IF NOT EXISTS nodes (
+    gid INTEGER NOT NULL REFERENCES graphs(gid) ON DELETE CASCADE,
+    node TEXT NOT NULL,
+    type TEXT,
+    value TEXT COLLATE NOCASE,
+    attrs TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS edges (
+    gid INTEGER NOT NULL REFERENCES graphs(gid) ON DELETE CASCADE,
+    src TEXT NOT NULL,
+    dst TEXT NOT NULL,
+    type TEXT,
+    value TEXT COLLATE NOCASE,
+    src_value TEXT COLLATE NOCASE,
+    dst_value TEXT COLLATE NOCASE,
+    attrs TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS graphs_hash ON graphs (hash);
+CREATE INDEX IF NOT EXISTS nodes_value ON nodes (value, type);
+CREATE INDEX IF NOT EXISTS nodes_type ON nodes (type, value);
+CREATE INDEX IF NOT EXISTS nodes_gid ON nodes (gid, node);
+CREATE INDEX IF NOT EXISTS edges_value ON edges (value, type);
+CREATE INDEX IF NOT EXISTS edges_src ON edges (src_value, type);
+CREATE INDEX IF NOT EXISTS edges_dst ON edges (dst_value, type);
+CREATE INDEX IF NOT EXISTS edges_gid ON edges (gid, dst);
+"""
+
+_GRAPH_COLS = 'g.trait, g.item, g.kind, g.vng'
+
+
+class GraphStore:
+    """
+    跨情景的持久化图语料库 (SQLite), 对节点/边的 value 与 type 建立倒排索引,
+    索引指向 (trait, item, kind, vng, node id)。
+
+    kind 为 fit() 输出中的图类别 ('situation_graph', 'vng_graphs', 'intergrated_Gs'),
+    vng 为 VNG 面板名 (situation_graph 的 vng 为空字符串)。value 的比较不区分大小写。
+
+    用法:
+        store = GraphStore('results/final/graphs.sqlite')
+        store.ingest_dir('results/final')            # 或 store.ingest(trait, item, res) / store.ingest_store(results)
+        store.find_edges(type='relation_edge', value='criticizes', dst='Ye')
+        store.objects_with_attribute('angry')
+    """
+
+    def __init__(self, path=':memory:'):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA foreign_keys = ON')
+        self.conn.executescript(_SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.conn.execute('SELECT COUNT(*) FROM graphs').fetchone()[0]
+
+    def _repr_html_(self):
+        rows = self.conn.execute(
+            "SELECT kind, COUNT(*) AS graphs, COUNT(DISTINCT trait || '/' || item) AS items FROM graphs GROUP BY kind",
+        ).fetchall()
+        body = ''.join(f'<tr><td>{r["kind"]}</td><td>{r["graphs"]}</td><td>{r["items"]}</td></tr>' for r in rows)
+        return f"""
+            <h3 style="color: #9FE2BF;">GraphStore: {self.path}</h3>
+            <table><tr><th>kind</th><th>graphs</th><th>items</th></tr>{body}</table>
+        """
+
+    # ---- 写入 ----
+    def _insert_G(self, trait, item, kind, vng, G):
+        cur = self.conn.execute(
+            'INSERT INTO graphs (trait, item, kind, vng, hash) VALUES (?, ?, ?, ?, ?)',
+            (trait, str(item), kind, vng, hash_G(G)),
+        )
+        gid = cur.lastrowid
+        node_data = dict(G.nodes(data=True))
+        self.conn.executemany(
+            'INSERT INTO nodes (gid, node, type, value, attrs) VALUES (?, ?, ?, ?, ?)',
+            [
+                (gid, n, d.get('type'), _text(d.get('value')), json.dumps(d, ensure_ascii=False, default=str))
+                for n, d in node_data.items()
+            ],
+        )
+        self.conn.executemany(
+            'INSERT INTO edges (gid, src, dst, type, value, src_value, dst_value, attrs) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            [
+                (
+                    gid, u, v, d.get('type'), _text(d.get('value')),
+                    _text(node_data[u].get('value')), _text(node_data[v].get('value')),
+                    json.dumps(d, ensure_ascii=False, default=str),
+                )
+                for u, v, d in G.edges(data=True)
+            ],
+        )
+
+    def ingest(self, trait, item, res, commit=True):
+        """
+        写入一个条目的 fit() 输出; 同一 (trait, item) 已存在的图会被替换。
+
+        :param trait: 特质名或缩写
+        :param item: 条目 id
+        :param res: SituationProcessor.fit() 返回的字典
+        """
+        self.conn.execute('DELETE FROM graphs WHERE trait = ? AND item = ?', (trait, str(item)))
+        for kind, is_dict in GRAPH_KINDS.items():
+            graphs = res.get(kind)
+            if graphs is None or isinstance(graphs, str):
+                continue
+            for vng, G in (graphs.items() if is_dict else [('', graphs)]):
+                self._insert_G(trait, item, kind, vng, G)
+        if commit:
+            self.conn.commit()
+
+    def ingest_results(self, all_results):
+        """批量写入 {trait: {item: res}} (如 EXAMPLE_batch.py 中的 all_results), 单个事务。"""
+        with self.conn:
+            for trait, items in all_results.items():
+                for item, res in items.items():
+                    if res is not None:
+                        self.ingest(trait, item, res, commit=False)
+
+    def ingest_dir(self, results_dir):
+        """
+        批量写入结果目录下所有 {T}/data/{T}_{id}_all.pkl 文件, 单个事务。
+
+        :return: 写入的条目数
+        """
+        paths = sorted(glob.glob(os.path.join(results_dir, '*', 'data', '*_all.pkl')))
+        with self.conn:
+            for path in paths:
+                trait, item = os.path.basename(path)[:-len('_all.pkl')].split('_', 1)
+                with open(path, 'rb') as f:
+                    self.ingest(trait, item, pickle.load(f), commit=False)
+        return len(paths)
+
+    def ingest_store(self, store):
+        """
+        批量写入 ResultStore (见 results.py) 中的所有条目, 单个事务。
+
+        :return: 写入的条目数
+        """
+        items = store.items()
+        with self.conn:
+            for trait, item in items:
+                self.ingest(trait, item, store.read(trait, item, kinds=list(GRAPH_KINDS)), commit=False)
+        return len(items)
+
+    # ---- 查询 ----
+    def _where(self, conds, params, kind=None, trait=None):
+        if kind is not None:
+            conds.append('g.kind = ?')
+            params.append(kind)
+        if trait is not None:
+            conds.append('g.trait = ?')
+            params.append(trait)
+        return ' AND '.join(conds) if conds else '1'
+
+    def find_nodes(self, value=None, type=None, kind=None, trait=None):
+        """
+        按节点 value / type 查找, 返回 [{'trait', 'item', 'kind', 'vng', 'node', 'type', 'value'}]。
+        """
+        conds, params = [], []
+        if value is not None:
+            conds.append('n.value = ?')
+            params.append(value)
+        if type is not None:
+            conds.append('n.type = ?')
+            params.append(type)
+        where = self._where(conds, params, kind, trait)
+        rows = self.conn.execute(
+            f'SELECT {_GRAPH_COLS}, n.node, n.type, n.value FROM nodes n JOIN graphs g USING (gid) WHERE {where}',
+            params,
+        )
+        return [dict(r) for r in rows]
+
+    def find_edges(self, value=None, type=None, src=None, dst=None, kind=None, trait=None):
+        """
+        按边 value / type 及端点节点的 value 查找, 例如:
+            find_edges(type='relation_edge', value='criticizes', dst='Ye')
+        返回 [{'trait', 'item', 'kind', 'vng', 'src', 'dst', 'type', 'value', 'src_value', 'dst_value'}]。
+        """
+        conds, params = [], []
+        for col, val in (('e.value', value), ('e.type', type), ('e.src_value', src), ('e.dst_value', dst)):
+            if val is not None:
+                conds.append(f'{col} = ?')
+                params.append(val)
+        where = self._where(conds, params, kind, trait)
+        rows = self.conn.execute(
+            f'SELECT {_GRAPH_COLS}, e.src, e.dst, e.type, e.value, e.src_value, e.dst_value '
+            f'FROM edges e JOIN graphs g USING (gid) WHERE {where}',
+            params,
+        )
+        return [dict(r) for r in rows]
+
+    def objects_with_attribute(self, attribute, kind=None, trait=None):
+        """
+        统计带有给定属性 (经 attribute_edge 相连) 的对象, 返回按出现次数降序的 [(object value, count)]。
+        """
+        conds = ["e.type = 'attribute_edge'", 'e.src_value = ?']
+        params = [attribute]
+        where = self._where(conds, params, kind, trait)
+        rows = self.conn.execute(
+            f'SELECT e.dst_value AS value, COUNT(*) AS n FROM edges e JOIN graphs g USING (gid) '
+            f'WHERE {where} GROUP BY e.dst_value ORDER BY n DESC, value',
+            params,
+        )
+        return [(r['value'], r['n']) for r in rows]
+
+    def cooccurring(self, value, type=None, with_type=None, kind=None, trait=None):
+        """
+        统计与给定 value 的节点出现在同一张图中的其它节点, 返回按图数降序的 [(value, count)]。
+
+        :param type: 限定给定节点的类型
+        :param with_type: 限定共现节点的类型, 如 'object_node'
+        """
+        conds = ['a.value = ?', 'b.node != a.node']
+        params = [value]
+        if type is not None:
+            conds.append('a.type = ?')
+            params.append(type)
+        if with_type is not None:
+            conds.append('b.type = ?')
+            params.append(with_type)
+        where = self._where(conds, params, kind, trait)
+        rows = self.conn.execute(
+            f'SELECT b.value AS value, COUNT(DISTINCT a.gid) AS n FROM nodes a '
+            f'JOIN nodes b ON b.gid = a.gid JOIN graphs g ON g.gid = a.gid '
+            f'WHERE {where} GROUP BY b.value ORDER BY n DESC, value',
+            params,
+        )
+        return [(r['value'], r['n']) for r in rows]
+
+    def duplicates(self, kind=None):
+        """返回结构哈希相同的图分组 [[(trait, item, kind, vng), ...], ...], 用于发现等价的运行结果。"""
+        params = []
+        where = self._where([], params, kind)
+        rows = self.conn.execute(
+            f'SELECT hash, {_GRAPH_COLS} FROM graphs g WHERE {where} AND hash IN '
+            f'(SELECT hash FROM graphs g WHERE {where} GROUP BY hash HAVING COUNT(*) > 1) ORDER BY hash',
+            params * 2,
+        )
+        groups = {}
+        for r in rows:
+            groups.setdefault(r['hash'], []).append((r['trait'], r['item'], r['kind'], r['vng']))
+        return list(groups.values())
+
+    def load_G(self, trait, item, kind='situation_graph', vng=''):
+        """从库中还原一张图 (nx.DiGraph), 不存在时返回 None。"""
+        row = self.conn.execute(
+            'SELECT gid FROM graphs WHERE trait = ? AND item = ? AND kind = ? AND vng = ?',
+            (trait, str(item), kind, vng),
+        ).fetchone()
+        if row is None:
+            return None
+        G = nx.DiGraph()
+        for r in self.conn.execute('SELECT node, attrs FROM nodes WHERE gid = ? ORDER BY rowid', (row['gid'],)):
+            G.add_node(r['node'], **json.loads(r['attrs']))
+        for r in self.conn.execute('SELECT src, dst, attrs FROM edges WHERE gid = ? ORDER BY rowid', (row['gid'],)):
+            G.add_edge(r['src'], r['dst'], **json.loads(r['attrs']))
+        return G
+
+    def query(self, sql, params=()):
+        """执行任意只读 SQL (表: graphs, nodes, edges), 返回字典列表。"""
+        return [dict(r) for r in self.conn.execute(sql, params)]
+
+
+def _text(value):
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False, default=str)
@@ -0,0 +1,394 @@
+"""
+fit() 输出的持久化格式, 取代 pickle (加载慢、依赖 networkx 版本、不能安全地共享)。
+
+一个结果目录 (如 results/final/results) 包含:
+
+    manifest.json    {"format": "sg-results", "version": 1, "commits": true, ...}
+    <kind>.jsonl     每种产物一个文件 (situation_graph、vng_graphs、cues、Gs_prompt_polished ...),
+                     每个条目一行: {"trait": ..., "item": ..., "data": ...}
+    commits.log      每个写完的条目一行提交记录: {"trait": ..., "item": ..., "spans": {kind: [offset, length]}}
+    index.json       {kind: {"trait/item": [offset, length]}} 以及写索引时各文件的大小
+
+图以 encode_tree 编码为 {"__graph__": {"directed", "graph", "nodes": [[id, attrs]], "edges": [[u, v, attrs]]}},
+GraphOverlay 会先物化, 读回时均为 nx.DiGraph。文件只追加, 同一条目重复写入时以最后一次提交为准。
+
+一个条目的各产物行写入并 fsync 之后才追加 (并 fsync) 它的提交记录, 索引只收录已提交的条目:
+写到一半崩溃的条目没有提交记录, 不会被读到, `(trait, item) in store` 也为 False, 重跑时重新写入。
+索引落后于提交记录时 (如写入进程崩溃) 打开时只扫描 commits.log 的尾部补全。没有提交记录的旧目录
+(manifest 中没有 "commits") 仍按扫描各产物文件的方式恢复, 所有产物都已写入的条目才算完成。
+
+部分读取只打开需要的文件并按偏移量读取:
+    store = ResultStore('results/final/results')
+    store.read_kind('Gs_prompt_polished', trait='N')   # {item: {vng: prompt}}
+    store.read('O', '1', kinds=['situation_graph'])
+
+迁移已有的 pickle:
+    python -m src.datasets.results migrate results/final   # {T}/data/{T}_{id}_all.pkl -> results/final/results
+    python -m src.datasets.results datasets                # src/datasets 下的 G/Gs/clean_G.pkl -> *.graphs.json
+"""
+from __future__ import annotations
+
+import argparse
+import glob
+import json
+import os
+import pickle
+import threading
+import time
+
+import networkx as nx
+
+from ..utils.graph_overlay import as_G
+from ..utils.graph_overlay import GraphOverlay
+
+try:
+    import orjson
+except ImportError:  # 可选依赖, 缺失时退回标准库 json
+    orjson = None
+
+FORMAT = 'sg-results'
+GRAPHS_FORMAT = 'sg-graphs'
+VERSION = 1
+COMMITS = 'commits.log'
+
+_loads = orjson.loads if orjson is not None else json.loads
+
+
+def encode_graph(G) -> dict:
+    """nx 图 (或 GraphOverlay) -> 可 JSON 序列化的字典。"""
+    G = as_G(G)
+    return {
+        'directed': G.is_directed(),
+        'graph': dict(G.graph),
+        'nodes': [[n, d] for n, d in G.nodes(data=True)],
+        'edges': [[u, v, d] for u, v, d in G.edges(data=True)],
+    }
+
+
+def decode_graph(payload: dict) -> nx.Graph:
+    """encode_graph 的逆操作。"""
+    G = nx.DiGraph() if payload.get('directed', True) else nx.Graph()
+    G.graph.update(payload.get('graph', {}))
+    G.add_nodes_from((n, d) for n, d in payload['nodes'])
+    G.add_edges_from((u, v, d) for u, v, d in payload['edges'])
+    return G
+
+
+def encode_tree(data):
+    """递归编码嵌套的 dict/list, 其中的图替换为 {'__graph__': encode_graph(G)}。"""
+    if isinstance(data, (nx.Graph, GraphOverlay)):
+        return {'__graph__': encode_graph(data)}
+    if isinstance(data, dict):
+        return {k: encode_tree(v) for k, v in data.items()}
+    if isinstance(data, (list, tuple)):
+        return [encode_tree(v) for v in data]
+    return data
+
+
+def decode_tree(data):
+    """encode_tree 的逆操作。"""
+    if isinstance(data, dict):
+        if len(data) == 1 and '__graph__' in data:
+            return decode_graph(data['__graph__'])
+        return {k: decode_tree(v) for k, v in data.items()}
+    if isinstance(data, list):
+        return [decode_tree(v) for v in data]
+    return data
+
+
+def _check_version(header, expected, path):
+    if header.get('format') != expected:
+        raise ValueError(f'{path} 不是 {expected} 格式')
+    if header.get('version', 0) > VERSION:
+        raise ValueError(f'{path} 的格式版本 {header["version"]} 高于当前支持的 {VERSION}, 请升级代码')
+
+
+def dump_graphs(data, path: str) -> None:
+    """将含图的嵌套数据 (如 {item: G}) 写为单个 .graphs.json 文件 (原子写入)。"""
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(
+            {'format': GRAPHS_FORMAT, 'version': VERSION, 'data': encode_tree(data)},
+            f, ensure_ascii=False, default=str,
+        )
+    os.replace(tmp, path)
+
+
+def load_graphs(path: str):
+    """读取 dump_graphs 写出的文件。"""
+    with open(path, encoding='utf-8') as f:
+        payload = json.load(f)
+    _check_version(payload, GRAPHS_FORMAT, path)
+    return decode_tree(payload['data'])
+
+
+class ResultStore:
+    """
+    按产物类别分文件的 fit() 结果库, 见模块说明。同一进程内的多个线程可以并发写入;
+    多个进程同时写入同一个目录不受支持。
+
+    :param path: 结果目录, 不存在时创建
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        manifest = os.path.join(path, 'manifest.json')
+        if os.path.exists(manifest):
+            with open(manifest, encoding='utf-8') as f:
+                self.manifest = json.load(f)
+            _check_version(self.manifest, FORMAT, path)
+        else:
+            self.manifest = {
+                'format': FORMAT, 'version': VERSION, 'commits': True,
+                'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            }
+            self._write_json('manifest.json', self.manifest)
+        self._commits = bool(self.manifest.get('commits'))
+        self._index = {}
+        self._sizes = {}
+        self._load_index()
+
+    def __repr__(self):
+        return f'ResultStore({self.path!r}, {len(self)} items, kinds={self.kinds()})'
+
+    def __len__(self):
+        return len(self.items())
+
+    def __contains__(self, key):
+        """条目是否已完整写入: 有提交记录; 旧目录中为所有产物都已写入。"""
+        trait, item = key
+        key = f'{trait}/{item}'
+        if self._commits:
+            return any(key in entries for entries in self._index.values())
+        return bool(self._index) and all(key in entries for entries in self._index.values())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.flush()
+
+    # ---- 索引 ----
+    def _file(self, kind):
+        return os.path.join(self.path, f'{kind}.jsonl')
+
+    def _write_json(self, name, data):
+        path = os.path.join(self.path, name)
+        tmp = f'{path}.{os.getpid()}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def _load_index(self):
+        path = os.path.join(self.path, 'index.json')
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                saved = json.load(f)
+            self._index = saved['entries']
+            self._sizes = saved['sizes']
+        if self._commits:
+            path = os.path.join(self.path, COMMITS)
+            if os.path.exists(path) and os.path.getsize(path) != self._sizes.get(COMMITS):
+                self._scan_commits()
+            return
+        for file in glob.glob(os.path.join(self.path, '*.jsonl')):
+            kind = os.path.basename(file)[:-len('.jsonl')]
+            if os.path.getsize(file) != self._sizes.get(kind):
+                self._scan(kind)
+
+    def _scan(self, kind):
+        """从索引记录的位置起扫描 kind 文件的尾部; 文件比记录的短时 (被替换过) 从头扫描。"""
+        path = self._file(kind)
+        start = self._sizes.get(kind, 0)
+        if os.path.getsize(path) < start:
+            start = 0
+            self._index[kind] = {}
+        entries = self._index.setdefault(kind, {})
+        with open(path, 'rb') as f:
+            f.seek(start)
+            offset = start
+            for line in f:
+                if not line.endswith(b'\n'):  # 正在写入或写入中断的行
+                    break
+                try:
+                    row = _loads(line)
+                except ValueError:  # 中断的写入与之后追加的行拼在一起, 跳过
+                    row = None
+                if row is not None:
+                    entries[f'{row["trait"]}/{row["item"]}'] = [offset, len(line)]
+                offset += len(line)
+        self._sizes[kind] = offset
+
+    def _scan_commits(self):
+        """从索引记录的位置起扫描 commits.log 的尾部, 把其中的提交记录补入索引。"""
+        path = os.path.join(self.path, COMMITS)
+        start = self._sizes.get(COMMITS, 0)
+        if os.path.getsize(path) < start:
+            start = 0
+            self._index = {}
+        with open(path, 'rb') as f:
+            f.seek(start)
+            offset = start
+            for line in f:
+                if not line.endswith(b'\n'):  # 正在写入或写入中断的提交记录
+                    break
+                try:
+                    row = _loads(line)
+                except ValueError:  # 中断的写入与之后追加的行拼在一起, 跳过
+                    row = None
+                if row is not None:
+                    for kind, span in row['spans'].items():
+                        self._index.setdefault(kind, {})[f'{row["trait"]}/{row["item"]}'] = span
+                offset += len(line)
+        self._sizes[COMMITS] = offset
+
+    def _append(self, path, data: bytes) -> list[int]:
+        """在文件末尾追加 data 并 fsync, 返回 [offset, length]。上次写入中断留下的残行之后另起一行。"""
+        with open(path, 'a+b') as f:
+            offset = f.seek(0, os.SEEK_END)
+            if offset:
+                f.seek(offset - 1)
+                if f.read(1) != b'\n':
+                    f.write(b'\n')
+                    offset += 1
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        return [offset, len(data)]
+
+    def flush(self):
+        """写出索引 (写入后调用, 或使用 with 语句)。"""
+        with self._lock:
+            self._write_json('index.json', {'entries': self._index, 'sizes': self._sizes})
+
+    # ---- 写入 ----
+    def write(self, trait, item, res: dict, flush=False) -> None:
+        """
+        写入一个条目的 fit() 输出, 每个 key 一行追加到对应的 <kind>.jsonl, 全部写完后追加提交记录;
+        提交记录写入之前崩溃时该条目视为未写入。
+
+        :param trait: 特质名或缩写
+        :param item: 条目 id
+        :param res: SituationProcessor.fit() 返回的字典
+        :param flush: 为 True 时立即写出索引
+        """
+        trait, item = str(trait), str(item)
+        lines = {
+            kind: (
+                json.dumps(
+                    {'trait': trait, 'item': item, 'data': encode_tree(value)}, ensure_ascii=False, default=str,
+                ) + '\n'
+            ).encode('utf-8')
+            for kind, value in res.items()
+        }
+        with self._lock:
+            spans = {kind: self._append(self._file(kind), line) for kind, line in lines.items()}
+            commit = json.dumps({'trait': trait, 'item': item, 'spans': spans}, ensure_ascii=False) + '\n'
+            self._sizes[COMMITS] = sum(self._append(os.path.join(self.path, COMMITS), commit.encode('utf-8')))
+            for kind, span in spans.items():
+                self._index.setdefault(kind, {})[f'{trait}/{item}'] = span
+                self._sizes[kind] = sum(span)
+        if flush:
+            self.flush()
+
+    # ---- 读取 ----
+    def kinds(self) -> list[str]:
+        return sorted(self._index)
+
+    def items(self, kind=None) -> list[tuple[str, str]]:
+        """已写入的 (trait, item), 可限定 kind。"""
+        keys = set()
+        for k, entries in self._index.items():
+            if kind is None or k == kind:
+                keys.update(entries)
+        return sorted((tuple(key.split('/', 1)) for key in keys), key=_sort_key)
+
+    def read(self, trait, item, kinds=None) -> dict | None:
+        """
+        读取一个条目, 返回与 fit() 输出相同结构的字典 (图为 nx.DiGraph); 不存在时返回 None。
+
+        :param kinds: 只读取这些产物, 如 ['Gs_prompt_polished']
+        """
+        key = f'{trait}/{item}'
+        res = {}
+        for kind in (kinds or self.kinds()):
+            span = self._index.get(kind, {}).get(key)
+            if span is None:
+                continue
+            with open(self._file(kind), 'rb') as f:
+                f.seek(span[0])
+                res[kind] = decode_tree(_loads(f.read(span[1]))['data'])
+        return res or None
+
+    def read_kind(self, kind: str, trait=None) -> dict:
+        """
+        读取一种产物的全部条目: 给定 trait 时返回 {item: data}, 否则返回 {(trait, item): data}。
+        该产物尚无条目 (如新建的空存储) 时返回 {}。
+        """
+        entries = self._index.get(kind, {})
+        spans = sorted(
+            (span[0], span[1], key) for key, span in entries.items()
+            if trait is None or key.split('/', 1)[0] == str(trait)
+        )
+        path = self._file(kind)
+        if not spans or not os.path.exists(path):
+            return {}
+        results = {}
+        with open(path, 'rb') as f:
+            for offset, length, key in spans:
+                f.seek(offset)
+                data = decode_tree(_loads(f.read(length))['data'])
+                t, item = key.split('/', 1)
+                results[item if trait is not None else (t, item)] = data
+        return dict(sorted(results.items(), key=lambda kv: _sort_key(kv[0] if trait is None else (trait, kv[0]))))
+
+
+def _sort_key(key):
+    trait, item = key
+    return (trait, int(item) if item.isdigit() else float('inf'), item)
+
+
+def migrate(results_dir: str, out: str | None = None) -> ResultStore:
+    """
+    将 EXAMPLE_batch.py 旧格式的 {T}/data/{T}_{id}_all.pkl 转换到 ResultStore (默认 <results_dir>/results)。
+    pickle 只应从可信的来源读取。
+    """
+    store = ResultStore(out or os.path.join(results_dir, 'results'))
+    paths = sorted(glob.glob(os.path.join(results_dir, '*', 'data', '*_all.pkl')))
+    for path in paths:
+        trait, item = os.path.basename(path)[:-len('_all.pkl')].split('_', 1)
+        with open(path, 'rb') as f:
+            store.write(trait, item, pickle.load(f))
+    store.flush()
+    return store
+
+
+def migrate_datasets(directory: str | None = None) -> list[str]:
+    """将 src/datasets 下的图 pickle 转换为同名的 .graphs.json, 返回写出的文件。"""
+    from .data_manager import base_path
+    written = []
+    for path in sorted(glob.glob(os.path.join(directory or base_path, '*.pkl'))):
+        with open(path, 'rb') as f:
+            data = pickle.load(f)
+        target = path[:-len('.pkl')] + '.graphs.json'
+        dump_graphs(data, target)
+        written.append(target)
+    return written
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='将 pickle 结果迁移为 JSON 格式')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('migrate', help='{T}/data/{T}_{id}_all.pkl -> ResultStore')
+    p.add_argument('results_dir')
+    p.add_argument('--out')
+    p = sub.add_parser('datasets', help='src/datasets/*.pkl -> *.graphs.json')
+    p.add_argument('--dir')
+    args = parser.parse_args()
+    if args.command == 'migrate':
+        print(migrate(args.results_dir, args.out))
+    else:
+        for path in migrate_datasets(args.dir):
+            print(path)
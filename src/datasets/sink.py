@@ -0,0 +1,178 @@
+"""
+流式结果写入: 批量运行中每个条目完成后立即交给 sink, 由后台写线程持久化并释放内存,
+中途崩溃只损失尚未写完的条目, 内存中也不会同时保留全部图。
+
+- put() 把条目放入有界队列, 队列满时阻塞 (背压), 避免计算快于写盘时内存增长
+- 写线程逐个调用 persist(); 每个条目要么完整写入要么视为未写入 (CampaignStore 每个条目一个事务,
+  ResultStore 在各产物行 fsync 之后才追加该条目的提交记录), 崩溃后可按 `(trait, item) in sink` 续跑
+- 写入失败不会中断运行: 写线程以 msg.fail 报告并记录在 sink.errors 中,
+  strict=True 时 close() 抛出第一个错误
+
+用法:
+    with CampaignSink('results/final/campaign.sqlite', figures=draw_figures) as sink:
+        for future in as_completed(futures):
+            trait, item, res = future.result()
+            sink.put(trait, item, res)
+"""
+from __future__ import annotations
+
+import queue
+import threading
+from abc import ABC
+from abc import abstractmethod
+
+from wasabi import msg
+
+from .campaign import CampaignStore
+from .results import ResultStore
+
+_STOP = object()
+
+
+class ResultSink(ABC):
+    """
+    后台写线程 + 有界队列的 sink 基类, 子类实现 persist(trait, item, res), 可选实现 persist_failure(trait, item, error)。
+
+    :param maxsize: 队列中最多等待写入的条目数
+    :param strict: 为 True 时 close() 抛出写线程中的第一个错误
+    """
+
+    def __init__(self, maxsize: int = 8, strict: bool = False):
+        self.strict = strict
+        self.written = 0
+        self.errors = []
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=f'{type(self).__name__}-writer', daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def put(self, trait, item, res) -> None:
+        """提交一个完成的条目; res 为 None 时记为失败。队列满时阻塞直到写线程跟上。"""
+        if self._closed:
+            raise RuntimeError('sink 已关闭')
+        self._queue.put((trait, item, res, None))
+
+    def fail(self, trait, item, error) -> None:
+        """提交一个失败的条目。"""
+        if self._closed:
+            raise RuntimeError('sink 已关闭')
+        self._queue.put((trait, item, None, error))
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def _run(self):
+        while True:
+            task = self._queue.get()
+            try:
+                if task is _STOP:
+                    return
+                trait, item, res, error = task
+                try:
+                    if res is None:
+                        self.persist_failure(trait, item, error or 'no result')
+                    else:
+                        self.persist(trait, item, res)
+                        self.written += 1
+                except Exception as e:
+                    msg.fail(f'Failed to persist {trait}_{item}: {type(e).__name__}: {e}')
+                    # 去掉 traceback, 否则其中的栈帧会一直引用 res
+                    self.errors.append((trait, item, e.with_traceback(None)))
+                # 释放对结果的引用, 写完的条目不再占用内存
+                del task, res
+            finally:
+                self._queue.task_done()
+
+    def flush(self) -> None:
+        """等待队列中已提交的条目全部写完。"""
+        self._queue.join()
+
+    def close(self) -> None:
+        """写完剩余的条目并停止写线程。"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+        self.finalize()
+        if self.errors:
+            msg.warn(f'{len(self.errors)} items could not be persisted, see sink.errors')
+            if self.strict:
+                raise self.errors[0][2]
+
+    @abstractmethod
+    def persist(self, trait, item, res) -> None:
+        """在写线程中持久化一个完成的条目。"""
+
+    def persist_failure(self, trait, item, error) -> None:
+        pass
+
+    def finalize(self) -> None:
+        """写线程结束后调用, 用于关闭底层存储。"""
+
+
+class CampaignSink(ResultSink):
+    """
+    写入 CampaignStore (campaign.py) 的 sink。
+
+    :param campaign: CampaignStore 或数据库路径
+    :param figures: 可选的 callable(res) -> {名称: Figure | bytes}, 在写线程中绘制, Figure 写入后关闭
+                    (viz.batch.BatchRenderer.render_result 直接返回编码后的字节)
+    :param format: 图片格式
+    :param savefig: 传给 Figure.savefig 的参数
+    """
+
+    def __init__(self, campaign, figures=None, format='png', maxsize=8, strict=False, **savefig):
+        self.campaign = CampaignStore(campaign) if isinstance(campaign, str) else campaign
+        self._owns_campaign = isinstance(campaign, str)
+        self.figures = figures
+        self.format = format
+        self.savefig = savefig
+        super().__init__(maxsize=maxsize, strict=strict)
+
+    def __contains__(self, key):
+        return key in self.campaign
+
+    def persist(self, trait, item, res):
+        figures = self.figures(res) if self.figures is not None else {}
+        try:
+            self.campaign.write(trait, item, res, figures=figures, format=self.format, **self.savefig)
+        finally:
+            for fig in figures.values():
+                if hasattr(fig, 'savefig'):
+                    import matplotlib.pyplot as plt
+                    plt.close(fig)
+
+    def persist_failure(self, trait, item, error):
+        self.campaign.mark_failed(trait, item, error)
+
+    def finalize(self):
+        if self._owns_campaign:
+            self.campaign.close()
+
+
+class ResultStoreSink(ResultSink):
+    """
+    写入 ResultStore (results.py) 的 sink, 每个条目写入后立即更新索引。
+
+    :param store: ResultStore 或结果目录
+    """
+
+    def __init__(self, store, maxsize=8, strict=False):
+        self.store = ResultStore(store) if isinstance(store, str) else store
+        super().__init__(maxsize=maxsize, strict=strict)
+
+    def __contains__(self, key):
+        return key in self.store
+
+    def persist(self, trait, item, res):
+        self.store.write(trait, item, res, flush=True)
+
+    def finalize(self):
+        self.store.flush()
@@ -0,0 +1,303 @@
+"""
+any_scene_graph 词表 (objects / attributes / relations / scene_attributes) 的二进制存储与查找。
+
+每个词表由 JSON 转换一次, 写为一个内存映射文件 (<name>.vocab, 与 JSON 同目录, 不入库):
+
+    magic (8 字节) | header 长度 (uint64) | header (JSON) | 按 8 字节对齐的数组
+
+数组 (均以 np.memmap 只读映射, 多个进程共享同一份页缓存):
+  - keys_blob / keys_offsets:    规范化后的词 (去掉词义标注, 小写, '_' '-' 视为空格), 按字典序排列的 UTF-8 字符串表
+  - terms_blob / terms_offsets:  与 keys 一一对应的原始词 (保留词义标注, 如 'cup (container)')
+  - category:                    每个词的类别 id, 类别名 (如 'color'、'style/genre') 在 header 中
+  - tri_keys / tri_ptr / tri_ids: 三元组 (trigram) 倒排索引, CSR 格式
+  - tri_count:                   每个词的三元组数, 用于计算 Jaccard 相似度
+
+JSON 的 mtime 或大小变化后, 下一次 load_vocab 时自动重建。
+
+用法:
+    vocab = load_vocab('objects')
+    vocab.exact('Cross-Vine')         # [('cross_vine', '')]
+    vocab.exact('cup')                # [('cup (container)', ''), ('cup (hole)', ''), ...]
+    vocab.prefix('cow', limit=5)
+    vocab.fuzzy('colegue', limit=3)   # [(term, category, score), ...]
+
+预先构建全部词表: python -m src.datasets.vocab
+"""
+from __future__ import annotations
+
+import bisect
+import json
+import os
+import re
+import threading
+from functools import lru_cache
+
+import numpy as np
+
+from .data_manager import _load_file
+from .data_manager import base_path
+
+VOCABULARIES = ('objects', 'attributes', 'relations', 'scene_attributes')
+
+MAGIC = b'SGVOCAB2'
+_ALIGN = 8
+_SEPARATORS = re.compile(r'[\s_\-]+')
+_SENSE = re.compile(r'\s*\([^)]*\)')
+
+
+def normalize(value: str) -> str:
+    """查找用的规范化: 小写, 下划线/连字符/连续空白视为单个空格。"""
+    return _SEPARATORS.sub(' ', value.lower()).strip()
+
+
+def display(term: str) -> str:
+    """词表中的词写回图中的形式: 去掉词义标注与下划线, 如 'cow (cattle)' -> 'cow', 'cross_vine' -> 'cross vine'。"""
+    return _SENSE.sub('', term).replace('_', ' ').strip() or term
+
+
+def trigrams(key: str) -> set[int]:
+    """
+    规范化字符串的三元组 (首部补两个空格、尾部补一个空格, 与 pg_trgm 一致),
+    每个三元组的 3 个码点各占 21 位打包为一个整数, 不会冲突。
+    """
+    padded = f'  {key} '
+    return {
+        (ord(padded[i]) << 42) | (ord(padded[i + 1]) << 21) | ord(padded[i + 2])
+        for i in range(len(padded) - 2)
+    }
+
+
+def vocab_path(name: str) -> str:
+    return os.path.join(base_path, 'any_scene_graph', f'{name}.vocab')
+
+
+def source_path(name: str) -> str:
+    return os.path.join(base_path, 'any_scene_graph', f'{name}.json')
+
+
+def _flatten(data, category=''):
+    """将词表 JSON (列表或按类别嵌套的字典) 展开为 (词, 类别) 列表, 嵌套类别以 '/' 连接。"""
+    if isinstance(data, dict):
+        return [
+            item for key, value in data.items()
+            for item in _flatten(value, f'{category}/{key}' if category else key)
+        ]
+    return [(term, category) for term in data if isinstance(term, str)]
+
+
+def _string_table(strings):
+    encoded = [s.encode('utf-8') for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(b) for b in encoded])
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+
+def build_vocab(name: str, path: str | None = None) -> str:
+    """由 any_scene_graph/<name>.json 构建 <name>.vocab (原子写入), 返回文件路径。"""
+    source = source_path(name)
+    path = path or vocab_path(name)
+    entries = sorted({(normalize(display(term)), term, category) for term, category in _flatten(_load_file(source))})
+    entries = [entry for entry in entries if entry[0]]
+    categories = sorted({category for _, _, category in entries})
+    category_ids = {category: i for i, category in enumerate(categories)}
+
+    postings = {}
+    tri_count = np.zeros(len(entries), dtype=np.int16)
+    for i, (key, _, _) in enumerate(entries):
+        grams = trigrams(key)
+        tri_count[i] = len(grams)
+        for gram in grams:
+            postings.setdefault(gram, []).append(i)
+    tri_keys = np.array(sorted(postings), dtype=np.int64)
+    tri_ptr = np.zeros(len(tri_keys) + 1, dtype=np.int64)
+    tri_ptr[1:] = np.cumsum([len(postings[k]) for k in tri_keys])
+    tri_ids = np.fromiter((i for k in tri_keys for i in postings[k]), dtype=np.int32, count=int(tri_ptr[-1]))
+
+    keys_blob, keys_offsets = _string_table([key for key, _, _ in entries])
+    terms_blob, terms_offsets = _string_table([term for _, term, _ in entries])
+    arrays = {
+        'keys_blob': keys_blob,
+        'keys_offsets': keys_offsets,
+        'terms_blob': terms_blob,
+        'terms_offsets': terms_offsets,
+        'category': np.array([category_ids[c] for _, _, c in entries], dtype=np.int32),
+        'tri_keys': tri_keys,
+        'tri_ptr': tri_ptr,
+        'tri_ids': tri_ids,
+        'tri_count': tri_count,
+    }
+
+    stat = os.stat(source)
+    layout = {}
+    offset = 0
+    for key, array in arrays.items():
+        layout[key] = {'dtype': array.dtype.str, 'offset': offset, 'length': len(array)}
+        offset += -(-array.nbytes // _ALIGN) * _ALIGN
+    header = json.dumps({
+        'name': name,
+        'size': len(entries),
+        'categories': categories,
+        'source': [stat.st_mtime_ns, stat.st_size],
+        'arrays': layout,
+    }).encode('utf-8')
+    header += b' ' * (-(len(MAGIC) + 8 + len(header)) % _ALIGN)
+
+    tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(MAGIC)
+        f.write(np.uint64(len(header)).tobytes())
+        f.write(header)
+        for array in arrays.values():
+            data = array.tobytes()
+            f.write(data + b'\0' * (-len(data) % _ALIGN))
+    os.replace(tmp, path)
+    return path
+
+
+def _read_header(path):
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f'{path} 不是词表文件')
+        size = int(np.frombuffer(f.read(8), dtype=np.uint64)[0])
+        return json.loads(f.read(size)), len(MAGIC) + 8 + size
+
+
+class Vocabulary:
+    """
+    内存映射的只读词表, 见模块说明。
+
+    :param path: build_vocab 生成的 .vocab 文件
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.header, data_offset = _read_header(path)
+        self.name = self.header['name']
+        self.categories = self.header['categories']
+        self._size = self.header['size']
+        for key, spec in self.header['arrays'].items():
+            array = np.memmap(
+                path, dtype=np.dtype(spec['dtype']), mode='r',
+                offset=data_offset + spec['offset'], shape=(spec['length'],),
+            ) if spec['length'] else np.empty(0, dtype=np.dtype(spec['dtype']))
+            setattr(self, f'_{key}', array)
+        self._keys = _StringTable(self._keys_blob, self._keys_offsets)
+        self._terms = _StringTable(self._terms_blob, self._terms_offsets)
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, value):
+        return bool(self._key_range(normalize(value)))
+
+    def __repr__(self):
+        return f'Vocabulary({self.name!r}, {len(self)} terms, {len(self.categories)} categories)'
+
+    def entry(self, i: int) -> tuple[str, str]:
+        """第 i 个词的 (原始词, 类别)。"""
+        return self._terms[i], self.categories[self._category[i]]
+
+    def key(self, i: int) -> str:
+        return self._keys[i]
+
+    def _key_range(self, key):
+        lo = bisect.bisect_left(self._keys, key)
+        hi = bisect.bisect_right(self._keys, key, lo)
+        return range(lo, hi)
+
+    def exact(self, value: str) -> list[tuple[str, str]]:
+        """规范化后完全相同的词 (不计词义标注, 'cup' 命中每个 'cup (...)'), 返回 [(原始词, 类别), ...]。"""
+        return [self.entry(i) for i in self._key_range(normalize(value))]
+
+    def prefix(self, value: str, limit: int = 20) -> list[tuple[str, str]]:
+        """规范化后以 value 开头的词 (按字典序, 至多 limit 个)。"""
+        key = normalize(value)
+        start = bisect.bisect_left(self._keys, key)
+        results = []
+        for i in range(start, len(self)):
+            if len(results) >= limit or not self._keys[i].startswith(key):
+                break
+            results.append(self.entry(i))
+        return results
+
+    def fuzzy(self, value: str, limit: int = 5, threshold: float = 0.3) -> list[tuple[str, str, float]]:
+        """
+        按三元组 Jaccard 相似度查找近似的词。
+
+        :return: [(原始词, 类别, 相似度), ...], 按相似度降序, 相似度不低于 threshold
+        """
+        grams = np.fromiter(trigrams(normalize(value)), dtype=np.int64)
+        keys = self._tri_keys
+        if not len(keys):
+            return []
+        pos = np.minimum(np.searchsorted(keys, grams), len(keys) - 1)
+        pos = pos[keys[pos] == grams]
+        if not len(pos):
+            return []
+        ids = np.concatenate([self._tri_ids[self._tri_ptr[p]:self._tri_ptr[p + 1]] for p in pos])
+        candidates, shared = np.unique(ids, return_counts=True)
+        scores = shared / (len(grams) + self._tri_count[candidates] - shared)
+        keep = scores >= threshold
+        candidates, scores = candidates[keep], scores[keep]
+        order = np.lexsort((candidates, -scores))[:limit]
+        return [(*self.entry(int(candidates[i])), round(float(scores[i]), 4)) for i in order]
+
+    def lookup(self, value: str, threshold: float = 0.5) -> tuple[str, str, float] | None:
+        """value 在词表中的最佳匹配: 完全匹配时相似度为 1.0, 否则取最相近的词, 均低于 threshold 时返回 None。"""
+        exact = self.exact(value)
+        if exact:
+            return (*exact[0], 1.0)
+        best = self.fuzzy(value, limit=1, threshold=threshold)
+        return best[0] if best else None
+
+
+class _StringTable:
+    """UTF-8 字符串表的序列视图, 供 bisect 在内存映射上做二分查找。"""
+
+    def __init__(self, blob, offsets):
+        # memoryview 的索引与切片直接返回 int/bytes, 比 numpy 标量快一个数量级
+        self.blob = memoryview(blob)
+        self.offsets = memoryview(offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return bytes(self.blob[self.offsets[i]:self.offsets[i + 1]]).decode('utf-8')
+
+
+def _is_stale(path, name):
+    if not os.path.exists(path):
+        return True
+    stat = os.stat(source_path(name))
+    try:
+        header, _ = _read_header(path)
+    except ValueError:
+        return True
+    return header['source'] != [stat.st_mtime_ns, stat.st_size]
+
+
+_BUILD_LOCK = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def _load(name, path):
+    with _BUILD_LOCK:
+        if _is_stale(path, name):
+            build_vocab(name, path)
+    return Vocabulary(path)
+
+
+def load_vocab(name: str) -> Vocabulary:
+    """返回词表 name 的内存映射视图 (进程内缓存); 文件不存在或 JSON 已更新时先重建。"""
+    if name not in VOCABULARIES:
+        raise ValueError(f'未知的词表: {name!r}, 可用词表: {list(VOCABULARIES)}')
+    path = vocab_path(name)
+    if _is_stale(path, name):
+        _load.cache_clear()
+    return _load(name, path)
+
+
+if __name__ == '__main__':
+    for name in VOCABULARIES:
+        print(load_vocab(name))
@@ -2,3 +2,10 @@ from __future__ import annotations
 
 from .llm import BaseLLM
 from .llms import TempletLLM
+from .mock import MockLLM
+from .mock import use_mock
+from .parallel import speculative_call
+from .recorder import Recorder
+from .recorder import Replayer
+from .routing import ModelRouter
+from .routing import ROUTER
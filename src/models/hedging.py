@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import math
+import threading
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+
+
+class LatencyTracker:
+    """
+    按模板记录请求延迟 (秒), 提供分位数估计, 用于决定何时发出对冲请求。
+
+    :param min_samples: 样本数不足时 quantile 返回 None
+    :param window: 每个模板保留的最近样本数
+    """
+
+    def __init__(self, min_samples=20, window=500):
+        self.min_samples = min_samples
+        self.window = window
+        self.samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, task, seconds):
+        with self._lock:
+            samples = self.samples.setdefault(task, [])
+            samples.append(seconds)
+            del samples[:-self.window]
+
+    def quantile(self, task, q=0.95):
+        with self._lock:
+            samples = sorted(self.samples.get(task, []))
+        if len(samples) < self.min_samples:
+            return None
+        return samples[min(len(samples) - 1, math.ceil(q * len(samples)) - 1)]
+
+
+def hedged_call(primary, backup, delay):
+    """
+    先执行 primary(); 若 delay 秒内未完成则再执行 backup(), 返回先成功完成的结果。
+
+    两者都失败时抛出 primary 的异常。落后的请求不会被中断, 在后台结束后其结果被丢弃。
+
+    :param primary: 无参可调用对象
+    :param backup: 无参可调用对象 (通常是 primary 的独立副本)
+    :param delay: 发出对冲请求前的等待时间 (秒)
+    :return: (result, hedged) 二元组, hedged 表示结果是否来自 backup
+    """
+    executor = ThreadPoolExecutor(max_workers=2)
+    try:
+        first = executor.submit(primary)
+        done, _ = wait([first], timeout=delay)
+        if done:
+            return first.result(), False
+        second = executor.submit(backup)
+        pending = {first, second}
+        errors = {}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    return future.result(), future is second
+                except Exception as err:
+                    errors[future] = err
+        raise errors.get(first) or errors[second]
+    finally:
+        executor.shutdown(wait=False)
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import json
 import os
+import re
 import time
 from typing import Any
 
@@ -10,18 +11,60 @@ from dotenv import load_dotenv
 from openai import APIConnectionError
 from openai import BadRequestError
 from openai import OpenAI
+from wasabi import msg as printer
 
 from ..config import LLMConfig
+from ..prompts.budget import count_tokens
 from ..utils import llm_utils
 load_dotenv()
 
 
+def _openai_client():
+    return OpenAI(
+        base_url=os.getenv('LLM_URL'),
+        api_key=os.getenv('LLM_API'),
+    )
+
+
+# 客户端后端: 名称 -> 无参工厂, 返回兼容 OpenAI 客户端的对象 (提供 chat.completions.create)
+BACKENDS = {'openai': _openai_client}
+
+
+def register_backend(name: str, factory) -> None:
+    """注册一个客户端后端, 通过 LLMConfig.backend 或环境变量 LLM_BACKEND 按名称选用。"""
+    BACKENDS[name] = factory
+
+
+# 每次请求返回后依次调用 hook(name, messages, response, latency, model), 如 models/recorder.py 的 Recorder
+RESPONSE_HOOKS = []
+
+
+def backend_name() -> str:
+    return LLMConfig.backend or os.getenv('LLM_BACKEND') or 'openai'
+
+
+def backend_factory(backend: str | None = None):
+    backend = backend or backend_name()
+    if backend not in BACKENDS:
+        raise ValueError(f'未知的 LLM 后端: {backend!r}, 可用后端: {list(BACKENDS)}')
+    return BACKENDS[backend]
+
+
+# 后端拒绝结构化输出时 BadRequestError 的错误信息中出现的关键词
+_STRUCTURED_OUTPUT_ERROR = re.compile(r'response_format|json_schema|structured', re.IGNORECASE)
+
+
+def _rejects_structured_output(err) -> bool:
+    """err 是否为后端不支持 response_format/json_schema 导致的 BadRequestError。"""
+    if not isinstance(err, BadRequestError):
+        return False
+    return bool(_STRUCTURED_OUTPUT_ERROR.search(f'{err} {getattr(err, "body", "")}'))
+
+
 class BaseLLM:
     def __init__(self):
-        self.client = OpenAI(
-            base_url=os.getenv('LLM_URL'),
-            api_key=os.getenv('LLM_API'),
-        )
+        self._client = None
+        self._factory = None
         self.model = LLMConfig.model
         self.max_tokens = LLMConfig.max_tokens
         self.temperature = LLMConfig.temperature
@@ -31,9 +74,25 @@ class BaseLLM:
         self.presence_penalty = LLMConfig.presence_penalty
         self.stop = LLMConfig.stop
         self.response_format = LLMConfig.response_format
+        self.structured_output = LLMConfig.structured_output
+
+    @property
+    def client(self):
+        """按当前后端在首次请求时创建的客户端; 后端切换或重新注册后重新创建。直接赋值时固定使用所赋的客户端。"""
+        factory = backend_factory()
+        if self._client is None or (self._factory is not None and self._factory is not factory):
+            self._client = factory()
+            self._factory = factory
+        return self._client
+
+    @client.setter
+    def client(self, client) -> None:
+        self._client = client
+        self._factory = None
 
     def _repr_html_(self, title='LLM Settings'):
         params = {
+            'backend': backend_name(),
             'model': self.model,
             'max_tokens': self.max_tokens,
             'temperature': self.temperature,
@@ -43,6 +102,7 @@ class BaseLLM:
             'presence_penalty': self.presence_penalty,
             'stop': self.stop,
             'response_format': self.response_format,
+            'structured_output': self.structured_output,
         }
         df = pd.DataFrame(params.items(), columns=['Parameter', 'Value'])
         df_html = df.to_html(index=False)
@@ -52,43 +112,110 @@ class BaseLLM:
         """
         return df_html
 
+    def _response_format(self, schema, name, structured=True):
+        if schema is None or not structured or not self.structured_output:
+            return self.response_format
+        return {
+            'type': 'json_schema',
+            'json_schema': {
+                'name': re.sub(r'[^a-zA-Z0-9_-]', '_', name or 'output'),
+                'schema': schema,
+                # 含动态键 (如 VNG 面板名) 的 schema 无法满足 strict 模式的约束
+                'strict': False,
+            },
+        }
+
     def call(
         self,
         msg: list[dict],
         json=True,
         retries=3,
+        schema: dict | None = None,
+        name: str | None = None,
+        max_tokens: int | None = None,
+        timeout: float | None = None,
+        model: str | None = None,
+        usage: dict | None = None,
+        structured: bool = True,
     ) -> dict[Any, Any] | str:
+        """
+        调用 LLM, json=True 时提取并返回 JSON 字典。
+
+        模型与输出 token 数按调用传入/传出而不保存在实例上, 因此同一个 BaseLLM 可以在多个线程中
+        以不同模型并发调用。
+
+        给定 schema 时: 若 structured_output 开启则以 json_schema 结构化输出发送
+        (后端以 BadRequestError 拒绝 response_format/json_schema 时, 本次调用退回 response_format,
+        其他 BadRequestError 照常重试); 返回的 JSON
+        在本地按 schema 校验, 不符合时重新请求, 重试用尽后抛出 SchemaValidationError。
+
+        :param msg: 对话消息列表
+        :param json: 是否解析为 JSON
+        :param retries: 最大请求次数
+        :param schema: 输出的 JSON Schema
+        :param name: schema 名称 (一般为模板名), 用于结构化输出与错误信息
+        :param max_tokens: 本次调用的输出上限, 默认为 self.max_tokens; 输出因达到上限而被截断时,
+                           下一次重试将上限加倍
+        :param timeout: 单次请求的超时 (秒), 超时按连接错误重试
+        :param model: 本次调用使用的模型, 默认为 self.model
+        :param usage: 不为 None 时, 本次调用的输出 token 数写入 usage['output_tokens']
+        :param structured: 为 False 时本次调用不使用 json_schema 结构化输出
+        """
+        model = model or self.model
+        max_tokens = max_tokens or self.max_tokens
+        response_format = self._response_format(schema, name, structured) if json else self.response_format
         for attempt in range(retries):
             try:
+                start = time.perf_counter()
                 response = self.client.chat.completions.create(
                     messages=msg,
-                    response_format=self.response_format,
-                    model=self.model,
-                    max_tokens=self.max_tokens,
+                    response_format=response_format,
+                    model=model,
+                    max_tokens=max_tokens,
                     temperature=self.temperature,
                     top_p=self.top_p,
                     frequency_penalty=self.frequency_penalty,
                     presence_penalty=self.presence_penalty,
                     stop=self.stop,
+                    timeout=timeout,
                 )
-                break
             except (
                 BadRequestError, APIConnectionError,
             ) as err:
+                if response_format is not self.response_format and _rejects_structured_output(err):
+                    printer.warn(f'{model} does not accept json_schema output, falling back to {self.response_format}')
+                    return self.call(
+                        msg, json=json, retries=retries, schema=schema, name=name,
+                        max_tokens=max_tokens, timeout=timeout, model=model, usage=usage, structured=False,
+                    )
                 if attempt < retries - 1:
                     continue
                 else:
                     print(f'after {attempt + 1} attempts, failed to call LLM')
                     raise err
-        content = response.choices[0].message.content.strip()
-
-        if json:
-            extracted_json = llm_utils.extract_json(content)
-            if extracted_json is None:
-                raise ValueError(
-                    f'Failed to extract JSON from the response content',
-                    f'original content: {content}',
-                )
+            for hook in RESPONSE_HOOKS:
+                hook(name, msg, response, time.perf_counter() - start, model)
+            choice = response.choices[0]
+            content = choice.message.content.strip()
+            if usage is not None:
+                stats = getattr(response, 'usage', None)
+                usage['output_tokens'] = getattr(stats, 'completion_tokens', None) or count_tokens(content, model)
+            if getattr(choice, 'finish_reason', None) == 'length' and max_tokens and attempt < retries - 1:
+                max_tokens *= 2
+                continue
+
+            if not json:
+                return content
+            try:
+                extracted_json = llm_utils.extract_json(content)
+            except ValueError:
+                if attempt < retries - 1:
+                    continue
+                raise
+            if schema is not None:
+                errors = llm_utils.validate_json(extracted_json, schema)
+                if errors:
+                    if attempt < retries - 1:
+                        continue
+                    raise llm_utils.SchemaValidationError(errors, task=name)
             return extracted_json
-        else:
-            return content
@@ -1,39 +1,167 @@
 from __future__ import annotations
 
+import json
+import time
+
 import pandas as pd
+from openai import APIConnectionError
+from openai import APIStatusError
+from wasabi import msg
 
+from ..config import LLMConfig
 from ..prompts import PromptTemplateManager
+from ..prompts.budget import count_messages
+from ..prompts.budget import OutputHistory
 from ..utils.llm_utils import print_conversation
+from .hedging import hedged_call
+from .hedging import LatencyTracker
 from .llm import BaseLLM
+from .routing import _task_key
+from .routing import ROUTER
+
+# 所有 TempletLLM 共享的输出长度历史, 用于按模板估计 max_tokens
+OUTPUT_HISTORY = OutputHistory(LLMConfig.output_history)
+# 所有 TempletLLM 共享的请求延迟记录, 用于确定对冲请求的发出时机
+LATENCY = LatencyTracker()
 
 
 class TempletLLM:
-    def __init__(self, task: str = None, json: bool = True, **kwargs):
+    def __init__(self, task: str = None, json: bool = True, model: str = None, **kwargs):
+        """
+        model 为 None 时按 ROUTER 的路由为该模板选择模型 (含回退链与级联),
+        指定 model 时固定使用该模型。
+        """
         self.prompt_manager = PromptTemplateManager()
         self.llm = BaseLLM()
+        self._model = None
+        if model is not None:
+            self.model = model
         self.json = json
         self.task = task if task else None
         self.tasks = list(self.prompt_manager._templates.keys())
         self.prompts = []
+        self.schema = None
+        self.output_key = None
         if task is not None:
             task = task.lower()
-            self.task = f'{task}_prompt'
-            self._check_task(self.task)
-            self.template = self.prompt_manager.get_template(self.task)
+            self.set_task(f'{task}_prompt')
+
+    @property
+    def model(self) -> str:
+        """固定使用的模型; 未固定时为底层 LLM 的默认模型 (实际调用的模型由 ROUTER 按模板选择)。"""
+        return self._model or self.llm.model
+
+    @model.setter
+    def model(self, model: str | None) -> None:
+        """固定该模板使用的模型 (None 表示恢复按路由选择)。模型随每次请求传给底层 LLM, 不修改 self.llm。"""
+        self._model = model
+
+    def models(self) -> list[str]:
+        """本次调用依次尝试的模型列表。"""
+        if self._model is not None or self.task is None:
+            return [self.model]
+        return ROUTER.chain(self.task)
 
     def set_task(self, task: str) -> None:
         self._check_task(task)
         self.task = task
         self.template = self.prompt_manager.get_template(task)
+        self.schema = self.prompt_manager.get_schema(task)
+        self.output_key = self.prompt_manager.get_output_key(task)
+
+    def build_prompt(self, passage: str, **kwargs) -> tuple[list[dict], int]:
+        """
+        根据指定任务及参数生成 prompt, 返回 (messages, token 数); 需要 reask 时由调用方保留 messages
+        """
+        return self.prompt_manager.build_prompt(self.task, passage, **kwargs)
 
     def call(self, passage: str, **kwargs) -> dict:
         """
-        根据指定任务及参数生成 prompt 并调用底层 LLM
+        根据指定任务及参数生成 prompt 并调用底层 LLM; self.prompt 记录最近一次的 prompt, 仅供查看
+        """
+        msgs, prompt_tokens = self.build_prompt(passage, **kwargs)
+        self.prompt = msgs
+        return self._call(msgs, prompt_tokens)
+
+    def _call(self, msgs: list[dict], prompt_tokens: int | None = None) -> dict:
+        """
+        发送消息; max_tokens 由该模板的历史输出长度估计, 并以上下文窗口减去本次消息 (如 reask
+        追加了回答与反馈后的对话) 的 token 数为上限, 调用后记录本次输出长度。
+        prompt_tokens 为 msgs 的 token 数 (由 build_prompt 返回), 未给定时在本地统计。
+
+        所用模型与输出 token 数都是本次调用的局部状态, 同一个 TempletLLM 可以在多个线程中并发调用。
+        """
+        max_tokens = OUTPUT_HISTORY.max_tokens(self.task)
+        if max_tokens is not None:
+            if prompt_tokens is None:
+                prompt_tokens = count_messages(msgs, self.prompt_manager.model)
+            max_tokens = min(max_tokens, LLMConfig.context_window - prompt_tokens)
+        models = self.models()
+        cascade = self._model is None and self.task is not None and ROUTER.cascades(self.task)
+        # 模型调用出错时换用下一个模型; 级联时输出不合法 (ValueError, 含 JSON 解析与 schema 校验失败) 同样升级
+        errors = (APIConnectionError, APIStatusError, ValueError) if cascade else (APIConnectionError, APIStatusError)
+        usage = {}
+        for i, model in enumerate(models):
+            last = i == len(models) - 1
+            try:
+                res = self._request(
+                    msgs, json=self.json, schema=self.schema, name=self.task, max_tokens=max_tokens,
+                    retries=1 if cascade and not last else 3, model=model, usage=usage,
+                )
+                break
+            except errors as err:
+                if last:
+                    raise
+                msg.warn(f'{self.task}: {model} failed ({type(err).__name__}), trying {models[i + 1]}')
+        if usage.get('output_tokens') is not None:
+            OUTPUT_HISTORY.record(self.task, usage['output_tokens'])
+        return res
+
+    def _request(self, msgs: list[dict], **kwargs) -> dict:
+        """
+        以该模板的超时 (LLMConfig.timeouts, 默认 LLMConfig.timeout) 调用底层 LLM 并记录延迟;
+        开启 LLMConfig.hedge 时, 请求超过该模板历史延迟的 hedge_quantile 分位数仍未返回则发出对冲请求;
+        两个请求各自记录输出 token 数, 只有胜出者的写入 kwargs['usage']
+        """
+        key = _task_key(self.task) if self.task else None
+        kwargs['timeout'] = LLMConfig.timeouts.get(key, LLMConfig.timeout)
+        delay = LATENCY.quantile(key, LLMConfig.hedge_quantile) if LLMConfig.hedge and key else None
+        start = time.perf_counter()
+        if delay is None:
+            res = self.llm.call(msgs, **kwargs)
+        else:
+            usage = kwargs.pop('usage', None)
+            primary_usage, backup_usage = {}, {}
+            res, hedged = hedged_call(
+                lambda: self.llm.call(msgs, usage=primary_usage, **kwargs),
+                lambda: self.llm.call(msgs, usage=backup_usage, **kwargs),
+                delay,
+            )
+            if usage is not None:
+                usage.update(backup_usage if hedged else primary_usage)
+        if key is not None:
+            LATENCY.record(key, time.perf_counter() - start)
+        return res
+
+    def unwrap(self, response: dict):
+        """
+        返回响应中模板 output_key 下的结果 (如 SceneGraph、VNG、cues), 未声明 output_key 时原样返回。
+        响应已按 output_schema 校验, 因此该键一定存在。
+        """
+        if self.output_key is None:
+            return response
+        return response[self.output_key]
+
+    def reask(self, msgs: list[dict], response: dict, feedback: str) -> dict:
+        """
+        在原 prompt msgs (build_prompt 的返回值) 之后追加模型的回答与校验反馈，要求模型针对问题修正后重新回答。
+        msgs 由调用方传入, 不读取 self.prompt, 多个条目并发使用同一个 TempletLLM 时互不影响
         """
-        self.prompt = self.prompt_manager.make_prompt(
-            self.task, passage, **kwargs,
-        )
-        return self.llm.call(self.prompt, json=self.json)
+        msgs = msgs + [
+            {'role': 'assistant', 'content': json.dumps(response, ensure_ascii=False)},
+            {'role': 'user', 'content': feedback},
+        ]
+        return self._call(msgs)
 
     def print(self, task: str = None) -> None:
         """
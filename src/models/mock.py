@@ -0,0 +1,285 @@
+"""
+离线的 LLM 后端: 与 OpenAI 客户端接口兼容 (chat.completions.create), 供 BaseLLM 在无网络时使用。
+
+- 回放: recordings 中按 prompt 哈希 (prompt_hash) 查找录制的响应, 同一 prompt 的多条录制依次返回
+- 合成: 未录制的 prompt 返回该模板 few-shot 示例中的一个回答 (符合模板的 output_schema),
+  模板没有示例时按 output_schema 生成最小的合法 JSON
+- 延迟: 按 latency 的分布 sleep, 可按模板覆盖; 超过请求的 timeout 时抛出 APITimeoutError;
+  error_rate 按概率模拟连接错误
+
+用法:
+    LLM_BACKEND=mock python EXAMPLE_batch.py
+
+或在代码中:
+    from src.models.mock import use_mock
+    use_mock(latency=('lognormal', 2.0, 0.5), latencies={'sg_generation': ('lognormal', 8.0, 0.4)})
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+import types
+
+from openai import APIConnectionError
+from openai import APITimeoutError
+
+from ..config import LLMConfig
+from ..prompts import PromptTemplateManager
+from ..prompts.budget import count_messages
+from ..prompts.budget import count_tokens
+from ..utils import llm_utils
+from .llm import register_backend
+from .routing import _task_key
+
+
+def prompt_hash(messages: list[dict]) -> str:
+    """消息列表的哈希, 作为录制/回放的键 (与 key 顺序、非 ASCII 转义无关)。"""
+    text = json.dumps(messages, sort_keys=True, ensure_ascii=False)
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def load_recordings(path: str) -> dict[str, list[dict]]:
+    """
+    读取 JSON Lines 格式 (.gz 结尾时按 gzip 解压) 的录制文件, 每行至少包含 hash 与 content,
+    可选 latency (秒) 与 usage。
+
+    :return: {hash: [record, ...]}, 同一 prompt 的多条录制按文件中的顺序排列
+    """
+    opener = gzip.open if path.endswith('.gz') else open
+    recordings = {}
+    with opener(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            record = json.loads(line) if line.strip() else {}
+            # 跳过非调用记录 (如 recorder 归档中的消息表)
+            if 'hash' in record:
+                recordings.setdefault(record['hash'], []).append(record)
+    return recordings
+
+
+def sample_latency(spec, rng: random.Random) -> float:
+    """
+    按 spec 抽取一次延迟 (秒):
+      - None / 数值: 固定延迟
+      - callable(rng): 自定义分布
+      - ('uniform', lo, hi) / ('normal', mu, sd) / ('lognormal', median, sigma) / ('exponential', mean)
+    """
+    if spec is None:
+        return 0.0
+    if callable(spec):
+        return max(0.0, spec(rng))
+    if isinstance(spec, (int, float)):
+        return float(spec)
+    kind, *args = spec
+    if kind == 'uniform':
+        return rng.uniform(*args)
+    if kind == 'normal':
+        return max(0.0, rng.gauss(*args))
+    if kind == 'lognormal':
+        median, sigma = args
+        return rng.lognormvariate(0.0, sigma) * median
+    if kind == 'exponential':
+        return rng.expovariate(1 / args[0])
+    raise ValueError(f'未知的延迟分布: {kind!r}')
+
+
+def synthesize(schema: dict, rng: random.Random):
+    """按 JSON Schema (schemas.py 使用的子集) 生成一个最小的合法值。"""
+    if 'enum' in schema:
+        return rng.choice(schema['enum'])
+    kind = schema.get('type')
+    if isinstance(kind, list):
+        kind = next((k for k in kind if k != 'null'), 'null')
+    if kind == 'object':
+        properties = schema.get('properties', {})
+        value = {key: synthesize(properties[key], rng) for key in schema.get('required', properties)}
+        extra = schema.get('additionalProperties')
+        if isinstance(extra, dict) and not value:
+            value['mock'] = synthesize(extra, rng)
+        return value
+    if kind == 'array':
+        prefix = schema.get('prefixItems')
+        if prefix:
+            return [synthesize(item, rng) for item in prefix]
+        return [synthesize(schema.get('items', {}), rng) for _ in range(max(1, schema.get('minItems', 1)))]
+    if kind == 'integer':
+        return schema.get('minimum', 0)
+    if kind == 'number':
+        return schema.get('minimum', 0.0)
+    if kind == 'boolean':
+        return False
+    if kind == 'null':
+        return None
+    return 'mock'
+
+
+class MockLLM:
+    """
+    兼容 OpenAI 客户端的离线后端, 见模块说明。
+
+    :param recordings: {hash: content 或 [record, ...]} 或录制文件路径 (见 load_recordings)
+    :param latency: 默认延迟分布 (见 sample_latency); 'recorded' 表示回放时使用录制的延迟
+    :param latencies: {模板名: 延迟分布}, 模板名如 'sg_generation'
+    :param error_rate: 每次请求抛出 APIConnectionError 的概率
+    :param strict: 为 True 时未录制的 prompt 抛出 KeyError 而不是合成响应
+    :param seed: 随机种子; 合成的响应只由 seed 与 prompt 决定
+    """
+
+    def __init__(
+        self, recordings=None, latency=None, latencies=None, error_rate=0.0, strict=False, seed=0,
+    ):
+        if isinstance(recordings, str):
+            recordings = load_recordings(recordings)
+        self.recordings = {
+            key: value if isinstance(value, list) else [{'content': value}]
+            for key, value in (recordings or {}).items()
+        }
+        self.latency = latency
+        self.latencies = dict(latencies or {})
+        self.error_rate = error_rate
+        self.strict = strict
+        self.seed = seed
+        self.calls = 0
+        self.replayed = 0
+        self._replay_pos = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._prompt_manager = None
+        self._example_cache = {}
+        self.chat = types.SimpleNamespace(completions=types.SimpleNamespace(create=self.create))
+
+    @property
+    def prompt_manager(self) -> PromptTemplateManager:
+        if self._prompt_manager is None:
+            self._prompt_manager = PromptTemplateManager()
+        return self._prompt_manager
+
+    def _task(self, messages, response_format):
+        """由结构化输出的 schema 名称或 system 消息确定模板名, 无法确定时返回 None。"""
+        templates = self.prompt_manager._templates
+        name = ((response_format or {}).get('json_schema') or {}).get('name')
+        if name:
+            for task in templates:
+                if re.sub(r'[^a-zA-Z0-9_-]', '_', task) == name:
+                    return task
+        system = messages[0].get('content') if messages and messages[0].get('role') == 'system' else None
+        for task, info in templates.items():
+            if system is not None and info['template'] and info['template'][0].get('content') == system:
+                return task
+        return None
+
+    def _replay(self, key):
+        with self._lock:
+            records = self.recordings.get(key)
+            if not records:
+                return None
+            pos = self._replay_pos.get(key, 0)
+            self._replay_pos[key] = pos + 1
+            self.replayed += 1
+        # 录制用尽后重复最后一条
+        return records[min(pos, len(records) - 1)]
+
+    def _synthesize(self, task, key):
+        rng = random.Random(f'{self.seed}:{key}')
+        if task is None:
+            return '{}'
+        examples = self._examples(task)
+        if examples:
+            return rng.choice(examples)
+        schema = self.prompt_manager.get_schema(task)
+        return json.dumps(synthesize(schema, rng) if schema else {}, ensure_ascii=False)
+
+    def _examples(self, task):
+        """模板 few-shot 中可解析且符合 output_schema 的 assistant 回答 (不含 "ok, I will follow ..." 等确认消息)。"""
+        if task not in self._example_cache:
+            schema = self.prompt_manager.get_schema(task)
+            examples = []
+            for message in self.prompt_manager.get_template(task):
+                if message.get('role') != 'assistant':
+                    continue
+                try:
+                    value = llm_utils.extract_json(message['content'])
+                except ValueError:
+                    continue
+                if schema is None or not llm_utils.validate_json(value, schema):
+                    examples.append(json.dumps(value, ensure_ascii=False))
+            self._example_cache[task] = examples
+        return self._example_cache[task]
+
+    def _latency(self, task, record):
+        if self.latency == 'recorded':
+            return (record or {}).get('latency') or 0.0
+        spec = self.latencies.get(_task_key(task) if task else None, self.latency)
+        with self._lock:
+            return sample_latency(spec, self._rng)
+
+    def create(self, messages, model=None, response_format=None, timeout=None, **kwargs):
+        """与 client.chat.completions.create 相同的调用方式, 返回形如 ChatCompletion 的对象。"""
+        key = prompt_hash(messages)
+        task = self._task(messages, response_format)
+        record = self._replay(key)
+        if record is None and self.strict:
+            raise KeyError(f'没有 prompt {key} ({task}) 的录制')
+        with self._lock:
+            self.calls += 1
+            failed = self.error_rate and self._rng.random() < self.error_rate
+        delay = self._latency(task, record)
+        if timeout is not None and delay > timeout:
+            time.sleep(timeout)
+            raise APITimeoutError(request=None)
+        time.sleep(delay)
+        if failed:
+            raise APIConnectionError(message='mock connection error', request=None)
+
+        content = record['content'] if record is not None else self._synthesize(task, key)
+        model = model or LLMConfig.model
+        usage = (record or {}).get('usage') or {
+            'prompt_tokens': count_messages(messages, model),
+            'completion_tokens': count_tokens(content, model),
+        }
+        usage = {**usage, 'total_tokens': usage['prompt_tokens'] + usage['completion_tokens']}
+        return types.SimpleNamespace(
+            model=model,
+            choices=[
+                types.SimpleNamespace(
+                    index=0,
+                    finish_reason='stop',
+                    message=types.SimpleNamespace(role='assistant', content=content),
+                ),
+            ],
+            usage=types.SimpleNamespace(**usage),
+        )
+
+
+_MOCK = None
+
+
+def mock_backend() -> MockLLM:
+    """
+    'mock' 后端的工厂: 所有 BaseLLM 共享同一个 MockLLM。
+    环境变量 LLM_MOCK_RECORDINGS 指定录制文件, LLM_MOCK_LATENCY 指定固定延迟 (秒)。
+    """
+    global _MOCK
+    if _MOCK is None:
+        latency = os.getenv('LLM_MOCK_LATENCY')
+        _MOCK = MockLLM(
+            recordings=os.getenv('LLM_MOCK_RECORDINGS'),
+            latency=float(latency) if latency else None,
+        )
+    return _MOCK
+
+
+def use_mock(**kwargs) -> MockLLM:
+    """以给定参数创建 MockLLM 并切换到 'mock' 后端, 此后所有 BaseLLM (未直接指定 client 的) 都使用它。"""
+    backend = MockLLM(**kwargs)
+    register_backend('mock', lambda: backend)
+    LLMConfig.backend = 'mock'
+    return backend
+
+
+register_backend('mock', mock_backend)
@@ -0,0 +1,235 @@
+"""
+LLM 调用的录制与回放, 用于复现一次批量运行并度量流水线自身 (非 LLM) 的开销。
+
+- Recorder: 在 BaseLLM 的每次请求返回后记录 (task, prompt, 响应, 延迟, usage),
+  写入 JSON Lines 归档 (.gz 结尾时 gzip 压缩)。few-shot 等重复出现的消息只写入一次,
+  调用记录中以消息 id 引用
+- Replayer: 读取归档, 以 MockLLM 回放录制的响应运行新版本的代码, 按模板比较新旧 prompt
+  并报告墙钟时间、CPU 时间与录制时的 LLM 延迟
+- diff_results: 逐项比较新旧两次 fit 的结果 (图按节点与边的属性比较)
+
+归档中的调用记录可直接作为 MockLLM 的 recordings (LLM_MOCK_RECORDINGS)。
+
+用法:
+    with Recorder('runs/batch.jsonl.gz'):
+        ...  # 批量运行
+
+    report = Replayer('runs/batch.jsonl.gz').run(lambda: P.fit(verbose=False))
+"""
+from __future__ import annotations
+
+import difflib
+import gzip
+import hashlib
+import json
+import threading
+import time
+from collections import Counter
+
+from ..config import LLMConfig
+from .llm import BACKENDS
+from .llm import RESPONSE_HOOKS
+from .mock import prompt_hash
+from .mock import use_mock
+
+
+def _message_id(message: dict) -> str:
+    text = json.dumps(message, sort_keys=True, ensure_ascii=False)
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def read_archive(path: str):
+    """逐条返回归档中的调用记录, 其中 messages 已由消息 id 还原为消息列表。"""
+    opener = gzip.open if path.endswith('.gz') else open
+    messages = {}
+    with opener(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if 'hash' not in record:
+                messages[record.pop('id')] = record
+                continue
+            record['messages'] = [messages[i] for i in record['messages']]
+            yield record
+
+
+def _is_graph(value):
+    return hasattr(value, 'nodes') and hasattr(value, 'edges') and callable(value.nodes)
+
+
+def diff_results(old, new, path: str = '') -> list[str]:
+    """
+    递归比较两个 SituationProcessor.fit 的结果, 返回不一致的路径列表 (如 '/vng_graphs/E')。
+    图 (DiGraph 及其视图) 按节点与边的属性比较, 与对象身份无关。
+    """
+    if _is_graph(old) and _is_graph(new):
+        same = (
+            dict(old.nodes(data=True)) == dict(new.nodes(data=True))
+            and {(u, v): d for u, v, d in old.edges(data=True)} == {(u, v): d for u, v, d in new.edges(data=True)}
+        )
+        return [] if same else [path or '/']
+    if isinstance(old, dict) and isinstance(new, dict):
+        diffs = []
+        for key in sorted(old.keys() | new.keys(), key=str):
+            if key not in old or key not in new:
+                diffs.append(f'{path}/{key}')
+            else:
+                diffs += diff_results(old[key], new[key], f'{path}/{key}')
+        return diffs
+    if isinstance(old, (list, tuple)) and isinstance(new, (list, tuple)) and len(old) == len(new):
+        diffs = []
+        for i, (a, b) in enumerate(zip(old, new)):
+            diffs += diff_results(a, b, f'{path}/{i}')
+        return diffs
+    return [] if old == new else [path or '/']
+
+
+class Recorder:
+    """
+    录制 with 块内所有 LLM 请求 (含重试与 re-ask)。path 为 None 时只保存在 records 中。
+
+    每条调用记录包含 task、hash (见 mock.prompt_hash)、messages (消息 id 列表)、model、
+    content (原始响应文本)、finish_reason、latency (秒)、usage 与 t (相对录制开始的秒数)。
+
+    :param path: 归档路径, .gz 结尾时 gzip 压缩
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path
+        self.records = []
+        self._file = None
+        self._seen = set()
+        self._lock = threading.Lock()
+        self._start = None
+
+    def __enter__(self):
+        if self.path is not None:
+            opener = gzip.open if self.path.endswith('.gz') else open
+            self._file = opener(self.path, 'wt', encoding='utf-8')
+        self._start = time.perf_counter()
+        RESPONSE_HOOKS.append(self)
+        return self
+
+    def __exit__(self, *exc):
+        RESPONSE_HOOKS.remove(self)
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __call__(self, name, messages, response, latency, model):
+        choice = response.choices[0]
+        usage = getattr(response, 'usage', None)
+        record = {
+            'task': name,
+            'hash': prompt_hash(messages),
+            'messages': [_message_id(m) for m in messages],
+            'model': model,
+            'content': choice.message.content,
+            'finish_reason': getattr(choice, 'finish_reason', None),
+            'latency': round(latency, 4),
+            'usage': {
+                'prompt_tokens': getattr(usage, 'prompt_tokens', None),
+                'completion_tokens': getattr(usage, 'completion_tokens', None),
+            } if usage is not None else None,
+            't': round(time.perf_counter() - self._start - latency, 4),
+        }
+        with self._lock:
+            if self._file is None:
+                self.records.append({**record, 'messages': list(messages)})
+                return
+            for message, message_id in zip(messages, record['messages']):
+                if message_id not in self._seen:
+                    self._seen.add(message_id)
+                    self._file.write(json.dumps({'id': message_id, **message}, ensure_ascii=False) + '\n')
+            self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+            self._file.flush()
+
+
+class Replayer:
+    """
+    以录制的响应回放, 运行新版本的代码。
+
+    :param path: Recorder 写入的归档
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.records = list(read_archive(path))
+
+    def recordings(self) -> dict[str, list[dict]]:
+        recordings = {}
+        for record in self.records:
+            recordings.setdefault(record['hash'], []).append(record)
+        return recordings
+
+    def run(self, func, latency=None, strict=False) -> dict:
+        """
+        在回放后端下运行 func(), 返回报告:
+          - result: func 的返回值
+          - wall / cpu: func 的墙钟时间与进程 CPU 时间 (秒)
+          - calls / replayed: 新版本发出的请求数, 其中命中录制的请求数
+          - recorded_latency: 命中的请求在录制时的 LLM 延迟之和
+          - stages: compare 的逐模板比较结果
+
+        latency=None 时回放不等待, wall 即流水线自身的开销; latency='recorded' 时按录制的延迟等待。
+
+        :param func: 无参可调用对象, 如 lambda: SituationProcessor(...).fit(verbose=False)
+        :param latency: 回放延迟, 同 MockLLM
+        :param strict: 为 True 时 prompt 未命中录制即报错, 否则由 MockLLM 合成响应
+        """
+        previous = (LLMConfig.backend, BACKENDS['mock'])
+        backend = use_mock(recordings=self.recordings(), latency=latency, strict=strict)
+        try:
+            with Recorder() as recorder:
+                wall, cpu = time.perf_counter(), time.process_time()
+                result = func()
+                wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        finally:
+            LLMConfig.backend, BACKENDS['mock'] = previous
+        recorded_latency = {}
+        for record in self.records:
+            recorded_latency.setdefault(record['hash'], record['latency'])
+        return {
+            'result': result,
+            'wall': wall,
+            'cpu': cpu,
+            'calls': backend.calls,
+            'replayed': backend.replayed,
+            'recorded_latency': sum(recorded_latency.get(r['hash'], 0.0) for r in recorder.records),
+            'stages': self.compare(recorder.records),
+        }
+
+    def compare(self, records: list[dict], context: int = 2) -> dict[str, dict]:
+        """
+        按模板比较新旧两次运行的 prompt。
+
+        :param records: 新一次运行的调用记录 (Recorder.records)
+        :param context: diff 的上下文行数
+        :return: {task: {'recorded', 'new', 'matched', 'diff'}}, diff 为第一个未命中的新 prompt
+                 与同模板第一个未被匹配的旧 prompt 在最后一条消息上的 unified diff
+        """
+        tasks = sorted({r['task'] for r in self.records} | {r['task'] for r in records}, key=str)
+        stages = {}
+        for task in tasks:
+            old = [r for r in self.records if r['task'] == task]
+            new = [r for r in records if r['task'] == task]
+            matched = Counter(r['hash'] for r in old) & Counter(r['hash'] for r in new)
+            unmatched_old = [r for r in old if r['hash'] not in matched]
+            unmatched_new = [r for r in new if r['hash'] not in matched]
+            diff = []
+            if unmatched_old and unmatched_new:
+                diff = list(
+                    difflib.unified_diff(
+                        str(unmatched_old[0]['messages'][-1]['content']).splitlines(),
+                        str(unmatched_new[0]['messages'][-1]['content']).splitlines(),
+                        'recorded', 'new', n=context, lineterm='',
+                    ),
+                )
+            stages[task] = {
+                'recorded': len(old),
+                'new': len(new),
+                'matched': sum(matched.values()),
+                'diff': diff,
+            }
+        return stages
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import json
+import os
+
+from ..config import LLMConfig
+
+# 模型 -> 同系列的小模型, 用作 small 级别的首选; 不在表中的模型在 small 级别也使用其本身
+SMALL_MODELS = {
+    'gpt-4o': 'gpt-4o-mini',
+}
+
+
+def default_tiers():
+    """
+    默认的模型分级, 按能力从低到高排列; 每级为一条回退链, 前一个模型不可用时使用下一个。
+
+    large 级别为 LLMConfig.model; small 级别先用其在 SMALL_MODELS 中的小模型, 再回退到 LLMConfig.model。
+    每次调用时读取 LLMConfig, 运行中修改 LLMConfig.model 同样生效。
+    """
+    model = LLMConfig.model
+    small = SMALL_MODELS.get(model)
+    return {'small': [small, model] if small else [model], 'large': [model]}
+
+
+# 短小的分类类调用使用小模型, 其余模板默认使用 default_tier
+DEFAULT_ROUTES = {
+    'classfy_node': 'small',
+    'emotion_analysis': 'small',
+    'cues_enrich/emotion_analysis': 'small',
+    'ner': 'small',
+}
+
+# 使用级联的模板: 先用本级模型, 输出校验失败时逐级升级到更高的级别
+DEFAULT_CASCADE = ['classfy_node', 'emotion_analysis', 'cues_enrich/emotion_analysis', 'ner']
+
+
+def _task_key(task):
+    """'classfy_node_prompt' 与 'classfy_node' 视为同一个模板。"""
+    return task[:-len('_prompt')] if task.endswith('_prompt') else task
+
+
+class ModelRouter:
+    """
+    按模板选择模型的路由策略。
+
+    每个模板映射到一个模型级别 (tier), 级别对应一条模型回退链; 模型调用出错
+    (连接失败、模型不存在、限流等) 时依次换用链中的下一个模型。
+    对 cascade 中的模板, 链中还会追加更高级别的模型, 且输出不合法
+    (JSON 解析或 output_schema 校验失败) 时同样升级。
+
+    用法:
+        router = ModelRouter.from_file('routing.json')
+        router.set_route('cues_extraction', 'small', cascade=True)
+        router.chain('cues_extraction_prompt')   # ['gpt-4o-mini', 'gpt-4o']
+
+    :param tiers: {tier: [model, ...]}, 按能力从低到高排列; None 时使用 default_tiers()
+    :param routes: {task: tier}
+    :param default_tier: 未配置路由的模板使用的级别
+    :param cascade: 启用级联的模板列表
+    """
+
+    def __init__(self, tiers=None, routes=None, default_tier='large', cascade=None):
+        self._tiers = None if tiers is None else dict(tiers)
+        self.routes = {_task_key(k): v for k, v in (DEFAULT_ROUTES if routes is None else routes).items()}
+        self.default_tier = default_tier
+        self.cascade = {_task_key(t) for t in (DEFAULT_CASCADE if cascade is None else cascade)}
+        for tier in [*self.routes.values(), default_tier]:
+            if tier not in self.tiers:
+                raise ValueError(f'未知的模型级别: {tier!r}, 可用级别: {list(self.tiers)}')
+
+    @property
+    def tiers(self):
+        """{tier: [model, ...]}; 未指定 tiers 时按当前的 LLMConfig.model 计算。"""
+        return default_tiers() if self._tiers is None else self._tiers
+
+    @classmethod
+    def from_file(cls, path):
+        """
+        从 JSON 文件读取路由配置, 格式为
+        {"tiers": {...}, "routes": {...}, "default_tier": "large", "cascade": [...]},
+        缺省的键使用默认配置。
+        """
+        with open(path, encoding='utf-8') as f:
+            config = json.load(f)
+        return cls(
+            tiers=config.get('tiers'),
+            routes=config.get('routes'),
+            default_tier=config.get('default_tier', 'large'),
+            cascade=config.get('cascade'),
+        )
+
+    def set_route(self, task, tier, cascade=None):
+        """将模板 task 路由到级别 tier; cascade 为 True/False 时同时开启/关闭级联。"""
+        if tier not in self.tiers:
+            raise ValueError(f'未知的模型级别: {tier!r}, 可用级别: {list(self.tiers)}')
+        task = _task_key(task)
+        self.routes[task] = tier
+        if cascade is not None:
+            (self.cascade.add if cascade else self.cascade.discard)(task)
+
+    def tier(self, task):
+        return self.routes.get(_task_key(task), self.default_tier)
+
+    def cascades(self, task):
+        """输出不合法时是否升级到更高级别的模型。"""
+        return _task_key(task) in self.cascade
+
+    def chain(self, task):
+        """返回模板 task 依次尝试的模型列表 (去重)。"""
+        tier = self.tier(task)
+        tiers = list(self.tiers)
+        levels = tiers[tiers.index(tier):] if self.cascades(task) else [tier]
+        models = []
+        for level in levels:
+            for model in self.tiers[level]:
+                if model not in models:
+                    models.append(model)
+        return models
+
+    def _repr_html_(self):
+        rows = ''.join(
+            f'<tr><td>{task}</td><td>{tier}</td><td>{", ".join(self.chain(task))}</td></tr>'
+            for task, tier in sorted(self.routes.items())
+        )
+        return f"""
+            <h3 style="color: #9FE2BF;">Model routing (default: {self.default_tier})</h3>
+            <table><tr><th>task</th><th>tier</th><th>models</th></tr>{rows}</table>
+        """
+
+
+def load_router():
+    """按 LLMConfig.routing 或环境变量 LLM_ROUTING 指定的 JSON 文件创建路由, 均未设置时使用默认配置。"""
+    path = LLMConfig.routing or os.getenv('LLM_ROUTING')
+    if path:
+        return ModelRouter.from_file(path)
+    return ModelRouter()
+
+
+# 所有 TempletLLM 共享的路由
+ROUTER = load_router()
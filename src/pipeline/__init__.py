@@ -1,4 +1,5 @@
 from __future__ import annotations
 
 from .main import SituationProcessor
+from .normalize import Normalizer
 from .utils import *
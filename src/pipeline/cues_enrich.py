@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 from ..models.llms import TempletLLM
-from .utils import find_key_in_result
 
 emo_llm = TempletLLM('emotion_analysis')
 exp_llm = TempletLLM('emotion_to_expression')
@@ -15,10 +14,10 @@ def make_expression(situation, trait, ana_character, act_character):
         analyze_character=ana_character,
         activate_character=act_character,
     )
-    emotion = find_key_in_result(res, 'emotion')['emotion']
+    emotion = res['emotion']
     # 2. Emotion to Expression
     res = exp_llm.call(passage=situation, emotion=emotion, character=ana_character)
-    expression = find_key_in_result(res, 'expression')['expression']
+    expression = exp_llm.unwrap(res)
     return expression
 
 def make_scene(situation, character, trait, scene):
@@ -27,7 +26,7 @@ def make_scene(situation, character, trait, scene):
         passage=situation, character=character,
         trait=trait, scene=scene,
     )
-    scene = find_key_in_result(res, 'scene')['scene']
+    scene = se_llm.unwrap(res)
     return scene
 
 def make_object(situation, character, trait, object_):
@@ -36,7 +35,7 @@ def make_object(situation, character, trait, object_):
         passage=situation, character=character,
         trait=trait, object=object_,
     )
-    _object = find_key_in_result(res, 'object')['object']
+    _object = oe_llm.unwrap(res)
     return _object
 
 def enrich_characters(situation, trait, ana_characters, act_character):
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import hashlib
+import json
 from itertools import chain
 
 import networkx as nx
@@ -7,24 +9,64 @@ import pandas as pd
 from tqdm.autonotebook import tqdm
 
 from ..models.llms import TempletLLM
-from ..utils.graph_utils import build_G
+from ..models.parallel import speculative_call
+from ..utils.graph_codec import compact_G
+from ..utils.graph_hash import hash_G
+from ..utils.graph_hash import hash_Gs
+from ..utils.graph_overlay import as_G
+from ..utils.graph_overlay import GraphOverlay
+from ..utils.graph_query import CUE_QUERIES
+from ..utils.graph_query import run_queries
+from ..utils.graph_schema import format_graph_errors
+from ..utils.graph_schema import GraphPayloadError
+from ..utils.graph_schema import validate_G
+from ..utils.graph_schema import validate_Gs
 from ..utils.graph_utils import dic_G
-from ..utils.graph_utils import extract_knowledge
-from ..utils.graph_utils import find_node_by_value
-from ..utils.graph_utils import get_max_attribute
 from .cues_enrich import enrich_characters
 from .cues_enrich import enrich_objects
 from .cues_enrich import enrich_scenes
+from .normalize import default_normalizer
 from .utils import _replace_pronouns
-from .utils import find_key_in_result
 from .utils import identify_cue_type
 
+REASK_GRAPH = """Your previous answer does not follow the required graph format:
+{errors}
+
+Fix exactly these problems and answer again with the complete JSON under the "{key}" key."""
+
 
 class SituationProcessor:
     """A processor for generating and analyzing situation graphs."""
     # ✅
-    def __init__(self, situ, trait, model='gpt-4o', ref = 'Ye', debug=False):
-        """Initialize the processor with a specific model."""
+    def __init__(
+        self, situ, trait, model=None, ref = 'Ye', debug=False, cache=None, max_reasks=2,
+        graph_format='dict', speculative=None, scorers=None, normalize=None,
+    ):
+        """Initialize the processor.
+
+        `model` pins every stage to one model; when None each stage's model is chosen
+        by the routing policy in models/routing.py (small model for classification
+        stages, fallback chains, optional cascade).
+
+        `cache` is an optional dict-like store shared between processors; stage results
+        keyed by the stage's models and the structural hash of their input graphs are
+        reused from it.
+        `max_reasks` bounds how often a malformed graph answer is sent back to the
+        LLM together with its validation errors before giving up.
+        `graph_format` selects how graphs are written into the vng_from_graph and
+        graph2prompt prompts: 'dict' (dic_G) or 'compact' (graph_codec.compact_G,
+        lossless and several times fewer tokens).
+        `speculative` maps graph stages ('sg', 'vng') to a number of parallel samples;
+        the first sample whose graph validates is used (see models/parallel.py).
+        `scorers` optionally maps the same keys to a callable(res) -> float, in which
+        case all samples are awaited and the best valid one is used.
+        `normalize` maps node and relation values of the situation graph and the VNGs
+        onto the any_scene_graph vocabulary (see pipeline/normalize.py): True uses a
+        shared default Normalizer, or pass a Normalizer instance. Changed values are
+        collected in `self.normalized`.
+        """
+        if graph_format not in ('dict', 'compact'):
+            raise ValueError(f"graph_format must be 'dict' or 'compact', got {graph_format!r}")
         self.llms = {
             'sg': TempletLLM('sg_generation'),
             'vng': TempletLLM('vng_from_graph'),
@@ -38,9 +80,17 @@ class SituationProcessor:
         self.ref = ref
         self.situ = _replace_pronouns(situ, ref)
         self.trait = trait
-
-        for _, llm in self.llms.items():
-            llm.model = model
+        self.cache = {} if cache is None else cache
+        self.max_reasks = max_reasks
+        self.graph_format = graph_format
+        self.speculative = speculative or {}
+        self.scorers = scorers or {}
+        self.normalizer = default_normalizer() if normalize is True else (normalize or None)
+        self.normalized = {}
+
+        if model is not None:
+            for _, llm in self.llms.items():
+                llm.model = model
     # ✅
     def situ_graph(self):
         """Generate a situation graph based on the given situation."""
@@ -48,11 +98,10 @@ class SituationProcessor:
             self.G = 'nx.Graph'
             return 'nx.Graph'
 
-        res = self.llms['sg'].call(self.situ)
-        res_sg = find_key_in_result(res, 'SceneGraph')['SceneGraph']
-        G = build_G(res_sg)
+        msgs, res = self._sample('sg', validate_G, self.situ)
+        G = self._validated('sg', msgs, res, validate_G)
 
-        self.G:nx.Graph = G
+        self.G:nx.Graph = self._normalize(G)
 
     # ✅
     def Gs_from_situ(self):
@@ -60,14 +109,11 @@ class SituationProcessor:
         if self.debug:
             self.Gs = 'dict[str, nx.Graph]'
             return 'dict[str, nx.Graph]'
-        str_G = dic_G(self.G)
-        res = self.llms['vng'].call(self.situ, graph=str_G)
-        res_vng = find_key_in_result(res, 'VNG')['VNG']
-        res_Gs = {
-            vng: build_G(content) for vng, content in res_vng.items()
-        }
+        str_G = self._graph_text(self.G)
+        msgs, res = self._sample('vng', validate_Gs, self.situ, graph=str_G)
+        res_Gs = self._validated('vng', msgs, res, validate_Gs)
 
-        self.Gs:dict[str, nx.Graph] = res_Gs
+        self.Gs:dict[str, nx.Graph] = {idx: self._normalize(G) for idx, G in res_Gs.items()}
 
     # ✅
     def extract_cues_from_Gs(self):
@@ -77,11 +123,14 @@ class SituationProcessor:
             self.cues = 'dict[str, list[dict[str, list[str]]]]'
             return 'dict[str, list[dict[str, list[str]]]]'
 
-        Gs_klg = {vng_idx: self._get_knowledge(G) for vng_idx, G in self.Gs.items()}
-        res = self.llms['cue_ext'].call(
-            self.situ, trait=self.trait, graphs = Gs_klg,
-        )
-        cues = find_key_in_result(res, 'cues')['cues']
+        def _call():
+            Gs_klg = {vng_idx: self._get_knowledge(G) for vng_idx, G in self.Gs.items()}
+            res = self.llms['cue_ext'].call(
+                self.situ, trait=self.trait, graphs = Gs_klg,
+            )
+            return self.llms['cue_ext'].unwrap(res)
+
+        cues = self._cached(('cue_ext', self.situ, self.trait, hash_Gs(self.Gs)), _call)
         self.cues:dict[str:list[dict[str, list[str]]]] = cues
 
     # ✅
@@ -99,7 +148,7 @@ class SituationProcessor:
                 )
 
         self.enriched_Gs_cues:dict[str, dict] = enriched_Gs_cues
-        self.enriched_Gs:dict[str, nx.Graph] = self._add_cues_to_Gs(
+        self.enriched_Gs:dict[str, GraphOverlay] = self._add_cues_to_Gs(
             enriched_Gs_cues=enriched_Gs_cues,
             Gs=self.Gs,
             G=self.G,
@@ -107,6 +156,10 @@ class SituationProcessor:
 
     # ✅
     def intergrate_enriched_Gs(self) -> dict[str, nx.Graph]:
+        """Pick the enriched overlay of each VNG graph if any, else the VNG graph itself.
+
+        No graph is copied; the integrated view shares storage with vng_graphs and enriched_Gs.
+        """
         if self.debug:
             self.intergerated_Gs = 'dict[str, nx.Graph]'
             return 'dict[str, nx.Graph]'
@@ -118,7 +171,7 @@ class SituationProcessor:
             else:
                 intergerated_Gs[vng_idx] = self.enriched_Gs[vng_idx]
 
-        self.intergerated_Gs:dict[str, nx.Graph] = intergerated_Gs
+        self.intergerated_Gs:dict[str, nx.Graph | GraphOverlay] = intergerated_Gs
 
     def Gs2prompt(
         self,
@@ -129,20 +182,26 @@ class SituationProcessor:
         """Convert the graphs to string format."""
         Gs_str = {}
         for vng_idx, G in Gs.items():
-            res = self.llms['G2str'].call(dic_G(G), size=size, style=style)
-            res_str = find_key_in_result(res, 'prompt')['prompt']
-            Gs_str[vng_idx] = res_str
+            def _call(G=G):
+                res = self.llms['G2str'].call(self._graph_text(G), size=size, style=style)
+                return self.llms['G2str'].unwrap(res)
+
+            Gs_str[vng_idx] = self._cached(('G2str', size, style, self.graph_format, hash_G(G)), _call)
 
         self.Gs_prompt: dict[str, str] = Gs_str
 
     def prompt_polish(self):
         res = self.llms['vng_polisher'].call(passage=self.situ, vng = self.Gs_prompt)
-        res_str = find_key_in_result(res, 'VNG')['VNG']
+        res_str = self.llms['vng_polisher'].unwrap(res)
 
         self.Gs_prompt_polished:dict[str, str] = res_str
 
     def fit(self, size = '1024x1024', style = 'realistic', verbose=False):
-        """Fit the model to the situation and trait."""
+        """Fit the model to the situation and trait.
+
+        Enriched graphs are GraphOverlay views while the pipeline runs; the returned
+        'enriched_Gs' and 'intergrated_Gs' hold their materialized nx.DiGraph.
+        """
         steps = [
             ('Generating situation graph', self.situ_graph),
             ('Creating visual narrative graphs', self.Gs_from_situ),
@@ -166,8 +225,8 @@ class SituationProcessor:
             'vng_graphs': self.Gs,
             'cues': self.cues,
             'enriched_cues': self.enriched_Gs_cues,
-            'enriched_Gs': self.enriched_Gs,
-            'intergrated_Gs': self.intergerated_Gs,
+            'enriched_Gs': _materialized(self.enriched_Gs),
+            'intergrated_Gs': _materialized(self.intergerated_Gs),
             'Gs_prompt': self.Gs_prompt,
             'Gs_prompt_polished': self.Gs_prompt_polished,
         }
@@ -227,22 +286,27 @@ class SituationProcessor:
         enriched_Gs_cues:dict[str, dict],
         Gs:dict[str, nx.Graph],
         G:nx.Graph,
-    ) -> dict[str, nx.Graph]:
+    ) -> dict[str, GraphOverlay]:
+        """Attach enriched cues as attribute nodes on top of each VNG graph.
+
+        The VNG graphs are not copied: each enriched graph is a GraphOverlay that
+        records only the added nodes and edges over the shared VNG graph.
+        """
+        # Define mapping for different cue types
+        cue_configs = {
+            'character': {'value_suffix': '_body', 'facial_key': 'facial'},
+            'scene': {'value_suffix': '_scene'},
+            'object': {'value_suffix': '_object'},
+        }
+
         enriched_Gs = {}
         for idx, G in Gs.items():
             if idx not in enriched_Gs_cues:
                 continue
 
-            new_G = G.copy()
+            new_G = GraphOverlay(G)
             cues = enriched_Gs_cues[idx]
 
-            # Define mapping for different cue types
-            cue_configs = {
-                'character': {'value_suffix': '_body', 'facial_key': 'facial'},
-                'scene': {'value_suffix': '_scene'},
-                'object': {'value_suffix': '_object'},
-            }
-
             for cue_type, items in cues.items():
                 if not items or cue_type not in cue_configs:
                     continue
@@ -250,45 +314,98 @@ class SituationProcessor:
                 config = cue_configs[cue_type]
 
                 for item_name, item_data in items.items():
-                    node = find_node_by_value(G, item_name, 'object_node')
+                    node = new_G.find_node(item_name, 'object_node')
                     if not node:
                         continue
 
-                    obj_num = node.split('_')[1]
-                    max_attr_idx = get_max_attribute(G, node)
-
                     # Handle character's body and facial attributes
                     if cue_type == 'character':
                         # Add body attribute
-                        body_attr = f'attribute|{obj_num}|{max_attr_idx+1}'
+                        body_attr = new_G.next_attribute_id(node)
                         new_G.add_node(body_attr, type='attribute_node', value='_body', annot=item_data['body'])
                         new_G.add_edge(body_attr, node, type='attribute_edge')
 
                         # Add facial attribute
-                        face_attr = f'attribute|{obj_num}|{max_attr_idx+2}'
+                        face_attr = new_G.next_attribute_id(node)
                         new_G.add_node(face_attr, type='attribute_node', value='_face', annot=item_data['facial'])
                         new_G.add_edge(face_attr, node, type='attribute_edge')
                     else:
                         # Add single attribute for scene or object
-                        attr = f'attribute|{obj_num}|{max_attr_idx+1}'
+                        attr = new_G.next_attribute_id(node)
                         new_G.add_node(attr, type='attribute_node', value=config['value_suffix'], annot=item_data)
                         new_G.add_edge(attr, node, type='attribute_edge')
 
             enriched_Gs[idx] = new_G
         return enriched_Gs
 
+    def _sample(self, llm_key: str, validator, passage, **kwargs) -> tuple[list[dict], dict]:
+        """Call a graph stage, speculatively with parallel samples if configured for it.
+
+        Returns the prompt messages together with the answer, so a re-ask builds on
+        this item's prompt rather than on state shared by the stage's LLM.
+        """
+        llm = self.llms[llm_key]
+        msgs, prompt_tokens = llm.build_prompt(passage, **kwargs)
+        res = speculative_call(
+            llm, msgs,
+            n=self.speculative.get(llm_key, 1),
+            validate=lambda res: not validator(llm.unwrap(res))[1],
+            scorer=self.scorers.get(llm_key),
+            prompt_tokens=prompt_tokens,
+        )
+        return msgs, res
+
+    def _normalize(self, G):
+        """Map graph values onto the vocabulary when a normalizer is configured."""
+        if self.normalizer is None:
+            return G
+        G, changes = self.normalizer.normalize_G(G, keep=[self.ref])
+        self.normalized.update(changes)
+        return G
+
+    def _validated(self, llm_key: str, msgs: list[dict], res: dict, validator):
+        """Validate and build the graph(s) under the output key of an LLM answer.
+
+        On failure the stage's LLM is re-asked on `msgs` with the structured errors, at most
+        `self.max_reasks` times, then GraphPayloadError is raised.
+        """
+        llm = self.llms[llm_key]
+        for attempt in range(self.max_reasks + 1):
+            built, errors = validator(llm.unwrap(res))
+            if not errors:
+                return built
+            if attempt == self.max_reasks:
+                raise GraphPayloadError(errors)
+            feedback = REASK_GRAPH.format(errors=format_graph_errors(errors), key=llm.output_key)
+            res = llm.reask(msgs, res, feedback)
+
+    def _graph_text(self, G):
+        """Serialize a graph for a prompt according to `self.graph_format`."""
+        if self.graph_format == 'compact':
+            return compact_G(G)
+        return dic_G(G)
+
+    def _cached(self, key: tuple, func):
+        """Return the cached stage result for `key`, computing and storing it on a miss.
+
+        `key` is (stage, *inputs); the stage's model chain is part of the cache key, so a
+        cache shared between processors with different models or routing never mixes answers.
+        """
+        stage, *inputs = key
+        payload = json.dumps([self.llms[stage].models(), *inputs]).encode('utf-8')
+        key = f'{stage}/{hashlib.blake2b(payload, digest_size=16).hexdigest()}'
+        if key not in self.cache:
+            self.cache[key] = func()
+        return self.cache[key]
+
     def _get_knowledge(self, G: nx.Graph) -> dict[str, list[str]]:
         """Extract knowledge patterns from the graph."""
-        cues = {
-            cue_type: extract_knowledge(G, cue_type=cue_type)
-            for cue_type in self.cue_types
-        }
-        return cues
+        return run_queries(G, {cue_type: CUE_QUERIES[cue_type] for cue_type in self.cue_types})
 
     def _cls_cue_nodes(self, situ: str, words: list[str]) -> dict[str, list[str]]:
         """Classify nodes based on the situation and words."""
         res = self.llms['cls_node'].call(situ, words=words)
-        res_nodes = find_key_in_result(res, 'classification')['classification']
+        res_nodes = self.llms['cls_node'].unwrap(res)
         return res_nodes
 
     def _cls_cues_nodes(self, situ: str, cues: list[dict[str, list[str]]]) -> list[dict[str, list[str]]]:
@@ -315,3 +432,10 @@ class SituationProcessor:
             {df_html}
         """
         return df_html
+
+
+def _materialized(Gs):
+    """{idx: G} with every GraphOverlay replaced by its materialized nx.DiGraph (debug placeholders pass through)."""
+    if isinstance(Gs, str):
+        return Gs
+    return {idx: as_G(G) for idx, G in Gs.items()}
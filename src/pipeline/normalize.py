@@ -0,0 +1,305 @@
+"""
+将场景图中 LLM 生成的节点/关系 value 归一到 any_scene_graph 词表, 使跨条目的聚合与
+_add_cues_to_Gs 中按 value 的精确匹配不受同义写法的影响 ("co-worker" / "coworker" / "colleague")。
+
+- object_node -> objects, attribute_node -> attributes, relation_edge -> relations
+- 规范化后与词表完全相同的 value 直接命中; 其余 value 批量做最近邻搜索:
+    - 安装了 sentence-transformers 时使用本地 CPU 模型的向量, 词表的向量矩阵只计算一次,
+      保存为 .npy 并以 np.load(mmap_mode='r') 映射 (与 .vocab 同目录, 不入库)
+    - 否则退回 datasets/vocab.py 的三元组近似查找; 没有语义信息时只接受词数相同的候选,
+      且只接受物体的单复数差异 ('participants' 匹配 'participant', 'men' 匹配 'man') 与长度相差不超过 2 的拼写差异,
+      避免 'attended' -> 'attended by'、'Restaurant 1' -> 'restaurant' 这类改变含义的映射
+- 已解析的 value 持久化在 JSON 缓存中 (按词表、方法与模型区分), 重复出现的 value 不再计算
+- 物体写回时保留原来的单复数, 只统一写法 ('Friends' -> 'friends', 不会变成 'friend')
+- 相似度低于阈值的 value 保持原样; 以 '_' 开头的内部属性 (如 '_body') 与 keep 中的值 (如主角名) 不做归一
+
+用法:
+    normalizer = Normalizer()
+    G, changes = normalizer.normalize_G(G, keep=['Ye'])
+"""
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+
+import networkx as nx
+import numpy as np
+
+from ..datasets.data_manager import base_path
+from ..datasets.vocab import display
+from ..datasets.vocab import load_vocab
+from ..datasets.vocab import normalize
+from ..datasets.vocab import trigrams
+
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:  # 可选依赖, 缺失时使用三元组近似查找
+    SentenceTransformer = None
+
+DEFAULT_MODEL = 'sentence-transformers/all-MiniLM-L6-v2'
+DEFAULT_CACHE = os.path.join(base_path, 'any_scene_graph', 'normalize_cache.json')
+
+# 节点/边类型 -> 词表
+VOCAB_FOR = {
+    'object_node': 'objects',
+    'attribute_node': 'attributes',
+    'relation_edge': 'relations',
+}
+
+# 常见的不规则复数 (单数词尾, 复数词尾), 'woman' / 'businessman' 同样适用
+_IRREGULAR = (('man', 'men'), ('person', 'people'), ('child', 'children'), ('foot', 'feet'), ('tooth', 'teeth'))
+# 持久化缓存 key 的版本, 词表或解析规则变化后递增, 使旧的解析结果失效
+CACHE_VERSION = 2
+
+
+def _jaccard(a: str, b: str) -> float:
+    x, y = trigrams(a), trigrams(b)
+    return len(x & y) / len(x | y) if x or y else 0.0
+
+
+def _plurals(word: str) -> list[str]:
+    """word 可能的复数形式: 加 's' / 'es', 以及常见的不规则复数 ('man' -> 'men')。"""
+    return [word + 's', word + 'es', *(word[:-len(one)] + many for one, many in _IRREGULAR if word.endswith(one))]
+
+
+def _singulars(word: str) -> list[str]:
+    """word 为复数时可能的单数形式, 与 _plurals 互逆。"""
+    forms = [word[:-len(suffix)] for suffix in ('s', 'es') if len(word) > len(suffix) and word.endswith(suffix)]
+    return forms + [word[:-len(many)] + one for one, many in _IRREGULAR if word.endswith(many)]
+
+
+def _keep_number(value: str, term: str) -> str:
+    """把词表中的词 term 调整为与 value 相同的单复数, 如 ('friends', 'friend') -> 'friends'。"""
+    key = normalize(value)
+    for form in (*_plurals(term), *_singulars(term)):
+        if normalize(form) == key:
+            return form
+    return term
+
+
+def _is_variant(value: str, candidate: str, score: float, threshold: float, plural: bool = True) -> bool:
+    """三元组候选是否只是 value 的复数或拼写变体 (均为规范化后的形式)。"""
+    if len(value.split()) != len(candidate.split()):
+        return False
+    if plural and value in _plurals(candidate):
+        return True
+    return score >= threshold and abs(len(value) - len(candidate)) <= 2
+
+
+class ResolutionCache:
+    """
+    已解析 value 的持久化缓存: {key: [词表中的词, 相似度] 或 null}, key 为 'v<版本>|<词表>|<方法>|<value>'。
+
+    :param path: JSON 文件路径, None 时只在进程内缓存
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path
+        self.data = {}
+        self._lock = threading.Lock()
+        if path is not None and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self.data = json.load(f)
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def __contains__(self, key):
+        return key in self.data
+
+    def update(self, items: dict) -> None:
+        if not items:
+            return
+        with self._lock:
+            self.data.update(items)
+            if self.path is not None:
+                tmp = f'{self.path}.{os.getpid()}.{threading.get_ident()}.tmp'
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    json.dump(self.data, f, ensure_ascii=False)
+                os.replace(tmp, self.path)
+
+
+class Normalizer:
+    """
+    场景图 value 的词表归一, 见模块说明。
+
+    :param model: sentence-transformers 模型名或本地路径
+    :param threshold: 向量余弦相似度阈值
+    :param fuzzy_threshold: 三元组拼写变体的 Jaccard 相似度阈值 (未安装 sentence-transformers 时使用)
+    :param cache_path: 持久化缓存路径, None 时只在进程内缓存
+    :param batch_size: 编码与最近邻搜索的批大小
+    :param use_embeddings: 为 False 时即使安装了 sentence-transformers 也只用三元组查找
+    """
+
+    def __init__(
+        self, model=DEFAULT_MODEL, threshold=0.85, fuzzy_threshold=0.8,
+        cache_path=DEFAULT_CACHE, batch_size=256, use_embeddings=None,
+    ):
+        self.model_name = model
+        self.threshold = threshold
+        self.fuzzy_threshold = fuzzy_threshold
+        self.batch_size = batch_size
+        self.use_embeddings = SentenceTransformer is not None and use_embeddings is not False
+        self.method = f'emb:{model}' if self.use_embeddings else 'trigram'
+        self.cache = ResolutionCache(cache_path)
+        self._model = None
+        self._matrices = {}
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = SentenceTransformer(self.model_name, device='cpu')
+        return self._model
+
+    def _encode(self, texts):
+        return self.model.encode(
+            list(texts), batch_size=self.batch_size, normalize_embeddings=True,
+            convert_to_numpy=True, show_progress_bar=False,
+        ).astype(np.float32)
+
+    def embeddings(self, name: str) -> np.ndarray:
+        """词表 name 的单位化向量矩阵 (行与 Vocabulary 的词一一对应), 内存映射; 不存在或过期时先计算。"""
+        with self._lock:
+            if name in self._matrices:
+                return self._matrices[name]
+            vocab = load_vocab(name)
+            slug = re.sub(r'[^a-zA-Z0-9]+', '-', self.model_name).strip('-')
+            path = os.path.join(os.path.dirname(vocab.path), f'{name}.{slug}.npy')
+            if not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(vocab.path):
+                matrix = self._encode(display(vocab.entry(i)[0]) for i in range(len(vocab)))
+                tmp = f'{path}.{os.getpid()}.tmp.npy'
+                np.save(tmp, matrix)
+                os.replace(tmp, path)
+            self._matrices[name] = np.load(path, mmap_mode='r')
+            return self._matrices[name]
+
+    def _nearest(self, values, name):
+        """values 在词表 name 中向量最近的词, 按块计算以限制内存。返回 [(词, 相似度), ...]。"""
+        vocab = load_vocab(name)
+        matrix = self.embeddings(name)
+        queries = self._encode(values)
+        best = np.full(len(queries), -np.inf, dtype=np.float32)
+        index = np.zeros(len(queries), dtype=np.int64)
+        chunk = max(self.batch_size * 64, 1)
+        for start in range(0, len(matrix), chunk):
+            scores = queries @ np.asarray(matrix[start:start + chunk]).T
+            top = scores.argmax(axis=1)
+            top_scores = scores[np.arange(len(queries)), top]
+            better = top_scores > best
+            best[better] = top_scores[better]
+            index[better] = top[better] + start
+        return [(vocab.entry(int(i))[0], round(float(s), 4)) for i, s in zip(index, best)]
+
+    def resolve(self, values, name: str) -> dict[str, tuple[str, float] | None]:
+        """
+        将 values 解析为词表 name 中的词。
+
+        :return: {value: (词表中的词, 相似度)}, 相似度低于阈值或没有候选时为 None
+        """
+        vocab = load_vocab(name)
+        keys = {value: f'v{CACHE_VERSION}|{name}|{self.method}|{normalize(value)}' for value in set(values)}
+        resolved = {}
+        misses = []
+        for value, key in keys.items():
+            if key in self.cache:
+                continue
+            exact = vocab.exact(value)
+            if exact:
+                resolved[key] = [exact[0][0], 1.0]
+            else:
+                misses.append(value)
+        if misses:
+            if self.use_embeddings:
+                matches = self._nearest(misses, name)
+            else:
+                matches = [self._variant(vocab, value) for value in misses]
+            for value, match in zip(misses, matches):
+                resolved[keys[value]] = list(match) if match else None
+        self.cache.update(resolved)
+
+        # 三元组候选在计算时已按 fuzzy_threshold 筛选
+        threshold = self.threshold if self.use_embeddings else 0.0
+        results = {}
+        for value, key in keys.items():
+            match = self.cache.get(key)
+            results[value] = tuple(match) if match and match[1] >= threshold else None
+        return results
+
+    def _variant(self, vocab, value):
+        """
+        词表中 value 的复数/拼写变体 (词义标注不参与比较), 没有时返回 None。
+        物体的单复数先按去掉词义标注的 key 精确查找, 不受三元组候选数量的限制。
+        """
+        key = normalize(value)
+        # 关系是动词短语, 去掉词尾 s 会改变时态/人称 ('contains' -> 'contain')
+        plural = vocab.name == 'objects'
+        if plural:
+            for form in (*_singulars(key), *_plurals(key)):
+                exact = vocab.exact(form)
+                if exact:
+                    return exact[0][0], round(_jaccard(key, form), 4)
+        for term, _, _ in vocab.fuzzy(value, limit=10, threshold=0.3):
+            candidate = normalize(display(term))
+            score = round(_jaccard(key, candidate), 4)
+            if _is_variant(key, candidate, score, self.fuzzy_threshold, plural=plural):
+                return term, score
+        return None
+
+    def normalize_G(self, G: nx.DiGraph, keep=()) -> tuple[nx.DiGraph, dict[str, str]]:
+        """
+        返回 value 归一后的图副本, 以及 {原 value: 归一后的 value} (只含发生变化的 value)。
+
+        :param G: 场景图
+        :param keep: 不做归一的 value, 如主角名
+        """
+        keep = set(keep)
+        wanted = {}
+        for _, data in G.nodes(data=True):
+            self._want(wanted, data, keep)
+        for _, _, data in G.edges(data=True):
+            self._want(wanted, data, keep)
+
+        mapping = {}
+        for name, values in wanted.items():
+            for value, match in self.resolve(values, name).items():
+                if match is None:
+                    continue
+                new = display(match[0])
+                if name == 'objects':
+                    new = _keep_number(value, new)
+                if new != value:
+                    mapping[(name, value)] = new
+
+        H = G.copy()
+        changes = {}
+        for _, data in [*H.nodes(data=True), *((None, d) for _, _, d in H.edges(data=True))]:
+            name = VOCAB_FOR.get(data.get('type'))
+            new = mapping.get((name, data.get('value')))
+            if new is not None:
+                changes[data['value']] = new
+                data['value'] = new
+        return H, changes
+
+    @staticmethod
+    def _want(wanted, data, keep):
+        name = VOCAB_FOR.get(data.get('type'))
+        value = data.get('value')
+        if name is None or not isinstance(value, str) or not value.strip():
+            return
+        if value.startswith('_') or value in keep:
+            return
+        wanted.setdefault(name, set()).add(value)
+
+
+_DEFAULT = None
+
+
+def default_normalizer() -> Normalizer:
+    """进程内共享的 Normalizer (默认参数)。"""
+    global _DEFAULT
+    if _DEFAULT is None:
+        _DEFAULT = Normalizer()
+    return _DEFAULT
@@ -0,0 +1,173 @@
+"""
+prompt 的 token 预算: 本地计数、按模板的输入预算与截断/压缩策略, 以及按历史输出长度估计 max_tokens。
+
+- count_tokens / count_messages: 安装了 tiktoken 时使用模型对应的 BPE 编码 (编码器与计数结果均缓存),
+  否则使用按字符的保守估计
+- STRATEGIES: 可插拔的预算策略, 每个策略对 (template, params) 做一步缩减, 由
+  PromptTemplateManager.make_prompt 反复调用直到 prompt 落入预算
+- OutputHistory: 记录每个模板的输出 token 数, 以高分位数估计下一次调用的 max_tokens
+"""
+from __future__ import annotations
+
+import json
+import math
+import os
+import re
+import threading
+from functools import lru_cache
+
+from wasabi import msg
+
+from ..utils.graph_codec import compact_G
+from ..utils.graph_utils import build_G
+
+try:
+    import tiktoken
+except ImportError:  # 可选依赖, 缺失时使用字符估计
+    tiktoken = None
+
+# 每条消息的固定开销 (role 与分隔符), 与 OpenAI chat 格式的计数方式一致
+MESSAGE_OVERHEAD = 4
+REPLY_OVERHEAD = 3
+TRUNCATION_MARK = ' …[truncated]… '
+
+_NON_ASCII = re.compile(r'[^\x00-\x7f]')
+
+
+class PromptBudgetError(ValueError):
+    """所有策略都用尽后 prompt 仍超出输入预算时抛出, 在发送请求之前失败。"""
+
+    def __init__(self, task, tokens, budget):
+        self.task = task
+        self.tokens = tokens
+        self.budget = budget
+        super().__init__(f'{task} 的 prompt 为 {tokens} tokens, 超出输入预算 {budget}')
+
+
+@lru_cache(maxsize=8)
+def _encoding(model):
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding('o200k_base')
+
+
+@lru_cache(maxsize=4096)
+def count_tokens(text: str, model: str = 'gpt-4o') -> int:
+    """
+    统计 text 的 token 数。few-shot 消息在每次调用中重复出现, 因此结果按 (text, model) 缓存。
+
+    未安装 tiktoken 时按 ASCII 4 个字符、非 ASCII (如中文) 1 个字符约 1 个 token 估计, 略偏高。
+    """
+    enc = _encoding(model)
+    if enc is not None:
+        return len(enc.encode(text))
+    non_ascii = len(_NON_ASCII.findall(text))
+    return math.ceil((len(text) - non_ascii) / 4) + non_ascii
+
+
+def count_messages(messages: list[dict], model: str = 'gpt-4o') -> int:
+    """统计一组 chat 消息的 prompt token 数 (含每条消息的固定开销)。"""
+    return REPLY_OVERHEAD + sum(
+        MESSAGE_OVERHEAD + count_tokens(str(m.get('content', '')), model) for m in messages
+    )
+
+
+# ---- 预算策略 ----
+# 策略签名: strategy(template, params) -> (template, params) 或 None (无法继续缩减)
+STRATEGIES = {}
+
+
+def register_strategy(name):
+    """注册一个预算策略, 可在模板模块的 budget_strategies 中按名称引用。"""
+    def decorator(func):
+        STRATEGIES[name] = func
+        return func
+    return decorator
+
+
+@register_strategy('compact_graphs')
+def compact_graphs(template, params):
+    """将参数中 dic_G 形式的图 ({'nodes', 'edges'}) 替换为 graph_codec 的紧凑文本。"""
+    changed = False
+    new_params = dict(params)
+    for key, value in params.items():
+        if isinstance(value, dict) and 'nodes' in value:
+            new_params[key] = compact_G(build_G(value))
+            changed = True
+    return (template, new_params) if changed else None
+
+
+@register_strategy('drop_examples')
+def drop_examples(template, params):
+    """删除最早的一组 few-shot 示例 (user + assistant), 保留 system 消息与最后的 user 消息。"""
+    start = 1 if template and template[0].get('role') == 'system' else 0
+    for i in range(start, len(template) - 2):
+        if template[i].get('role') == 'user' and template[i + 1].get('role') == 'assistant':
+            return template[:i] + template[i + 2:], params
+    return None
+
+
+@register_strategy('truncate_params')
+def truncate_params(template, params):
+    """将最长的字符串参数截去中间的四分之一, 保留首尾; 截断会丢失内容, 因此每次截断都发出警告。"""
+    texts = {k: v for k, v in params.items() if isinstance(v, str) and len(v) > 200}
+    if not texts:
+        return None
+    key = max(texts, key=lambda k: len(texts[k]))
+    text = texts[key].replace(TRUNCATION_MARK, '')
+    keep = len(text) * 3 // 8
+    msg.warn(f'prompt over budget: truncated {len(text) - 2 * keep} of {len(text)} characters from parameter {key!r}')
+    return template, {**params, key: text[:keep] + TRUNCATION_MARK + text[-keep:]}
+
+
+DEFAULT_STRATEGIES = ['compact_graphs', 'drop_examples', 'truncate_params']
+
+
+# ---- 输出长度历史 ----
+class OutputHistory:
+    """
+    按模板记录输出 token 数, 并据此估计 max_tokens。
+
+    样本数达到 min_samples 后, max_tokens 取历史输出的 quantile 分位数乘以 margin;
+    之前返回 None (由调用方使用默认值)。path 不为 None 时持久化为 JSON, 跨运行累积。
+
+    :param path: JSON 文件路径
+    :param quantile: 分位数
+    :param margin: 放大系数
+    :param window: 每个模板保留的最近样本数
+    """
+
+    def __init__(self, path=None, quantile=0.99, margin=1.25, min_samples=5, window=500, floor=64):
+        self.path = path
+        self.quantile = quantile
+        self.margin = margin
+        self.min_samples = min_samples
+        self.window = window
+        self.floor = floor
+        self.samples = {}
+        self._lock = threading.Lock()
+        if path is not None and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self.samples = json.load(f)
+
+    def record(self, task, tokens):
+        with self._lock:
+            samples = self.samples.setdefault(task, [])
+            samples.append(int(tokens))
+            del samples[:-self.window]
+            if self.path is not None:
+                tmp = f'{self.path}.tmp'
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    json.dump(self.samples, f)
+                os.replace(tmp, self.path)
+
+    def max_tokens(self, task):
+        samples = self.samples.get(task, [])
+        if len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        q = ordered[min(len(ordered) - 1, math.ceil(self.quantile * len(ordered)) - 1)]
+        return max(self.floor, math.ceil(q * self.margin))
@@ -2,6 +2,9 @@ from __future__ import annotations
 
 from string import Template
 
+from .schemas import obj
+from .schemas import STRING_LIST
+
 condition_system = """
 # node type analyst
 Based on the given situation, and the words from it.
@@ -50,3 +53,11 @@ prompt_template = [
     {'role': 'assistant', 'content': 'ok, I will follow our previous conversation.'},
     {'role': 'user', 'content': conditioned_frame},
 ]
+
+output_schema = obj({
+    'classification': obj(
+        {'character': STRING_LIST, 'scene': STRING_LIST, 'object': STRING_LIST},
+        required=[],
+    ),
+})
+output_key = 'classification'
@@ -2,6 +2,10 @@ from __future__ import annotations
 
 from string import Template
 
+from .schemas import CUE
+from .schemas import mapping
+from .schemas import obj
+
 system = """
 # Cues Recognition Assistant
 
@@ -230,3 +234,6 @@ prompt_template = [
     {'role': 'assistant', 'content': 'ok, I will follow our previous conversation.'},
     {'role': 'user', 'content': conditioned_frame},
 ]
+
+output_schema = obj({'cues': mapping({'type': 'array', 'items': CUE})})
+output_key = 'cues'
@@ -2,6 +2,9 @@ from __future__ import annotations
 
 from string import Template
 
+from .schemas import obj
+from .schemas import STRING
+
 condition_system = """
 # Emotion analyst
 
@@ -127,3 +130,5 @@ prompt_template = [
     {'role': 'assistant', 'content': 'ok, I will follow our previous conversation.'},
     {'role': 'user', 'content': conditioned_frame},
 ]
+
+output_schema = obj({'character': STRING, 'emotion': STRING})
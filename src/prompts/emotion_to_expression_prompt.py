@@ -2,6 +2,9 @@ from __future__ import annotations
 
 from string import Template
 
+from .schemas import obj
+from .schemas import STRING
+
 condition_system = """
 # Emotion analyst
 Based on the given situation, character, and the character's emotion, design the character's facial expressions and body language to suit the situation.
@@ -98,3 +101,11 @@ prompt_template = [
     {'role': 'assistant', 'content': 'ok, I will follow our previous conversation.'},
     {'role': 'user', 'content': conditioned_frame},
 ]
+
+output_schema = obj({
+    'expression': obj(
+        {'character': STRING, 'emotion': STRING, 'body': STRING, 'facial': STRING},
+        required=['body', 'facial'],
+    ),
+})
+output_key = 'expression'
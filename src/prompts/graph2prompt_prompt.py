@@ -2,6 +2,9 @@ from __future__ import annotations
 
 from string import Template
 
+from .schemas import obj
+from .schemas import STRING
+
 system = """
 # Graph to Image Generation Prompt
 
@@ -111,3 +114,6 @@ prompt_template = [
     {'role': 'assistant', 'content': 'ok, I will follow our previous conversation.'},
     {'role': 'user', 'content': conditioned_frame},
 ]
+
+output_schema = obj({'prompt': STRING})
+output_key = 'prompt'
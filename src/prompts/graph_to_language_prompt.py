@@ -2,6 +2,9 @@ from __future__ import annotations
 
 from string import Template
 
+from .schemas import obj
+from .schemas import STRING
+
 condition_system = """
 # Graph to Language Expert
 Convert the given knowledge graph to natural language.
@@ -51,3 +54,6 @@ prompt_template = [
     {'role': 'assistant', 'content': one_shot_output},
     {'role': 'user', 'content': conditioned_frame},
 ]
+
+output_schema = obj({'description': STRING})
+output_key = 'description'
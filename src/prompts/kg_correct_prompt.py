@@ -2,6 +2,10 @@ from __future__ import annotations
 
 from string import Template
 
+from .schemas import CUE_TYPES
+from .schemas import obj
+from .schemas import STRING_LIST
+
 system = """Your task is task is to refine a knowledge graph by validating and aligning its tuples with the exact details of the original text.
 You should:
 1. Carefully analyze the original text to extract all key entities, attributes, and relationships.
@@ -69,3 +73,8 @@ prompt_template = [
     {'role': 'assistant', 'content': one_shot_output},
     {'role': 'user', 'content': conditioned_frame},
 ]
+
+output_schema = obj(
+    {cue_type: {'type': 'array', 'items': STRING_LIST} for cue_type in CUE_TYPES},
+    required=[],
+)
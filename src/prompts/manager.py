@@ -13,21 +13,33 @@ from typing import List
 from typing import Optional
 from typing import Union
 
+from ..config import LLMConfig
+from .budget import count_messages
+from .budget import DEFAULT_STRATEGIES
+from .budget import PromptBudgetError
+from .budget import STRATEGIES
+
+
 class PromptTemplateManager:
     """
     自动管理各种 NLP 任务的 prompt 模板。
     该实现会自动扫描当前目录（或者指定目录）中包含 “prompt” 的 Python 文件，
     加载其中的 prompt_template，并通过扫描模板内容中以 $ 开头的变量自动提取 required_params。
+
+    生成 prompt 时按模板的输入预算（模块中的 input_budget，默认为上下文窗口减去输出预留）
+    在本地统计 token，超出时依次应用预算策略（模块中的 budget_strategies，见 budget.py）。
     """
 
-    def __init__(self, templates_dir: str | None = None):
+    def __init__(self, templates_dir: str | None = None, model: str | None = None):
         """
         如果未指定模板目录，则默认使用当前文件所在目录。
+        model 决定本地计数使用的 tokenizer，默认为 LLMConfig.model。
         """
         if templates_dir is None:
             templates_dir = Path(__file__).parent
         else:
             templates_dir = Path(templates_dir)
+        self.model = model or LLMConfig.model
         self._templates = self._load_templates(templates_dir)
 
     def _load_templates(self, directory: Path) -> dict[str, dict]:
@@ -44,9 +56,13 @@ class PromptTemplateManager:
             directory: 要扫描的目录路径
 
         Returns:
-            一个字典，键为模板所在文件（模块）的名称（包含目录路径），值为包含以下两个键的字典：
+            一个字典，键为模板所在文件（模块）的名称（包含目录路径），值为包含以下键的字典：
                 - 'template': prompt_template 内容（列表格式）
                 - 'required_params': 自动提取出来的所需参数列表
+                - 'output_schema': 模块中声明的输出 JSON Schema（未声明时为 None）
+                - 'output_key': 输出中承载结果的顶层键（未声明时为 None）
+                - 'input_budget': 输入 token 预算（未声明时为 None，使用默认预算）
+                - 'budget_strategies': 超出预算时依次应用的策略名称列表
         """
         templates = {}
 
@@ -55,6 +71,8 @@ class PromptTemplateManager:
                 if item.is_file() and item.suffix == '.py' and 'prompt' in item.stem:
                     spec = importlib.util.spec_from_file_location(item.stem, item)
                     module = importlib.util.module_from_spec(spec)
+                    # 使模板模块可以相对导入本包中的公共片段 (如 .schemas)
+                    module.__package__ = '.'.join([__package__, *filter(None, relative_path.split('/'))])
                     spec.loader.exec_module(module)
                     if hasattr(module, 'prompt_template'):
                         prompt_template = getattr(module, 'prompt_template')
@@ -72,6 +90,10 @@ class PromptTemplateManager:
                         templates[template_key] = {
                             'template': prompt_template,
                             'required_params': list(required_params),
+                            'output_schema': getattr(module, 'output_schema', None),
+                            'output_key': getattr(module, 'output_key', None),
+                            'input_budget': getattr(module, 'input_budget', None),
+                            'budget_strategies': getattr(module, 'budget_strategies', DEFAULT_STRATEGIES),
                         }
                 elif item.is_dir():
                     # 递归扫描子目录，并保持目录路径信息
@@ -97,9 +119,39 @@ class PromptTemplateManager:
             return task_info.get('template')
         return None
 
+    def get_schema(self, task_name: str) -> dict | None:
+        """
+        根据任务名称获取模板声明的输出 JSON Schema。
+
+        Args:
+            task_name: 模板名称（一般对应文件名）
+
+        Returns:
+            schema 字典，若模板未声明或没有找到则返回 None
+        """
+        task_info = self._templates.get(task_name)
+        if task_info:
+            return task_info.get('output_schema')
+        return None
+
+    def get_output_key(self, task_name: str) -> str | None:
+        """
+        根据任务名称获取输出中承载结果的顶层键（如 'SceneGraph'、'VNG'），未声明时返回 None。
+        """
+        task_info = self._templates.get(task_name)
+        if task_info:
+            return task_info.get('output_key')
+        return None
+
     def make_prompt(self, task_name: str, passage: str, **kwargs) -> list[dict[str, str]]:
         """
-        根据指定任务名称和参数创建 prompt。
+        根据指定任务名称和参数创建 prompt, 参数与异常同 build_prompt, 只返回 message 列表。
+        """
+        return self.build_prompt(task_name, passage, **kwargs)[0]
+
+    def build_prompt(self, task_name: str, passage: str, **kwargs) -> tuple[list[dict[str, str]], int]:
+        """
+        根据指定任务名称和参数创建 prompt, 并返回其本地统计的 token 数。
 
         Args:
             task_name: 要使用的 prompt 模板名称（对应加载的文件名）
@@ -107,10 +159,12 @@ class PromptTemplateManager:
             **kwargs: 模板所需的其他参数（会自动验证是否满足模板中通过 "$" 定义的 required_params）
 
         Returns:
-            一个 message 字典列表，构成最终的 prompt 内容
+            (messages, tokens): 构成最终 prompt 的 message 字典列表, 及其 token 数
+            (token 数随返回值传递, 不保存在共享的管理器上, 多线程调用互不影响)
 
         Raises:
             ValueError: 当 task_name 无效或所需参数缺失时触发
+            PromptBudgetError: 当所有预算策略用尽后 prompt 仍超出输入预算时触发
         """
         if task_name not in self._templates:
             available = list(self._templates.keys())
@@ -132,7 +186,38 @@ class PromptTemplateManager:
             if isinstance(params[key], list):
                 params[key] = json.dumps(params[key], ensure_ascii=False)
 
-        return self._process(template_info['template'], **params)
+        return self._fit_budget(task_name, template_info['template'], params)
+
+    def input_budget(self, task_name: str) -> int:
+        """
+        返回模板的输入 token 预算：模块声明的 input_budget，否则为上下文窗口减去输出预留。
+        """
+        budget = self._templates[task_name].get('input_budget')
+        if budget is not None:
+            return budget
+        return LLMConfig.context_window - (LLMConfig.max_tokens or LLMConfig.output_reserve)
+
+    def _fit_budget(self, task_name: str, template: list[dict], params: dict) -> tuple[list[dict[str, str]], int]:
+        """
+        生成 prompt 并在本地统计 token；超出预算时按顺序应用预算策略，每个策略反复应用直到
+        落入预算或无法继续缩减。所有策略用尽仍超出时抛出 PromptBudgetError。
+        返回 (messages, tokens)。
+        """
+        budget = self.input_budget(task_name)
+        processed = self._process(template, **params)
+        tokens = count_messages(processed, self.model)
+        for name in self._templates[task_name]['budget_strategies']:
+            strategy = STRATEGIES[name]
+            while tokens > budget:
+                reduced = strategy(template, params)
+                if reduced is None:
+                    break
+                template, params = reduced
+                processed = self._process(template, **params)
+                tokens = count_messages(processed, self.model)
+        if tokens > budget:
+            raise PromptBudgetError(task_name, tokens, budget)
+        return processed, tokens
 
     def _process(self, prompt_template: list[dict[str, str]], **kwargs) -> list[dict[str, str]]:
         """
@@ -2,6 +2,9 @@ from __future__ import annotations
 
 from string import Template
 
+from .schemas import obj
+from .schemas import STRING_LIST
+
 ner_system = """Your task is to extract named entities from the given paragraph and perform coreference resolution.
 Identify all named entities such as people, organizations, locations, dates, and other relevant entities.
 Note that pronouns like "you" must also be identified as named entities.
@@ -26,3 +29,6 @@ prompt_template = [
     {'role': 'assistant', 'content': one_shot_ner_output},
     {'role': 'user', 'content': ner_conditioned_frame},
 ]
+
+output_schema = obj({'named_entities': STRING_LIST})
+output_key = 'named_entities'
@@ -2,6 +2,10 @@ from __future__ import annotations
 
 from string import Template
 
+from .schemas import mapping
+from .schemas import obj
+from .schemas import STRING
+
 condition_system = """
 # Object Designer
 
@@ -120,3 +124,6 @@ prompt_template = [
     {'role': 'assistant', 'content': 'ok, I will follow our previous conversation.'},
     {'role': 'user', 'content': conditioned_frame},
 ]
+
+output_schema = obj({'object': mapping(mapping(STRING))})
+output_key = 'object'
@@ -0,0 +1,81 @@
+"""
+各 prompt 模板输出 JSON Schema 的公共片段。
+
+每个模板模块通过 output_schema 声明完整输出的 schema, 并可通过 output_key
+指明需要解包的顶层键 (如 'SceneGraph'、'VNG'); PromptTemplateManager 会一并加载。
+schema 只使用 llm_utils.validate_json 支持的 JSON Schema 子集:
+type / enum / properties / required / additionalProperties / items / prefixItems /
+minItems / maxItems / minLength / anyOf。
+"""
+from __future__ import annotations
+
+CUE_TYPES = ['att|obj', 'obj-obj', 'att|obj-obj', 'obj-att|obj', 'att|obj-att|obj']
+
+STRING = {'type': 'string', 'minLength': 1}
+STRING_LIST = {'type': 'array', 'items': {'type': 'string'}}
+
+
+def obj(properties, required=None, additional=False):
+    """
+    构造 object 类型的 schema。
+
+    :param properties: {key: schema}
+    :param required: 必需键列表, 默认为全部 properties
+    :param additional: additionalProperties, 可为 bool 或 schema
+    """
+    return {
+        'type': 'object',
+        'properties': properties,
+        'required': list(properties) if required is None else required,
+        'additionalProperties': additional,
+    }
+
+
+def mapping(values):
+    """键名不固定 (如 VNG 面板名、场景名) 的 object, 所有值均符合 values。"""
+    return {'type': 'object', 'additionalProperties': values}
+
+
+# 场景图: {"nodes": [[id, {type, value}]], "edges": [[src, dst, {type, value?}]]}
+NODE = {
+    'type': 'array',
+    'prefixItems': [
+        STRING,
+        obj(
+            {
+                'type': {'type': 'string', 'enum': ['object_node', 'attribute_node']},
+                'value': STRING,
+            },
+            additional=True,
+        ),
+    ],
+    'minItems': 2,
+    'maxItems': 2,
+}
+EDGE = {
+    'type': 'array',
+    'prefixItems': [
+        STRING,
+        STRING,
+        obj(
+            {
+                'type': {'type': 'string', 'enum': ['relation_edge', 'attribute_edge']},
+                'value': {'type': 'string'},
+            },
+            required=['type'],
+            additional=True,
+        ),
+    ],
+    'minItems': 3,
+    'maxItems': 3,
+}
+GRAPH = obj(
+    {
+        'nodes': {'type': 'array', 'items': NODE},
+        'edges': {'type': 'array', 'items': EDGE},
+    },
+    required=['nodes'],
+)
+
+# 线索: {"type": "att|obj", "content": [...]}
+CUE = obj({'type': {'type': 'string', 'enum': CUE_TYPES}, 'content': STRING_LIST})
@@ -2,6 +2,9 @@ from __future__ import annotations
 
 from string import Template
 
+from .schemas import GRAPH
+from .schemas import obj
+
 sg_condition_system = """
 # You are a scene graph generation master.
 
@@ -128,3 +131,6 @@ prompt_template = [
     {'role': 'assistant', 'content': 'ok, I will follow our previous conversation.'},
     {'role': 'user', 'content': sg_condition_frame},
 ]
+
+output_schema = obj({'SceneGraph': GRAPH})
+output_key = 'SceneGraph'
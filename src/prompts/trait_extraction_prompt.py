@@ -2,6 +2,9 @@ from __future__ import annotations
 
 from string import Template
 
+from .schemas import CUE
+from .schemas import obj
+
 system = """
 Extract tuples(cues) that best ACTIVATE the input specified Big Five personality trait (e.g., O(Openness), C(Conscientiousness), E(Extraversion), A(Agreeableness), N(Neuroticism)) from the given situation text and its associated knowledge graph.
 
@@ -317,3 +320,6 @@ prompt_template = [
     {'role': 'assistant', 'content': 'ok, I will follow our previous conversation.'},
     {'role': 'user', 'content': conditioned_frame},
 ]
+
+output_schema = obj({'cues': {'type': 'array', 'items': CUE}})
+output_key = 'cues'
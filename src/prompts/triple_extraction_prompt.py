@@ -2,6 +2,9 @@ from __future__ import annotations
 
 from string import Template
 
+from .schemas import obj
+from .schemas import STRING
+
 ner_conditioned_re_system = """Your task is to construct an RDF (Resource Description Framework) graph from the given passages and named entity lists.
 Respond with a JSON list of triples, with each triple representing a relationship in the RDF graph.
 
@@ -55,3 +58,11 @@ prompt_template = [
     {'role': 'assistant', 'content': one_shot_output},
     {'role': 'user', 'content': ner_conditioned_re_frame},
 ]
+
+output_schema = obj({
+    'triples': {
+        'type': 'array',
+        'items': {'type': 'array', 'items': STRING, 'minItems': 3, 'maxItems': 3},
+    },
+})
+output_key = 'triples'
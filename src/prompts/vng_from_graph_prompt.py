@@ -2,6 +2,10 @@ from __future__ import annotations
 
 from string import Template
 
+from .schemas import GRAPH
+from .schemas import mapping
+from .schemas import obj
+
 vng_condition_system = """
 # Structured storyboard maker
 
@@ -261,3 +265,6 @@ prompt_template = [
     {'role': 'assistant', 'content': 'ok, I will follow our previous conversation.'},
     {'role': 'user', 'content': vng_conditioned_re_frame},
 ]
+
+output_schema = obj({'VNG': mapping(GRAPH)})
+output_key = 'VNG'
@@ -2,6 +2,10 @@ from __future__ import annotations
 
 from string import Template
 
+from .schemas import mapping
+from .schemas import obj
+from .schemas import STRING
+
 vng_condition_system = """
 # Text-to-Visual Narrative Script Converter
 
@@ -103,3 +107,6 @@ prompt_template = [
     {'role': 'assistant', 'content': few_shot_output_3},
     {'role': 'user', 'content': vng_conditioned_re_frame},
 ]
+
+output_schema = obj({'VNG': mapping(STRING)})
+output_key = 'VNG'
@@ -2,6 +2,10 @@ from __future__ import annotations
 
 from string import Template
 
+from .schemas import mapping
+from .schemas import obj
+from .schemas import STRING
+
 vng_condition_system = """
 # VNG Polisher Protocol
 
@@ -121,3 +125,6 @@ prompt_template = [
     {'role': 'assistant', 'content': 'ok, I will follow our previous conversation.'},
     {'role': 'user', 'content': condition},
 ]
+
+output_schema = obj({'VNG': mapping(STRING)})
+output_key = 'VNG'
@@ -1,4 +1,9 @@
 from __future__ import annotations
 
+from .graph_codec import *
+from .graph_hash import *
+from .graph_overlay import *
+from .graph_query import *
+from .graph_schema import *
 from .graph_utils import *
 from .llm_utils import *
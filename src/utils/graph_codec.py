@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import json
+import re
+
+import networkx as nx
+
+_OBJECT_ID = re.compile(r'object_(\d+)$')
+_ATTRIBUTE_ID = re.compile(r'attribute\|(\d+)\|(\d+)$')
+_SHORT_OBJECT = re.compile(r'o(\d+)$')
+_SHORT_ATTRIBUTE = re.compile(r'a(\d+)\.(\d+)$')
+
+# 供 prompt 使用的格式说明, 与 encode_G 的输出一一对应
+COMPACT_LEGEND = (
+    'Compact graph: "o" maps object ids to values, "a" maps attribute ids to values '
+    '(attribute aN.k describes object oN), "r" lists relations as [source, relation, target]'
+)
+
+
+def _short_id(node, ids):
+    """object_3 -> o3, attribute|3|1 -> a3.1, 其它 id -> n1, n2, ... (原 id 记录在 ids 中)。"""
+    m = _OBJECT_ID.match(node) if isinstance(node, str) else None
+    if m:
+        return f'o{m.group(1)}'
+    m = _ATTRIBUTE_ID.match(node) if isinstance(node, str) else None
+    if m:
+        return f'a{m.group(1)}.{m.group(2)}'
+    short = f'n{len(ids) + 1}'
+    ids[short] = node
+    return short
+
+
+def _long_id(short, ids):
+    if short in ids:
+        return ids[short]
+    m = _SHORT_OBJECT.match(short)
+    if m:
+        return f'object_{m.group(1)}'
+    m = _SHORT_ATTRIBUTE.match(short)
+    if m:
+        return f'attribute|{m.group(1)}|{m.group(2)}'
+    return short
+
+
+def _owner(short):
+    """a3.1 -> o3; 其它 id 返回 None。"""
+    m = _SHORT_ATTRIBUTE.match(short)
+    return f'o{m.group(1)}' if m else None
+
+
+def encode_G(G):
+    """
+    将场景图编码为紧凑、无损的字典, 用于减少 prompt 中的 token 数量。
+
+    格式:
+      - "o": {短 id: value}, object_node; object_N 简写为 oN
+      - "a": {短 id: value}, attribute_node; attribute|N|k 简写为 aN.k,
+        并隐含一条 aN.k -> oN 的 attribute_edge
+      - "r": [[源, 关系, 目标], ...], 带 value 的 relation_edge
+    以下部分仅在需要时出现, 以保证无损:
+      - "ae": [[源, 目标], ...], 不能由 id 推出的 attribute_edge
+      - "na": [短 id, ...], 没有隐含边的 aN.k 属性节点
+      - "n": {短 id: 属性字典}, 其它类型的节点
+      - "x": {短 id: 额外属性}, 节点除 type/value 以外的属性 (如 annot)
+      - "e": [[源, 目标, 属性字典], ...], 其它边
+      - "ids": {短 id: 原 id}, 不符合 object_N / attribute|N|k 约定的节点 id
+
+    :param G: nx.DiGraph 对象 (或 GraphOverlay)
+    :return: 可直接 json.dumps 的字典
+    """
+    ids = {}
+    short = {node: _short_id(node, ids) for node in G.nodes()}
+    node_data = dict(G.nodes(data=True))
+    out = {'o': {}, 'a': {}, 'r': []}
+    extra_nodes, extra_attrs = {}, {}
+    for node, data in node_data.items():
+        s = short[node]
+        node_type = data.get('type')
+        rest = {k: v for k, v in data.items() if k not in ('type', 'value')}
+        if node_type == 'object_node' and 'value' in data:
+            out['o'][s] = data['value']
+        elif node_type == 'attribute_node' and 'value' in data:
+            out['a'][s] = data['value']
+        else:
+            extra_nodes[s] = data
+            continue
+        if rest:
+            extra_attrs[s] = rest
+
+    implied = set()
+    attribute_edges, other_edges = [], []
+    for u, v, data in G.edges(data=True):
+        su, sv = short[u], short[v]
+        if data.get('type') == 'relation_edge' and set(data) == {'type', 'value'}:
+            out['r'].append([su, data['value'], sv])
+        elif data == {'type': 'attribute_edge'}:
+            if su in out['a'] and _owner(su) == sv and sv in out['o'] and su not in ids:
+                implied.add(su)
+            else:
+                attribute_edges.append([su, sv])
+        else:
+            other_edges.append([su, sv, data])
+
+    missing = [s for s in out['a'] if _owner(s) in out['o'] and s not in ids and s not in implied]
+    for key, value in (
+        ('ae', attribute_edges), ('na', missing), ('n', extra_nodes),
+        ('x', extra_attrs), ('e', other_edges), ('ids', ids),
+    ):
+        if value:
+            out[key] = value
+    return out
+
+
+def decode_G(payload):
+    """
+    将 encode_G 的输出还原为 nx.DiGraph (节点 id、类型、value 及其它属性均与原图一致)。
+    也接受 dic_G 格式的 {"nodes", "edges"} 字典, 以便统一处理 LLM 的两种回答。
+
+    :param payload: 紧凑格式字典
+    :return: nx.DiGraph 对象
+    """
+    if 'nodes' in payload:
+        G = nx.DiGraph()
+        for node, data in payload['nodes']:
+            G.add_node(node, **data)
+        for u, v, data in payload.get('edges', []):
+            G.add_edge(u, v, **data)
+        return G
+
+    ids = payload.get('ids', {})
+    extra = payload.get('x', {})
+    no_edge = set(payload.get('na', []))
+    G = nx.DiGraph()
+    for s, value in payload.get('o', {}).items():
+        G.add_node(_long_id(s, ids), type='object_node', value=value, **extra.get(s, {}))
+    for s, value in payload.get('a', {}).items():
+        G.add_node(_long_id(s, ids), type='attribute_node', value=value, **extra.get(s, {}))
+    for s, data in payload.get('n', {}).items():
+        G.add_node(_long_id(s, ids), **data)
+
+    for s in payload.get('a', {}):
+        owner = _owner(s)
+        if owner is not None and s not in ids and s not in no_edge and owner in payload.get('o', {}):
+            G.add_edge(_long_id(s, ids), _long_id(owner, ids), type='attribute_edge')
+    for src, dst in payload.get('ae', []):
+        G.add_edge(_long_id(src, ids), _long_id(dst, ids), type='attribute_edge')
+    for src, value, dst in payload.get('r', []):
+        G.add_edge(_long_id(src, ids), _long_id(dst, ids), type='relation_edge', value=value)
+    for src, dst, data in payload.get('e', []):
+        G.add_edge(_long_id(src, ids), _long_id(dst, ids), **data)
+    return G
+
+
+def compact_G(G, legend=True):
+    """
+    返回图 G 的紧凑 JSON 文本 (无多余空白), 可直接替换 prompt 中的 dic_G(G)。
+
+    :param legend: 为 True 时在前面附加 COMPACT_LEGEND 格式说明
+    """
+    text = json.dumps(encode_G(G), ensure_ascii=False, separators=(',', ':'))
+    return f'{COMPACT_LEGEND}\n{text}' if legend else text
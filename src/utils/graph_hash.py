@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import hashlib
+import json
+
+import networkx as nx
+
+from .graph_utils import dic_G
+
+
+def _digest(text):
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _attrs_key(attrs):
+    """属性字典的确定性序列化 (键排序、紧凑分隔符), 用作 WL 的初始标签。"""
+    return json.dumps(attrs, sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=str)
+
+
+def wl_labels(G, iterations=3):
+    """
+    对 typed/valued 有向图执行 Weisfeiler-Lehman 标签细化。
+
+    初始标签为节点属性 (type、value 及其它如 annot) 的确定性序列化;
+    每轮将节点标签与其出边 (边属性, 目标标签)、入边 (边属性, 源标签) 的有序多重集合一起哈希。
+    节点 id 不参与计算, 因此结果只依赖于图的结构与内容。
+
+    :param G: nx.DiGraph 对象 (或 GraphOverlay)
+    :param iterations: 细化轮数
+    :return: (labels, history) 二元组
+             labels: {node_id: 最终标签}
+             history: 每一轮 (含初始) 的排序标签列表, 用于计算图哈希
+    """
+    succ = {n: [] for n in G.nodes()}
+    pred = {n: [] for n in succ}
+    for u, v, data in G.edges(data=True):
+        edge_key = _attrs_key(data)
+        succ[u].append((edge_key, v))
+        pred[v].append((edge_key, u))
+
+    labels = {n: _digest(_attrs_key(data)) for n, data in G.nodes(data=True)}
+    history = [sorted(labels.values())]
+    for _ in range(iterations):
+        new_labels = {}
+        for n, label in labels.items():
+            out_msg = sorted(f'{e}>{labels[v]}' for e, v in succ[n])
+            in_msg = sorted(f'{e}<{labels[u]}' for e, u in pred[n])
+            new_labels[n] = _digest('|'.join([label, *out_msg, '#', *in_msg]))
+        labels = new_labels
+        history.append(sorted(labels.values()))
+    return labels, history
+
+
+def hash_G(G, iterations=3):
+    """
+    计算图 G 的结构哈希 (Weisfeiler-Lehman), 与节点 id 和插入顺序无关。
+
+    相同内容、仅节点编号或顺序不同的图得到相同哈希, 可作为下游阶段
+    (如 cue_ext、G2str) 的缓存键, 以及存储结果去重的依据。
+    WL 哈希不同则图必不同构; 哈希相同的极少数非同构图无法区分。
+
+    :param G: nx.DiGraph 对象 (或 GraphOverlay)
+    :param iterations: WL 细化轮数
+    :return: 32 位十六进制字符串
+    """
+    _, history = wl_labels(G, iterations=iterations)
+    return _digest('/'.join(','.join(level) for level in history))
+
+
+def hash_Gs(Gs, iterations=3):
+    """
+    计算一组命名图 (如 VNG 的 {'E': G, 'I': G, ...}) 的联合哈希, 键名参与哈希。
+
+    :param Gs: {name: nx.DiGraph}
+    :return: 32 位十六进制字符串
+    """
+    parts = sorted(f'{name}={hash_G(G, iterations)}' for name, G in Gs.items())
+    return _digest('/'.join(parts))
+
+
+def canonical_G(G, iterations=3):
+    """
+    返回图 G 的规范形式: 节点按 WL 标签确定性排序并重新编号, 边按排序插入。
+
+    重新编号遵循仓库的 id 约定:
+      - object_node 依次编号为 object_1, object_2, ...
+      - 通过 attribute_edge 指向某个 object 的 attribute_node 编号为 attribute|{obj}|{k};
+        指向多个 object 时归属于排序最靠前 (WL 标签最小) 的 object, 与边的插入顺序无关
+      - 其它节点编号为 node_1, node_2, ...
+    同构 (在 WL 意义下) 的两个图得到完全相同的规范形式。
+
+    :param G: nx.DiGraph 对象 (或 GraphOverlay)
+    :return: 新的 nx.DiGraph
+    """
+    labels, _ = wl_labels(G, iterations=iterations)
+    node_data = dict(G.nodes(data=True))
+    order = sorted(node_data, key=lambda n: (labels[n], _attrs_key(node_data[n])))
+    rank = {n: i for i, n in enumerate(order)}
+
+    attr_owner = {}
+    for u, v, data in G.edges(data=True):
+        if data.get('type') == 'attribute_edge' and node_data[v].get('type') == 'object_node':
+            if u not in attr_owner or rank[v] < rank[attr_owner[u]]:
+                attr_owner[u] = v
+
+    mapping = {}
+    for n in order:
+        if node_data[n].get('type') == 'object_node':
+            mapping[n] = f'object_{len(mapping) + 1}'
+    attr_count = {}
+    n_other = 0
+    for n in order:
+        if n in mapping:
+            continue
+        owner = attr_owner.get(n)
+        if node_data[n].get('type') == 'attribute_node' and owner is not None:
+            obj_num = mapping[owner].split('_')[1]
+            attr_count[obj_num] = attr_count.get(obj_num, 0) + 1
+            mapping[n] = f'attribute|{obj_num}|{attr_count[obj_num]}'
+        else:
+            n_other += 1
+            mapping[n] = f'node_{n_other}'
+
+    canon = nx.DiGraph()
+    for n in order:
+        canon.add_node(mapping[n], **node_data[n])
+    for u, v, data in sorted(G.edges(data=True), key=lambda e: (rank[e[0]], rank[e[1]])):
+        canon.add_edge(mapping[u], mapping[v], **data)
+    return canon
+
+
+def canonical_json(G, iterations=3):
+    """
+    返回图 G 规范形式的紧凑 JSON 字符串 (属性键排序), 可直接用于比较、存储与去重。
+    """
+    payload = dic_G(canonical_G(G, iterations=iterations))
+    return json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=str)
+
+
+def dedup_Gs(Gs, iterations=3):
+    """
+    按结构哈希对一组图去重。
+
+    :param Gs: {key: nx.DiGraph}
+    :return: (unique, key_to_hash) 二元组
+             unique: {hash: 第一个具有该哈希的图}
+             key_to_hash: {key: hash}
+    """
+    unique = {}
+    key_to_hash = {}
+    for key, G in Gs.items():
+        h = hash_G(G, iterations=iterations)
+        unique.setdefault(h, G)
+        key_to_hash[key] = h
+    return unique, key_to_hash
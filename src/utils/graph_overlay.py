@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+
+def _attribute_slot(node):
+    """解析 'attribute|{obj_num}|{idx}' 形式的节点 id, 返回 (obj_num, idx), 否则返回 None。"""
+    if isinstance(node, str) and node.startswith('attribute|'):
+        parts = node.split('|')
+        if len(parts) == 3 and parts[1].isdigit() and parts[2].isdigit():
+            return parts[1], int(parts[2])
+    return None
+
+
+def node_index(G):
+    """
+    一次遍历图 G 的所有节点, 构建按 (type, value) 查找节点 id 的索引,
+    以及每个 object 编号下已使用的最大 attribute 序号。
+
+    用于替代逐次调用 find_node_by_value / get_max_attribute 时的全图扫描。
+
+    :param G: nx.DiGraph 对象 (或 GraphOverlay)
+    :return: (value_index, max_attr) 二元组
+             value_index: {(node_type, value): node_id}, 多个匹配时保留第一个
+             max_attr: {object_num(str): max_attr_idx(int)}
+    """
+    value_index = {}
+    max_attr = {}
+    for node, data in G.nodes(data=True):
+        value_index.setdefault((data.get('type'), data.get('value')), node)
+        slot = _attribute_slot(node)
+        if slot and slot[1] > max_attr.get(slot[0], 0):
+            max_attr[slot[0]] = slot[1]
+    return value_index, max_attr
+
+
+class GraphOverlay:
+    """
+    共享只读基础图 (base) 之上的增量图视图。
+
+    只记录新增 (或覆盖属性) 的节点与边, 不复制基础图; 需要完整的
+    nx.DiGraph 时调用 materialize(), 结果会被缓存直到下一次修改。
+    因此同一情景的原始图、富化图与整合图可以同时存在而几乎不额外占用内存。
+
+    基础图在 overlay 存活期间应视为不可变, 对其修改会反映到所有 overlay 上。
+
+    支持管线与绘图所需的只读接口: nodes(data=...), edges(data=...),
+    get_edge_data, has_node, has_edge, number_of_nodes, number_of_edges,
+    以及 len / in / 迭代, 因此 dic_G 等函数可以直接作用于 overlay。
+    """
+
+    def __init__(self, base):
+        self.base = base
+        self._nodes = {}
+        self._edges = {}
+        self._graph = None
+        self._index = None
+
+    def __repr__(self):
+        return (
+            f'GraphOverlay with {self.number_of_nodes()} nodes and '
+            f'{self.number_of_edges()} edges '
+            f'(+{len(self._nodes)} nodes, +{len(self._edges)} edges over base)'
+        )
+
+    def __getstate__(self):
+        # 物化结果与索引均可由 base + 增量重建, 不参与序列化
+        state = self.__dict__.copy()
+        state['_graph'] = None
+        state['_index'] = None
+        return state
+
+    # ---- 修改 ----
+    def add_node(self, node, **attrs):
+        """新增节点, 若节点已存在 (基础图或增量中) 则更新其属性。"""
+        self._nodes.setdefault(node, {}).update(attrs)
+        self._graph = None
+        if self._index is not None:
+            value_index, max_attr = self._index
+            data = self._node_data(node)
+            value_index.setdefault((data.get('type'), data.get('value')), node)
+            slot = _attribute_slot(node)
+            if slot and slot[1] > max_attr.get(slot[0], 0):
+                max_attr[slot[0]] = slot[1]
+
+    def add_edge(self, u, v, **attrs):
+        """新增边 u -> v, 若边已存在则更新其属性; 端点不存在时与 networkx 一致地自动补齐。"""
+        for node in (u, v):
+            if not self.has_node(node):
+                self.add_node(node)
+        self._edges.setdefault((u, v), {}).update(attrs)
+        self._graph = None
+
+    # ---- 查询 ----
+    def find_node(self, value, node_type):
+        """等价于 find_node_by_value(self, value, node_type), 但基于一次性构建的索引。"""
+        if self._index is None:
+            self._index = node_index(self)
+        return self._index[0].get((node_type, value))
+
+    def next_attribute_id(self, object_id, offset=1):
+        """
+        返回 object_id 下一个可用的 attribute 节点 id, 形如 'attribute|{obj_num}|{idx}'。
+        序号同时考虑基础图与增量中已有的属性节点。
+        """
+        if self._index is None:
+            self._index = node_index(self)
+        obj_num = object_id.split('_')[1]
+        return f'attribute|{obj_num}|{self._index[1].get(obj_num, 0) + offset}'
+
+    def has_node(self, node):
+        return node in self._nodes or self.base.has_node(node)
+
+    def has_edge(self, u, v):
+        return (u, v) in self._edges or self.base.has_edge(u, v)
+
+    def number_of_nodes(self):
+        return self.base.number_of_nodes() + sum(
+            1 for n in self._nodes if not self.base.has_node(n)
+        )
+
+    def number_of_edges(self):
+        return self.base.number_of_edges() + sum(
+            1 for u, v in self._edges if not self.base.has_edge(u, v)
+        )
+
+    def __len__(self):
+        return self.number_of_nodes()
+
+    def __contains__(self, node):
+        return self.has_node(node)
+
+    def __iter__(self):
+        return self.nodes()
+
+    def _node_data(self, node):
+        if node in self._nodes:
+            if self.base.has_node(node):
+                return {**self.base.nodes[node], **self._nodes[node]}
+            return self._nodes[node]
+        return self.base.nodes[node]
+
+    def get_edge_data(self, u, v, default=None):
+        if (u, v) in self._edges:
+            if self.base.has_edge(u, v):
+                return {**self.base.edges[u, v], **self._edges[u, v]}
+            return self._edges[u, v]
+        return self.base.get_edge_data(u, v, default)
+
+    def nodes(self, data=False):
+        """按基础图节点顺序、再按新增顺序迭代节点, data=True 时返回 (node, attrs)。"""
+        for node in self.base.nodes():
+            yield (node, self._node_data(node)) if data else node
+        for node in self._nodes:
+            if not self.base.has_node(node):
+                yield (node, self._nodes[node]) if data else node
+
+    def edges(self, data=False):
+        """按基础图边顺序、再按新增顺序迭代边, data=True 时返回 (u, v, attrs)。"""
+        for u, v in self.base.edges():
+            yield (u, v, self.get_edge_data(u, v)) if data else (u, v)
+        for (u, v), attrs in self._edges.items():
+            if not self.base.has_edge(u, v):
+                yield (u, v, attrs) if data else (u, v)
+
+    # ---- 物化 ----
+    def delta(self):
+        """返回仅包含增量部分的字典, 格式与 dic_G 相同。"""
+        return {
+            'nodes': [[n, d] for n, d in self._nodes.items()],
+            'edges': [[u, v, d] for (u, v), d in self._edges.items()],
+        }
+
+    def materialize(self):
+        """
+        返回合并基础图与增量后的 nx.DiGraph。
+        结果会被缓存, 调用方不应修改它; 需要可修改的副本请使用 copy()。
+        """
+        if self._graph is None:
+            G = self.base.copy()
+            for node, attrs in self._nodes.items():
+                G.add_node(node, **attrs)
+            for (u, v), attrs in self._edges.items():
+                G.add_edge(u, v, **attrs)
+            self._graph = G
+        return self._graph
+
+    def copy(self):
+        """返回一份独立、可修改的 nx.DiGraph。"""
+        return self.materialize().copy()
+
+
+def as_G(G):
+    """若 G 为 GraphOverlay 则返回其物化后的 nx.DiGraph, 否则原样返回。"""
+    if isinstance(G, GraphOverlay):
+        return G.materialize()
+    return G
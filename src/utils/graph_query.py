@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+
+from .graph_overlay import as_G
+
+# 模式语言中可使用的类型简写
+NODE_TYPE_ALIASES = {
+    'object': 'object_node',
+    'obj': 'object_node',
+    'attribute': 'attribute_node',
+    'att': 'attribute_node',
+    '*': None,
+}
+EDGE_TYPE_ALIASES = {
+    'relation': 'relation_edge',
+    'rel': 'relation_edge',
+    'attribute': 'attribute_edge',
+    'att': 'attribute_edge',
+    '*': None,
+}
+
+_NODE_RE = r'(\w+)(?:\s*:\s*([\w*]+))?'
+_CLAUSE_RE = re.compile(rf'^\s*{_NODE_RE}\s*-\s*([\w*]+)\s*->\s*{_NODE_RE}\s*$')
+
+
+class GraphIndex:
+    """
+    场景图的邻接索引, 按边类型组织出边、入边与全部边, 同时缓存节点属性。
+
+    一个索引可被多个查询复用; 迭代顺序与 networkx 的 G.edges / G.out_edges /
+    G.in_edges 一致, 因此查询结果的顺序与直接遍历图相同。
+    """
+
+    def __init__(self, G):
+        G = as_G(G)
+        self.nodes = dict(G.nodes(data=True))
+        self.edges = {}
+        self.out = {}
+        self.in_ = {}
+        self.edge_data = {}
+        for u, nbrs in G.succ.items():
+            for v, data in nbrs.items():
+                self.edge_data[u, v] = data
+                for key in (data.get('type'), None):
+                    self.edges.setdefault(key, []).append((u, v, data))
+                    self.out.setdefault(key, {}).setdefault(u, []).append((v, data))
+        for v, nbrs in G.pred.items():
+            for u, data in nbrs.items():
+                for key in (data.get('type'), None):
+                    self.in_.setdefault(key, {}).setdefault(v, []).append((u, data))
+
+
+def _parse_type(name, aliases, kind):
+    if name is None:
+        return None
+    if name in aliases:
+        return aliases[name]
+    if name.endswith(f'_{kind}'):
+        return name
+    raise ValueError(f'未知的{kind}类型: {name!r}, 可用简写: {sorted(aliases)}')
+
+
+class CueQuery:
+    """
+    编译后的类型化路径/子图模式查询。
+
+    模式由若干以 ';' 分隔的子句组成, 每个子句描述一条有向边:
+        var[:node_type] -edge_type-> var[:node_type]
+    node_type 可写 object/obj、attribute/att、完整类型名或省略 (任意类型);
+    edge_type 可写 relation/rel、attribute/att、完整类型名或 '*' (任意类型)。
+    同名变量绑定同一节点, 子句按书写顺序匹配, 第一个子句遍历该类型的全部边,
+    之后的子句沿已绑定节点的出边或入边扩展。
+
+    returns 为逗号分隔的输出项: 'var' 输出节点 value, 'u->v' 输出边 value。
+
+    例如 'att|obj-obj' 写作:
+        CueQuery('a -attribute-> o; o -relation-> t:object', returns='a, o, o->t, t')
+
+    :param pattern: 模式字符串
+    :param returns: 输出项
+    :param name: 查询名称
+    :param distinct: 为 True 时要求不同变量绑定不同节点
+    """
+
+    def __init__(self, pattern, returns, name=None, distinct=False):
+        self.pattern = pattern
+        self.name = name or pattern
+        self.distinct = distinct
+        self.var_types = {}
+        self.clauses = []
+        for raw in pattern.split(';'):
+            if not raw.strip():
+                continue
+            m = _CLAUSE_RE.match(raw)
+            if m is None:
+                raise ValueError(f'无法解析的模式子句: {raw.strip()!r}, 应形如 "a:attribute -attribute-> o:object"')
+            src, src_type, edge_type, dst, dst_type = m.groups()
+            for var, var_type in ((src, src_type), (dst, dst_type)):
+                var_type = _parse_type(var_type, NODE_TYPE_ALIASES, 'node')
+                if var_type is not None:
+                    if self.var_types.get(var) not in (None, var_type):
+                        raise ValueError(f'变量 {var!r} 的类型冲突: {self.var_types[var]} / {var_type}')
+                    self.var_types[var] = var_type
+                else:
+                    self.var_types.setdefault(var, None)
+            self.clauses.append((src, _parse_type(edge_type, EDGE_TYPE_ALIASES, 'edge'), dst))
+        if not self.clauses:
+            raise ValueError('模式中至少需要一个子句')
+
+        edges = {(src, dst) for src, _, dst in self.clauses}
+        self.returns = []
+        for item in returns.split(','):
+            item = item.strip()
+            if '->' in item:
+                src, dst = (x.strip() for x in item.split('->'))
+                if (src, dst) not in edges:
+                    raise ValueError(f'输出项 {item!r} 不是模式中的边')
+                self.returns.append(('edge', src, dst))
+            elif item in self.var_types:
+                self.returns.append(('node', item, None))
+            else:
+                raise ValueError(f'输出项 {item!r} 不是模式中的变量')
+
+    def __repr__(self):
+        return f'CueQuery({self.pattern!r}, name={self.name!r})'
+
+    def _bind(self, index, binding, var, node):
+        if var in binding:
+            return binding[var] == node
+        var_type = self.var_types[var]
+        if var_type is not None and index.nodes[node].get('type') != var_type:
+            return False
+        if self.distinct and node in binding.values():
+            return False
+        binding[var] = node
+        return True
+
+    def _expand(self, index, binding, i):
+        if i == len(self.clauses):
+            yield dict(binding)
+            return
+        src, edge_type, dst = self.clauses[i]
+        if src in binding and dst in binding:
+            data = index.edge_data.get((binding[src], binding[dst]))
+            if data is not None and (edge_type is None or data.get('type') == edge_type):
+                yield from self._expand(index, binding, i + 1)
+            return
+        if src in binding:
+            candidates = ((binding[src], v) for v, _ in index.out.get(edge_type, {}).get(binding[src], ()))
+        elif dst in binding:
+            candidates = ((u, binding[dst]) for u, _ in index.in_.get(edge_type, {}).get(binding[dst], ()))
+        else:
+            candidates = ((u, v) for u, v, _ in index.edges.get(edge_type, ()))
+        for u, v in candidates:
+            new_vars = []
+            ok = True
+            for var, node in ((src, u), (dst, v)):
+                was_bound = var in binding
+                if not self._bind(index, binding, var, node):
+                    ok = False
+                    break
+                if not was_bound:
+                    new_vars.append(var)
+            if ok:
+                yield from self._expand(index, binding, i + 1)
+            for var in new_vars:
+                del binding[var]
+
+    def match(self, G):
+        """返回所有匹配的变量绑定 {var: node_id} 列表。G 可以是 nx.DiGraph、GraphOverlay 或 GraphIndex。"""
+        index = G if isinstance(G, GraphIndex) else GraphIndex(G)
+        return list(self._expand(index, {}, 0))
+
+    def run(self, G):
+        """返回所有匹配按 returns 取值后的 tuple 列表 (与 extract_knowledge 的输出格式一致)。"""
+        index = G if isinstance(G, GraphIndex) else GraphIndex(G)
+        results = []
+        for binding in self._expand(index, {}, 0):
+            row = []
+            for kind, a, b in self.returns:
+                if kind == 'node':
+                    row.append(index.nodes[binding[a]].get('value'))
+                else:
+                    row.append(index.edge_data[binding[a], binding[b]].get('value'))
+            results.append(tuple(row))
+        return results
+
+
+@lru_cache(maxsize=256)
+def compile_query(pattern, returns, name=None, distinct=False):
+    """编译 (并缓存) 一个 CueQuery, 相同的模式字符串只解析一次。"""
+    return CueQuery(pattern, returns, name=name, distinct=distinct)
+
+
+# 管线使用的五种线索类型, 输出与原先硬编码的遍历完全一致
+CUE_QUERIES = {
+    'att|obj': compile_query('a -attribute-> o', 'a, o', name='att|obj'),
+    'obj-obj': compile_query('s:object -relation-> t:object', 's, s->t, t', name='obj-obj'),
+    'att|obj-obj': compile_query(
+        'a -attribute-> o; o -relation-> t:object', 'a, o, o->t, t', name='att|obj-obj',
+    ),
+    'obj-att|obj': compile_query(
+        's:object -relation-> t:object; b -attribute-> t', 's, s->t, b, t', name='obj-att|obj',
+    ),
+    'att|obj-att|obj': compile_query(
+        'a -attribute-> o; o -relation-> t:object; b -attribute-> t', 'a, o, o->t, b, t', name='att|obj-att|obj',
+    ),
+}
+
+# 额外的线索形态, 不在默认线索类型中
+EXTRA_QUERIES = {
+    # 同一对象上的两个属性: (属性1, 属性2, 对象)
+    'att+att|obj': compile_query(
+        'a:attribute -attribute-> o:object; b:attribute -attribute-> o', 'a, b, o',
+        name='att+att|obj', distinct=True,
+    ),
+    # 长度为 2 的关系链: (对象1, 关系1, 对象2, 关系2, 对象3)
+    'obj-obj-obj': compile_query(
+        's:object -relation-> m:object; m -relation-> t:object', 's, s->m, m, m->t, t',
+        name='obj-obj-obj', distinct=True,
+    ),
+}
+
+
+def run_queries(G, queries=None):
+    """
+    在同一个图上运行多个查询, 邻接索引只构建一次。
+
+    :param G: nx.DiGraph、GraphOverlay 或 GraphIndex
+    :param queries: {name: CueQuery} 或 CueQuery 列表, 默认为 CUE_QUERIES
+    :return: {name: [tuple, ...]}
+    """
+    if queries is None:
+        queries = CUE_QUERIES
+    if not isinstance(queries, dict):
+        queries = {q.name: q for q in queries}
+    index = G if isinstance(G, GraphIndex) else GraphIndex(G)
+    return {name: query.run(index) for name, query in queries.items()}
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import networkx as nx
+
+NODE_TYPES = frozenset({'object_node', 'attribute_node'})
+EDGE_TYPES = frozenset({'relation_edge', 'attribute_edge'})
+
+# 每种边类型允许的 (源节点类型, 目标节点类型)
+EDGE_ENDPOINTS = {
+    'relation_edge': ('object_node', 'object_node'),
+    'attribute_edge': ('attribute_node', 'object_node'),
+}
+
+
+class GraphPayloadError(ValueError):
+    """LLM 返回的场景图 JSON 不符合约定时抛出, errors 为结构化错误列表。"""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__(format_graph_errors(errors))
+
+
+def _error(errors, path, code, message):
+    errors.append({'path': path, 'code': code, 'message': message})
+
+
+def validate_G(payload, path=''):
+    """
+    校验场景图 (SceneGraph / VNG 单个面板) 的 JSON 载荷, 并在同一遍扫描中构建图。
+
+    约定:
+      - payload 为 dict, "nodes" 为 [node_id, {"type", "value", ...}] 列表,
+        "edges" 为 [source, target, {"type", ...}] 列表 (可缺省)
+      - node_id 为非空字符串且不重复, type 属于 NODE_TYPES, value 为非空字符串且不等于任一节点 id
+      - edge 的 type 属于 EDGE_TYPES, relation_edge 必须有字符串 value
+      - edge 端点必须是已声明的节点 (无悬空引用), 且端点类型符合 EDGE_ENDPOINTS, 不允许自环
+
+    :param payload: LLM 返回并经 JSON 解析的场景图字典
+    :param path: 错误路径前缀, 例如 VNG 面板名 'E'
+    :return: (G, errors) 二元组; 校验通过时 G 为 nx.DiGraph、errors 为空列表,
+             否则 G 为 None, errors 为 {'path', 'code', 'message'} 字典列表
+    """
+    errors = []
+    prefix = f'{path}.' if path else ''
+    if not isinstance(payload, dict):
+        _error(errors, path or '$', 'not_object', f'graph must be a JSON object, got {type(payload).__name__}')
+        return None, errors
+
+    nodes = payload.get('nodes')
+    edges = payload.get('edges', [])
+    if not isinstance(nodes, list):
+        _error(errors, f'{prefix}nodes', 'missing_nodes', '"nodes" must be a list of [node_id, attrs]')
+        return None, errors
+    if not isinstance(edges, list):
+        _error(errors, f'{prefix}edges', 'bad_edges', '"edges" must be a list of [source, target, attrs]')
+        return None, errors
+
+    G = nx.DiGraph()
+    node_types = {}
+    node_pos = {}
+    for i, entry in enumerate(nodes):
+        where = f'{prefix}nodes[{i}]'
+        if not isinstance(entry, (list, tuple)) or len(entry) != 2:
+            _error(errors, where, 'bad_node_entry', 'node entry must be [node_id, attrs]')
+            continue
+        node_id, attrs = entry
+        if not isinstance(node_id, str) or not node_id:
+            _error(errors, f'{where}[0]', 'bad_node_id', f'node id must be a non-empty string, got {node_id!r}')
+            continue
+        if node_id in node_types:
+            _error(errors, f'{where}[0]', 'duplicate_node', f'node id {node_id!r} is declared more than once')
+            continue
+        if not isinstance(attrs, dict):
+            _error(errors, f'{where}[1]', 'bad_node_attrs', f'attrs of {node_id!r} must be an object')
+            continue
+        node_type = attrs.get('type')
+        if node_type not in NODE_TYPES:
+            _error(
+                errors, f'{where}[1].type', 'bad_node_type',
+                f'type of {node_id!r} must be one of {sorted(NODE_TYPES)}, got {node_type!r}',
+            )
+        value = attrs.get('value')
+        if not isinstance(value, str) or not value.strip():
+            _error(errors, f'{where}[1].value', 'bad_node_value', f'value of {node_id!r} must be a non-empty string')
+        node_types[node_id] = node_type
+        node_pos[node_id] = i
+        G.add_node(node_id, **attrs)
+
+    for node_id, data in G.nodes(data=True):
+        if isinstance(data.get('value'), str) and data['value'] in node_types:
+            _error(
+                errors, f'{prefix}nodes[{node_pos[node_id]}][1].value', 'value_is_id',
+                f'value of {node_id!r} is a node identifier ({data.get("value")!r}), not its content',
+            )
+
+    for i, entry in enumerate(edges):
+        where = f'{prefix}edges[{i}]'
+        if not isinstance(entry, (list, tuple)) or len(entry) != 3:
+            _error(errors, where, 'bad_edge_entry', 'edge entry must be [source, target, attrs]')
+            continue
+        src, dst, attrs = entry
+        if not isinstance(attrs, dict):
+            _error(errors, f'{where}[2]', 'bad_edge_attrs', f'attrs of edge {src!r}->{dst!r} must be an object')
+            continue
+        dangling = False
+        for j, end in ((0, src), (1, dst)):
+            if not isinstance(end, str) or end not in node_types:
+                _error(errors, f'{where}[{j}]', 'dangling_edge', f'edge endpoint {end!r} is not a declared node')
+                dangling = True
+        if dangling:
+            continue
+        if src == dst:
+            _error(errors, where, 'self_loop', f'edge {src!r}->{dst!r} must connect two different nodes')
+            continue
+        edge_type = attrs.get('type')
+        if edge_type not in EDGE_TYPES:
+            _error(
+                errors, f'{where}[2].type', 'bad_edge_type',
+                f'type of edge {src!r}->{dst!r} must be one of {sorted(EDGE_TYPES)}, got {edge_type!r}',
+            )
+        else:
+            src_type, dst_type = EDGE_ENDPOINTS[edge_type]
+            if node_types[src] != src_type or node_types[dst] != dst_type:
+                _error(
+                    errors, where, 'bad_edge_endpoints',
+                    f'{edge_type} must go from {src_type} to {dst_type}, '
+                    f'got {src!r}({node_types[src]}) -> {dst!r}({node_types[dst]})',
+                )
+            if edge_type == 'relation_edge':
+                value = attrs.get('value')
+                if not isinstance(value, str) or not value.strip():
+                    _error(
+                        errors, f'{where}[2].value', 'bad_edge_value',
+                        f'relation_edge {src!r}->{dst!r} must have a non-empty string value',
+                    )
+        if G.has_edge(src, dst):
+            _error(errors, where, 'duplicate_edge', f'edge {src!r}->{dst!r} is declared more than once')
+            continue
+        G.add_edge(src, dst, **attrs)
+
+    if errors:
+        return None, errors
+    return G, errors
+
+
+def validate_Gs(payloads, path=''):
+    """
+    校验一组命名场景图 (如 VNG 的 {'E': {...}, 'I': {...}}), 返回 ({name: G}, errors)。
+    任一面板出错时第一个返回值为 None, errors 的 path 以面板名为前缀。
+    """
+    errors = []
+    if not isinstance(payloads, dict) or not payloads:
+        _error(errors, path or '$', 'not_object', 'expected a non-empty object mapping panel names to graphs')
+        return None, errors
+    Gs = {}
+    for name, payload in payloads.items():
+        G, panel_errors = validate_G(payload, path=f'{path}.{name}' if path else str(name))
+        errors.extend(panel_errors)
+        Gs[name] = G
+    if errors:
+        return None, errors
+    return Gs, errors
+
+
+def format_graph_errors(errors, limit=20):
+    """将结构化错误格式化为简洁的文本, 可直接作为重新提问 (re-ask) 的反馈。"""
+    lines = [f'- {e["path"]}: {e["message"]}' for e in errors[:limit]]
+    if len(errors) > limit:
+        lines.append(f'- ... and {len(errors) - limit} more')
+    return '\n'.join(lines)
@@ -3,6 +3,11 @@ from __future__ import annotations
 import networkx as nx
 from wasabi import msg
 
+from .graph_query import CUE_QUERIES
+from .graph_query import run_queries
+from .graph_schema import GraphPayloadError
+from .graph_schema import validate_G
+
 
 def print_G(G):
     """
@@ -19,15 +24,23 @@ def print_G(G):
         print(u, '->', v, data)
 
 
-def build_G(scene_graph_dict):
+def build_G(scene_graph_dict, strict=False):
     """
     根据给定的字典数据构建 NetworkX DiGraph
 
     :param scene_graph_dict: 字典格式的数据，包含 "nodes" 和 "edges" 两个键，
                              "nodes" 为 [node_id, node_attrs] 的列表，
                              "edges" 为 [source, target, edge_attrs] 的列表。
+    :param strict: 为 True 时先按场景图约定校验 (见 graph_schema.validate_G)，
+                   不合法时抛出 GraphPayloadError，其 errors 属性为结构化错误列表
     :return: 构建好的 nx.DiGraph 对象
     """
+    if strict:
+        G, errors = validate_G(scene_graph_dict)
+        if errors:
+            raise GraphPayloadError(errors)
+        return G
+
     G = nx.DiGraph()
 
     # 添加节点
@@ -102,73 +115,18 @@ def extract_knowledge(G, cue_type):
     根据 cue_type 从图 G 中提取对应的知识，返回一个列表，每个元素为一个 tuple，其元素为节点和边的 value。
     可选的 cue_type 有：
       'att|obj', 'obj-obj', 'att|obj-obj', 'obj-att|obj', 'att|obj-att|obj'
-    """
-    knowledge = []
-
-    if cue_type == 'att|obj':
-        # 属性边: 输出 (属性节点value, 对象节点value)
-        for u, v, data in G.edges(data=True):
-            if data.get('type') == 'attribute_edge':
-                knowledge.append((G.nodes[u].get('value'), G.nodes[v].get('value')))
-
-    elif cue_type == 'obj-obj':
-        # 对象间关系: 输出 (起始对象value, 关系value, 目标对象value)
-        for u, v, data in G.edges(data=True):
-            if data.get('type') == 'relation_edge' \
-               and G.nodes[u].get('type') == 'object_node' \
-               and G.nodes[v].get('type') == 'object_node':
-                knowledge.append((G.nodes[u].get('value'), data.get('value'), G.nodes[v].get('value')))
 
-    elif cue_type == 'att|obj-obj':
-        # 属性边后接关系边: 输出 (属性节点value, 对象节点value, 关系value, 目标对象value)
-        for u, v, data in G.edges(data=True):
-            if data.get('type') == 'attribute_edge':
-                # u: attribute节点，v: 对象节点
-                for _, target, rel_data in G.out_edges(v, data=True):
-                    if rel_data.get('type') == 'relation_edge' and G.nodes[target].get('type') == 'object_node':
-                        knowledge.append((
-                            G.nodes[u].get('value'),
-                            G.nodes[v].get('value'),
-                            rel_data.get('value'),
-                            G.nodes[target].get('value'),
-                        ))
-
-    elif cue_type == 'obj-att|obj':
-        # 对象关系后目标对象存在属性边进入: 输出 (起始对象value, 关系value, 目标对象value, 属性节点value)
-        for u, v, data in G.edges(data=True):
-            if data.get('type') == 'relation_edge' \
-               and G.nodes[u].get('type') == 'object_node' \
-               and G.nodes[v].get('type') == 'object_node':
-                # 检查目标对象 v 是否存在进入的属性边
-                for att, _ in G.in_edges(v):
-                    if G.edges[att, v].get('type') == 'attribute_edge':
-                        knowledge.append((
-                            G.nodes[u].get('value'),
-                            data.get('value'),
-                            G.nodes[att].get('value'),
-                            G.nodes[v].get('value'),
-                        ))
-
-    elif cue_type == 'att|obj-att|obj':
-        # 属性边 -> 对象 -> 对象关系 -> 属性边 -> 对象
-        # 输出 (第一个属性节点value, 第一个对象value, 关系value, 第二个对象value, 第二个属性节点value)
-        for u, v, data in G.edges(data=True):
-            if data.get('type') == 'attribute_edge':  # u->v
-                for _, target, rel_data in G.out_edges(v, data=True):
-                    if rel_data.get('type') == 'relation_edge' and G.nodes[target].get('type') == 'object_node':
-                        for att2, _ in G.in_edges(target):
-                            if G.edges[att2, target].get('type') == 'attribute_edge':
-                                knowledge.append((
-                                    G.nodes[u].get('value'),
-                                    G.nodes[v].get('value'),
-                                    rel_data.get('value'),
-                                    G.nodes[att2].get('value'),
-                                    G.nodes[target].get('value'),
-                                ))
-    else:
+    每种 cue_type 对应 graph_query.CUE_QUERIES 中的一个内置查询：
+      - att|obj: (属性节点value, 对象节点value)
+      - obj-obj: (起始对象value, 关系value, 目标对象value)
+      - att|obj-obj: (属性节点value, 对象节点value, 关系value, 目标对象value)
+      - obj-att|obj: (起始对象value, 关系value, 目标对象的属性节点value, 目标对象value)
+      - att|obj-att|obj: (第一个属性节点value, 第一个对象value, 关系value, 第二个属性节点value, 第二个对象value)
+    需要在同一个图上提取多种知识时，使用 graph_query.run_queries 复用邻接索引。
+    """
+    if cue_type not in CUE_QUERIES:
         raise ValueError("cue_type 必须在 ['att|obj', 'obj-obj', 'att|obj-obj', 'obj-att|obj', 'att|obj-att|obj'] 中")
-
-    return knowledge
+    return CUE_QUERIES[cue_type].run(G)
 
 def map_knowledge(G, knowledge, cue_type):
     """
@@ -336,13 +294,7 @@ def entry_build_graph(entry_list):
     return G
 
 def get_knowledge(G, situ = None, llm_correct = False):
-    cue_types = ['att|obj', 'obj-obj', 'att|obj-obj', 'obj-att|obj', 'att|obj-att|obj']
-    cues = {
-        cue_type:extract_knowledge(
-        G, cue_type=cue_type,
-        ) for cue_type in cue_types
-    }
-    return cues
+    return run_queries(G, CUE_QUERIES)
 
 def get_max_attribute(G, object_id):
     object_num = int(object_id.split('_')[1])
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import ast
 import json
 import re
 from typing import Any
@@ -8,57 +9,236 @@ from typing import Optional
 
 from wasabi import msg
 
+try:
+    import orjson
+except ImportError:  # 可选依赖, 缺失时退回标准库 json
+    orjson = None
+
+# 字符串感知扫描时关心的字符: 引号 (含智能引号)、转义符与花括号
+_SCAN_CHARS = re.compile(r'["\'\u201c\u201d\\{}]')
+# 开始字符串的引号 -> 结束它的引号
+_CLOSING_QUOTE = {'"': '"', "'": "'", '\u201c': '\u201d'}
+# 单引号只在这些字符之后才开始字符串, 其余位置视为撇号 (如 “Ye's friend”)
+_SQ_OPENERS = frozenset('{[:,')
+# 匹配一个完整的双引号字符串 (用于在修复时跳过字符串内容)
+_DQ_STRING = r'"(?:[^"\\]|\\.)*"'
+_TRAILING_COMMA = re.compile(rf'({_DQ_STRING})|,\s*([}}\]])', re.DOTALL)
+_SMART_QUOTE = re.compile(rf'({_DQ_STRING})|[\u201c\u201d\u201e\u201f]', re.DOTALL)
+_PY_LITERALS = re.compile(rf"({_DQ_STRING}|'(?:[^'\\]|\\.)*')|\b(true|false|null)\b", re.DOTALL)
+
+
+def _prev_char(text: str, i: int) -> str:
+    """text[i] 之前最近的非空白字符, 没有时返回 ''。"""
+    i -= 1
+    while i >= 0 and text[i].isspace():
+        i -= 1
+    return text[i] if i >= 0 else ''
+
+
+def _find_json_span(text: str, start: int) -> tuple[int, int] | None:
+    """
+    从 start 开始寻找第一个平衡的 { ... } 块, 返回其 [begin, end) 区间。
+
+    单遍扫描, 只在引号、转义符与花括号处停留; 字符串 (双引号、智能引号 “ ”, 或紧跟在
+    { [ : , 之后的单引号) 内的花括号不计入配对。
+    """
+    begin = text.find('{', start)
+    if begin < 0:
+        return None
+    depth = 0
+    quote = None
+    escaped = -1
+    for m in _SCAN_CHARS.finditer(text, begin):
+        i = m.start()
+        if i == escaped:
+            continue
+        ch = text[i]
+        if quote is not None:
+            if ch == '\\':
+                escaped = i + 1
+            elif ch == quote:
+                quote = None
+        elif ch in _CLOSING_QUOTE:
+            if ch == "'" and _prev_char(text, i) not in _SQ_OPENERS:
+                continue
+            quote = _CLOSING_QUOTE[ch]
+        elif ch == '{':
+            depth += 1
+        elif ch == '}':
+            depth -= 1
+            if depth == 0:
+                return begin, i + 1
+    return None
+
+
+def _loads(candidate: str) -> Any:
+    if orjson is not None:
+        try:
+            return orjson.loads(candidate)
+        except orjson.JSONDecodeError:
+            pass
+    # strict=False 允许字符串中出现未转义的换行等控制字符
+    return json.loads(candidate, strict=False)
+
+
+def repair_json(candidate: str) -> str:
+    """
+    修复 LLM 输出中常见的 JSON 错误 (不改动双引号字符串的内容):
+      - 对象/数组末尾多余的逗号
+      - 作为分隔符使用的中文/智能引号 “ ” „ ‟
+    """
+    candidate = _SMART_QUOTE.sub(lambda m: m.group(1) or '"', candidate)
+    candidate = _TRAILING_COMMA.sub(lambda m: m.group(1) or m.group(2), candidate)
+    return candidate
+
+
+def _parse_candidate(candidate: str) -> Any:
+    try:
+        return _loads(candidate)
+    except json.JSONDecodeError as err:
+        first_error = err
+
+    repaired = repair_json(candidate)
+    attempts = [repaired, repaired.replace(r'\n', '\n')]
+    for attempt in attempts:
+        try:
+            return _loads(attempt)
+        except json.JSONDecodeError:
+            continue
+
+    # 最后尝试按 Python 字面量解析 (few-shot 中的单引号字典风格)
+    literal = _PY_LITERALS.sub(
+        lambda m: m.group(1) or {'true': 'True', 'false': 'False', 'null': 'None'}[m.group(2)],
+        repaired,
+    )
+    try:
+        value = ast.literal_eval(literal)
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        raise first_error
+    # 字面量解析可能得到 JSON 中不存在的类型, 如 '{1, 2}' 被解析为 set
+    if not isinstance(value, (dict, list)):
+        raise ValueError(f'expected a JSON object or array, got {type(value).__name__}')
+    return value
+
+
 def extract_json(text: str) -> dict[Any, Any]:
     """
     从字符串中提取第一个 JSON 对象并解析为 Python 字典。
     支持 ```json ... ``` 代码块，也支持直接提取最外层的 { ... } 块。
-    解析失败时抛出 json.JSONDecodeError。
+
+    - 快速路径: 整段文本或 ```json``` 代码块本身就是 JSON 对象时直接解析 (安装了 orjson 时使用 orjson)
+    - 否则以单遍、字符串感知的扫描定位第一个平衡的 { ... } 块, 字符串内的花括号不影响配对
+    - 解析失败时依次尝试 repair_json 的修复、字面 '\\n' 还原与 Python 字面量解析
+    解析失败时抛出 json.JSONDecodeError; Python 字面量解析的结果不是字典或列表 (如 set) 时抛出 ValueError。
     """
-    # 尝试在 ```json``` 代码块中匹配
-    fence_pattern = r'```json\s*(\{.*?\})\s*```'
-    m = re.search(fence_pattern, text, re.DOTALL)
-    if m:
-        candidate = m.group(1)
-    else:
-        # 回退：提取第一个平衡的 { ... } 块
-        brace_stack = []
-        start_idx = None
-        for i, ch in enumerate(text):
-            if ch == '{':
-                if start_idx is None:
-                    start_idx = i
-                brace_stack.append(ch)
-            elif ch == '}' and brace_stack:
-                brace_stack.pop()
-                if not brace_stack and start_idx is not None:
-                    candidate = text[start_idx:i+1]
-                    break
-        else:
-            # 未找到任何 JSON 块，则抛出 JSONDecodeError
-            raise json.JSONDecodeError('No JSON object found in text', text, 0)
-
-    # 将文字中的 '\n' 转为真实换行
-    candidate = candidate.replace(r'\n', '\n')
-
-    # 直接解析，若格式不合法将抛出 JSONDecodeError
-    return json.loads(candidate)
+    stripped = text.strip()
+    if stripped.startswith('{') and stripped.endswith('}'):
+        try:
+            return _loads(stripped)
+        except json.JSONDecodeError:
+            pass
 
+    # 优先在 ```json``` 代码块中查找
+    fence = text.find('```json')
+    if fence >= 0:
+        close = text.find('```', fence + 7)
+        body = text[fence + 7:close].strip() if close >= 0 else ''
+        if body.startswith('{') and body.endswith('}'):
+            try:
+                return _loads(body)
+            except json.JSONDecodeError:
+                pass
+    span = _find_json_span(text, fence) if fence >= 0 else None
+    if span is None:
+        span = _find_json_span(text, 0)
+    if span is None:
+        # 未找到任何 JSON 块，则抛出 JSONDecodeError
+        raise json.JSONDecodeError('No JSON object found in text', text, 0)
 
-# 示例用法
-if __name__ == '__main__':
-    sample_text = """
-    前言...
-    ```json
-    { "a": 1, "b": 2, }
-    ```
-    后记...
+    return _parse_candidate(text[span[0]:span[1]])
+
+
+_JSON_TYPES = {
+    'object': dict,
+    'array': (list, tuple),
+    'string': str,
+    'boolean': bool,
+    'null': type(None),
+}
+
+
+class SchemaValidationError(ValueError):
+    """LLM 返回的 JSON 不符合模板声明的 output_schema 时抛出, errors 为 'path: message' 列表。"""
+
+    def __init__(self, errors, task=None):
+        self.errors = errors
+        self.task = task
+        head = f'{task} 的输出不符合 schema' if task else '输出不符合 schema'
+        super().__init__(head + ':\n' + '\n'.join(f'- {e}' for e in errors[:20]))
+
+
+def _is_type(value, name):
+    if name == 'integer':
+        return isinstance(value, int) and not isinstance(value, bool)
+    if name == 'number':
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    return isinstance(value, _JSON_TYPES[name])
+
+
+def validate_json(value: Any, schema: dict, path: str = '$') -> list[str]:
     """
-    try:
-        result = extract_json(sample_text)
-        print('Parsed JSON:', result)
-    except json.JSONDecodeError as e:
-        print('JSON解析失败:', e)
+    按 JSON Schema 的常用子集校验 value, 返回错误列表 (空列表表示通过)。
+
+    支持: type (字符串或列表)、enum、const、properties、required、additionalProperties
+    (bool 或 schema)、items、prefixItems、minItems、maxItems、minLength、anyOf。
+
+    :param value: 待校验的 JSON 值
+    :param schema: schema 字典
+    :param path: 错误路径前缀
+    :return: 'path: message' 形式的错误列表
+    """
+    errors = []
+    expected = schema.get('type')
+    if expected is not None:
+        names = expected if isinstance(expected, list) else [expected]
+        if not any(_is_type(value, name) for name in names):
+            return [f'{path}: expected {"/".join(names)}, got {type(value).__name__}']
+    if 'enum' in schema and value not in schema['enum']:
+        errors.append(f'{path}: {value!r} is not one of {schema["enum"]}')
+    if 'const' in schema and value != schema['const']:
+        errors.append(f'{path}: expected {schema["const"]!r}')
+    if 'anyOf' in schema:
+        branches = [validate_json(value, sub, path) for sub in schema['anyOf']]
+        if all(branches):
+            errors.extend(min(branches, key=len))
 
+    if isinstance(value, str):
+        if len(value) < schema.get('minLength', 0):
+            errors.append(f'{path}: string is shorter than {schema["minLength"]}')
+    elif isinstance(value, (list, tuple)):
+        if len(value) < schema.get('minItems', 0):
+            errors.append(f'{path}: expected at least {schema["minItems"]} items, got {len(value)}')
+        if 'maxItems' in schema and len(value) > schema['maxItems']:
+            errors.append(f'{path}: expected at most {schema["maxItems"]} items, got {len(value)}')
+        prefix = schema.get('prefixItems', [])
+        for i, item in enumerate(value):
+            sub = prefix[i] if i < len(prefix) else schema.get('items')
+            if sub is not None:
+                errors.extend(validate_json(item, sub, f'{path}[{i}]'))
+    elif isinstance(value, dict):
+        properties = schema.get('properties', {})
+        for key in schema.get('required', []):
+            if key not in value:
+                errors.append(f'{path}: missing required key {key!r}')
+        additional = schema.get('additionalProperties', True)
+        for key, item in value.items():
+            if key in properties:
+                errors.extend(validate_json(item, properties[key], f'{path}.{key}'))
+            elif additional is False:
+                errors.append(f'{path}: unexpected key {key!r}')
+            elif isinstance(additional, dict):
+                errors.extend(validate_json(item, additional, f'{path}.{key}'))
+    return errors
 
 
 def print_conversation(msgs):
@@ -76,3 +256,19 @@ def print_conversation(msgs):
         )
         msg.divider(icon)
         print(turn['content'])
+
+
+# 示例用法
+if __name__ == '__main__':
+    sample_text = """
+    前言...
+    ```json
+    { "a": 1, "b": 2, }
+    ```
+    后记...
+    """
+    try:
+        result = extract_json(sample_text)
+        print('Parsed JSON:', result)
+    except json.JSONDecodeError as e:
+        print('JSON解析失败:', e)
@@ -1,4 +1,6 @@
 from __future__ import annotations
 
+from .batch import BatchRenderer
+from .fast import draw_G_fast
 from .sg import draw_G
 from .sg import draw_Gs
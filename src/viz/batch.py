@@ -0,0 +1,276 @@
+"""
+批量绘制场景图: 复用 Figure、缓存布局, 并在多个 Agg 后端的工作进程中并行绘制。
+
+draw_G / draw_Gs 每次都经 pyplot 新建 300 dpi 的 Figure 并重新计算 spring 布局;
+EXAMPLE_batch.py 中每个条目画三张图 (G、Gs、GsEnriched), 几百张图要几分钟。这里:
+
+- FigurePool: 按 (面板数, figsize, dpi) 复用 Figure 与 Axes (不经过 pyplot, 线程内独占)
+- 布局来自 layout.LayoutCache, 同一张图 (如 vng_graphs 与未富化的 intergrated_Gs 面板) 只计算一次,
+  富化后的面板 (GraphOverlay) 在 VNG 图布局的基础上增量布局
+- render_many 把条目分给工作进程, 父进程把已缓存的布局随任务发送, 工作进程把新计算的布局带回
+- 输出格式可配置: png、svg、pdf、jpg, 以及 LZW 压缩的 tif
+- fast=True 时以 fast.draw_G_fast 绘制 (每类元素一个集合; 单个 SJT 图约快 2 倍, 百余节点的图约快 7 倍)
+
+用法:
+    renderer = BatchRenderer(format='png', dpi=150)
+    figures = renderer.render_result(res)                    # {'G': bytes, 'Gs': bytes, 'GsEnriched': bytes}
+    renderer.render_many({('O', '1'): res, ...}, workers=8, out_dir='results/final/figs')
+
+从 campaign 数据库重绘全部图片:
+    python -m src.viz.batch results/final/campaign.sqlite --format png --workers 8
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import os
+import threading
+from concurrent.futures import as_completed
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from ..utils.graph_overlay import GraphOverlay
+from .fast import draw_G_fast
+from .layout import LAYOUT_CACHE
+from .sg import draw_G
+from .style import VNG_TITLES
+
+# 输出格式 -> (matplotlib 格式, 文件扩展名, savefig 的额外参数)
+FORMATS = {
+    'png': ('png', 'png', {}),
+    'svg': ('svg', 'svg', {}),
+    'pdf': ('pdf', 'pdf', {}),
+    'jpg': ('jpg', 'jpg', {}),
+    'tif': ('tiff', 'tif', {'pil_kwargs': {'compression': 'tiff_lzw'}}),
+    'tiff': ('tiff', 'tif', {'pil_kwargs': {'compression': 'tiff_lzw'}}),
+}
+
+# fit() 输出中需要绘制的图: 名称 -> (key, 是否为 {vng: G})
+RESULT_FIGURES = {
+    'G': ('situation_graph', False),
+    'Gs': ('vng_graphs', True),
+    'GsEnriched': ('intergrated_Gs', True),
+}
+# 富化图的父图: 与 html_export 一致, 同一面板的富化图在 VNG 图的布局上增量布局
+RESULT_PARENTS = {'intergrated_Gs': 'vng_graphs'}
+
+
+class FigurePool:
+    """按 (面板数, figsize, dpi) 复用 Figure; 每个线程一个池, 取出的 Figure 在下一次 get 前有效。"""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def get(self, ncols: int, figsize, dpi) -> tuple[Figure, list]:
+        pool = self._local.__dict__.setdefault('figures', {})
+        key = (ncols, tuple(figsize), dpi)
+        if key not in pool:
+            fig = Figure(figsize=figsize, dpi=dpi)
+            FigureCanvasAgg(fig)
+            axes = fig.subplots(1, ncols, squeeze=False)[0].tolist()
+            pool[key] = (fig, axes)
+        fig, axes = pool[key]
+        for ax in axes:
+            ax.clear()
+            ax.axis('on')
+            for spine in ax.spines.values():
+                spine.set_visible(True)
+        return fig, axes
+
+
+class BatchRenderer:
+    """
+    见模块说明。
+
+    :param format: 输出格式, 见 FORMATS
+    :param dpi: 输出 dpi
+    :param layout: 布局方式, 同 draw_G
+    :param layout_cache: 布局缓存, 默认为进程内共享的 LAYOUT_CACHE
+    :param fast: 为 True 时用 fast.draw_G_fast 代替 sg.draw_G
+    :param savefig: 其它传给 Figure.savefig 的参数
+    """
+
+    def __init__(self, format='png', dpi=150, layout='spring', layout_cache=None, fast=False, **savefig):
+        if format not in FORMATS:
+            raise ValueError(f'不支持的格式: {format!r}, 可用: {list(FORMATS)}')
+        self.format = format
+        self.dpi = dpi
+        self.layout = layout
+        self.layout_cache = LAYOUT_CACHE if layout_cache is None else layout_cache
+        self.fast = fast
+        self.draw = draw_G_fast if fast else draw_G
+        self.savefig = {'bbox_inches': 'tight', **savefig}
+        self.pool = FigurePool()
+
+    @property
+    def extension(self):
+        return FORMATS[self.format][1]
+
+    def _save(self, fig) -> bytes:
+        fmt, _, extra = FORMATS[self.format]
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format=fmt, dpi=self.dpi, **extra, **self.savefig)
+        return buffer.getvalue()
+
+    def _pos(self, G, parent=None):
+        return self.layout_cache.get(G, self.layout, parent=parent)
+
+    def render_G(self, G, title='', **draw_kwargs) -> bytes:
+        """与 draw_G(G) 相同的图, 返回编码后的字节。"""
+        fig, (ax,) = self.pool.get(1, (6, 6), self.dpi)
+        self.draw(G, ax=ax, title=title, pos=self._pos(G), layout=self.layout, **draw_kwargs)
+        for spine in ax.spines.values():
+            spine.set_visible(False)
+        ax.axis('off')
+        fig.tight_layout()
+        return self._save(fig)
+
+    def render_Gs(self, Gs, parents=None) -> bytes:
+        """与 draw_Gs(Gs) 相同的图, 返回编码后的字节; parents 为可选的 {vng: 父图}, 用于增量布局。"""
+        parents = parents or {}
+        fig, axes = self.pool.get(len(Gs), (4 * len(Gs), 4), self.dpi)
+        for i, (vng, G) in enumerate(Gs.items()):
+            self.draw(
+                G, ax=axes[i], title=VNG_TITLES.get(vng, vng),
+                node_fontsize=8, edge_fontsize=8, pos=self._pos(G, parents.get(vng)), layout=self.layout,
+            )
+            axes[i].spines['top'].set_visible(False)
+            axes[i].spines['bottom'].set_visible(False)
+            axes[i].spines['left'].set_visible(False)
+            if i == len(Gs) - 1:
+                axes[i].spines['right'].set_visible(False)
+        fig.tight_layout()
+        return self._save(fig)
+
+    def render_result(self, res: dict) -> dict[str, bytes]:
+        """绘制一个条目的 fit() 输出, 返回 {'G': bytes, 'Gs': bytes, 'GsEnriched': bytes} (缺失的图跳过)。"""
+        figures = {}
+        for name, (key, is_dict) in RESULT_FIGURES.items():
+            graphs = res.get(key)
+            if graphs is None or isinstance(graphs, str) or (is_dict and not graphs):
+                continue
+            figures[name] = self.render_Gs(graphs, self._parents(res, key)) if is_dict else self.render_G(graphs)
+        return figures
+
+    @staticmethod
+    def _parents(res, key):
+        parents = res.get(RESULT_PARENTS.get(key))
+        return parents if isinstance(parents, dict) else {}
+
+    def _graphs(self, res):
+        """条目中需要布局的 (图, 父图)。"""
+        for key, is_dict in RESULT_FIGURES.values():
+            graphs = res.get(key)
+            if graphs is None or isinstance(graphs, str):
+                continue
+            parents = self._parents(res, key) if is_dict else {}
+            for vng, G in (graphs.items() if is_dict else [(None, graphs)]):
+                yield G, parents.get(vng)
+                if isinstance(G, GraphOverlay):
+                    yield G.base, None
+
+    def render_many(self, results: dict, workers: int | None = None, out_dir: str | None = None) -> dict:
+        """
+        绘制多个条目。
+
+        :param results: {(trait, item): fit() 输出}
+        :param workers: 工作进程数; 0 或 1 时在当前进程中绘制, None 时为 CPU 数
+        :param out_dir: 给定时把图片写为 <out_dir>/<trait>/<name>_<trait>_<item>.<ext> 并返回路径,
+                        否则返回字节
+        :return: {(trait, item): {name: bytes 或路径}}
+        """
+        workers = os.cpu_count() if workers is None else workers
+        outputs = {}
+        if workers <= 1 or len(results) <= 1:
+            for key, res in results.items():
+                outputs[key] = self._write(key, self.render_result(res), out_dir)
+            return outputs
+
+        options = {'format': self.format, 'dpi': self.dpi, 'layout': self.layout, 'fast': self.fast, **self.savefig}
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(options,)) as executor:
+            futures = {}
+            for key, res in results.items():
+                graphs = list(self._graphs(res))
+                known = {}
+                for G, parent in graphs:
+                    lkey = self.layout_cache.key(G, self.layout, parent)
+                    pos = self.layout_cache.lookup(lkey)
+                    if pos is not None:
+                        known[lkey] = pos
+                # GraphOverlay 原样发送 (连同 base), 工作进程据此做增量布局
+                payload = {name: res.get(k) for name, (k, _) in RESULT_FIGURES.items()}
+                futures[executor.submit(_render_worker, payload, known)] = key
+            for future in as_completed(futures):
+                key = futures.pop(future)
+                figures, layouts = future.result()
+                for lkey, pos in layouts.items():
+                    self.layout_cache.store(lkey, pos)
+                outputs[key] = self._write(key, figures, out_dir)
+        return outputs
+
+    def _write(self, key, figures, out_dir):
+        if out_dir is None:
+            return figures
+        trait, item = key
+        directory = os.path.join(out_dir, str(trait))
+        os.makedirs(directory, exist_ok=True)
+        paths = {}
+        for name, data in figures.items():
+            path = os.path.join(directory, f'{name}_{trait}_{item}.{self.extension}')
+            tmp = f'{path}.{os.getpid()}.tmp'
+            with open(tmp, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+            paths[name] = path
+        return paths
+
+
+# ---- 工作进程 ----
+_WORKER = None
+
+
+def _init_worker(options):
+    global _WORKER
+    matplotlib.use('Agg')
+    from .layout import LayoutCache
+    _WORKER = BatchRenderer(layout_cache=LayoutCache(), **options)
+
+
+def _render_worker(payload, known):
+    """在工作进程中绘制一个条目; 返回 (图片, 本次新计算的布局)。"""
+    cache = _WORKER.layout_cache
+    for lkey, pos in known.items():
+        cache.store(lkey, pos)
+    before = cache.snapshot()
+    res = {key: payload[name] for name, (key, _) in RESULT_FIGURES.items()}
+    figures = _WORKER.render_result(res)
+    layouts = {lkey: pos for lkey, pos in cache.snapshot().items() if lkey not in before}
+    return figures, layouts
+
+
+if __name__ == '__main__':
+    from ..datasets.campaign import CampaignStore
+
+    parser = argparse.ArgumentParser(description='重绘 campaign 数据库中全部条目的图片')
+    parser.add_argument('database')
+    parser.add_argument('--format', default='png', choices=list(FORMATS))
+    parser.add_argument('--dpi', type=int, default=150)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--out-dir', help='写为文件而不是存回数据库')
+    parser.add_argument('--fast', action='store_true', help='使用向量化的 draw_G_fast')
+    args = parser.parse_args()
+
+    campaign = CampaignStore(args.database)
+    results = {
+        key: campaign.read(*key, kinds=[k for k, _ in RESULT_FIGURES.values()]) for key in campaign.items()
+    }
+    renderer = BatchRenderer(format=args.format, dpi=args.dpi, fast=args.fast)
+    outputs = renderer.render_many(results, workers=args.workers, out_dir=args.out_dir)
+    if args.out_dir is None:
+        for (trait, item), figures in outputs.items():
+            for name, data in figures.items():
+                campaign.put_figure(trait, item, name, data, format=renderer.extension)
+    print(f'rendered {sum(map(len, outputs.values()))} figures for {len(outputs)} items')
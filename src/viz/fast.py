@@ -0,0 +1,385 @@
+"""
+向量化的场景图绘制, 不经过 networkx 的 draw_networkx_* 。
+
+draw_G 对每条边创建一个 FancyArrowPatch、对每个标签创建一个 Text, 几百个节点的图有上千个 artist,
+绘制时间主要花在逐个 artist 的 draw 上。draw_G_fast 接受与 draw_G 相同的参数, 画出同样的图,
+但每类元素只用一个集合:
+
+- 关系边、属性边: 各一个 PathCollection (边身与箭头在同一个集合中, 颜色为逐条的数组)
+- object 节点、attribute 节点: 各一个 scatter (PathCollection)
+- 节点标签、边标签: 各一个 PathCollection, 字形轮廓来自 TextPath 并按 (文本, 字号) 缓存,
+  边标签的白色底框与文字在同一个集合中
+
+边的缩进 (min_source_margin / min_target_margin)、箭头大小、标签角度等以 point 为单位, 依赖于最终的
+坐标变换, 因此与 FancyArrowPatch 一样在 draw 时按当前的 transData 一次性 (numpy) 计算。
+"""
+from __future__ import annotations
+
+from functools import lru_cache
+
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.collections import PathCollection
+from matplotlib.font_manager import FontProperties
+from matplotlib.path import Path
+from matplotlib.textpath import TextPath
+from matplotlib.textpath import TextToPath
+from matplotlib.transforms import IdentityTransform
+
+from ..utils.graph_overlay import as_G
+from .layout import compute_layout
+
+# 与 draw_G 中 draw_networkx_edges 的参数一致
+ARROW_SIZE = 20
+EDGE_WIDTH = 2
+EDGE_MARGIN = 15
+RELATION_RAD = 0.1
+# ArrowStyle '-|>' 的箭头长度与半宽 (相对于 ARROW_SIZE)
+HEAD_LENGTH = 0.4
+HEAD_WIDTH = 0.2
+# 边标签位于直线的中点 (draw_networkx_edge_labels 在两端等距缩进, 中点不变), 底框外扩 LABEL_PAD point
+LABEL_PAD = 0.5
+
+_TEXT_TO_PATH = TextToPath()
+
+
+@lru_cache(maxsize=4096)
+def _glyphs(text, size, family):
+    """
+    文本的字形轮廓 (point 为单位), 按 Text 的 ha='center', va='center' 对齐到原点。
+
+    :return: (vertices, codes, 宽, 高)
+    """
+    prop = FontProperties(family=list(family), size=size)
+    width, height, descent = _TEXT_TO_PATH.get_text_width_height_descent(text, prop, ismath=False)
+    # Text 的行高至少为 "lp" 的高度
+    _, lp_height, lp_descent = _TEXT_TO_PATH.get_text_width_height_descent('lp', prop, ismath=False)
+    height, descent = max(height, lp_height), max(descent, lp_descent)
+    path = TextPath((0, 0), text, size=size, prop=prop)
+    vertices = path.vertices - (width / 2, height / 2 - descent)
+    return vertices, path.codes, width, height
+
+
+def _upright(angle):
+    """与 networkx 相同: 标签角度限制在 [-90, 90], 文字不倒置。"""
+    angle = np.where(angle > 90, angle - 180, angle)
+    return np.where(angle < -90, angle + 180, angle)
+
+
+def _circle_exit(p0, c, p1, center, radius, leaving=True):
+    """
+    二次贝塞尔 p0-c-p1 与以 center 为圆心的圆的交点参数 t (逐条二分, 对全部边向量化)。
+
+    :param leaving: True 时曲线在 t=0 处于圆内, 求离开圆的 t; 否则在 t=1 处于圆内, 求进入圆的 t
+    """
+    lo = np.zeros(len(p0))
+    hi = np.ones(len(p0))
+    for _ in range(24):
+        t = (lo + hi) / 2
+        point = _bezier(p0, c, p1, t)
+        inside = np.hypot(*(point - center).T) < radius
+        if leaving:
+            lo, hi = np.where(inside, t, lo), np.where(inside, hi, t)
+        else:
+            lo, hi = np.where(inside, lo, t), np.where(inside, t, hi)
+    return (lo + hi) / 2
+
+
+def _bezier(p0, c, p1, t):
+    t = np.asarray(t)[..., None]
+    return (1 - t) ** 2 * p0 + 2 * t * (1 - t) * c + t ** 2 * p1
+
+
+class ArrowCollection(PathCollection):
+    """
+    一组带箭头的边 (arrowstyle='-|>'), 边身与箭头在同一个集合中。
+
+    :param starts: 起点的数据坐标 (N, 2)
+    :param ends: 终点的数据坐标 (N, 2)
+    :param colors: 每条边的颜色
+    :param rad: arc3 连接的弧度, 0 为直线
+    :param selfloop_height: 自环的高度 (数据坐标), 同 networkx
+    """
+
+    def __init__(
+        self, starts, ends, colors, rad=0.0, selfloop_height=1.0, margin=EDGE_MARGIN,
+        arrowsize=ARROW_SIZE, width=EDGE_WIDTH, **kwargs,
+    ):
+        colors = list(colors)
+        super().__init__(
+            [], facecolors=['none'] * len(colors) + colors, edgecolors=colors + colors,
+            linewidths=width, capstyle='round', joinstyle='round', zorder=1, **kwargs,
+        )
+        self.set_transform(IdentityTransform())
+        # 几何在 draw 时才计算, 范围不超出坐标轴, 不参与 tight_layout
+        self.set_in_layout(False)
+        self.starts = np.asarray(starts, dtype=float).reshape(-1, 2)
+        self.ends = np.asarray(ends, dtype=float).reshape(-1, 2)
+        self.rad = rad
+        self.selfloop_height = selfloop_height
+        self.margin = margin
+        self.arrowsize = arrowsize
+        self.width = width
+
+    def _geometry(self, renderer):
+        """边身与箭头在显示坐标中的 Path 列表。"""
+        to_pixels = renderer.points_to_pixels
+        trans = self.axes.transData
+        n = len(self.starts)
+        loops = np.all(self.starts == self.ends, axis=1)
+        p0, p1 = trans.transform(self.starts), trans.transform(self.ends)
+
+        # arc3: 控制点在中点沿法向偏移 rad * 边长
+        delta = p1 - p0
+        c = (p0 + p1) / 2 + self.rad * np.column_stack([delta[:, 1], -delta[:, 0]])
+        margin = to_pixels(self.margin)
+        t0 = _circle_exit(p0, c, p1, p0, margin, leaving=True)
+        t1 = _circle_exit(p0, c, p1, p1, margin, leaving=False)
+        t1 = np.maximum(t0, t1)
+        # 截取 [t0, t1] 的子曲线 (仍是二次贝塞尔)
+        a, b = _bezier(p0, c, p1, t0), _bezier(p0, c, p1, t1)
+        tangent_end = 2 * (1 - t1)[:, None] * (c - p0) + 2 * t1[:, None] * (p1 - c)
+        mid = _bezier(p0, c, p1, (t0 + t1) / 2)
+        sub_c = 2 * mid - (a + b) / 2
+
+        head_length = to_pixels(HEAD_LENGTH * self.arrowsize)
+        head_width = to_pixels(HEAD_WIDTH * self.arrowsize)
+        head_dist = np.hypot(head_length, head_width)
+        cos_t, sin_t = head_length / head_dist, head_width / head_dist
+        linewidth = to_pixels(self.width)
+
+        shafts, heads = [None] * n, [None] * n
+        for i in np.flatnonzero(loops):
+            shafts[i], heads[i] = self._loop(i, trans, head_dist, cos_t, sin_t, linewidth)
+
+        # 箭头: 沿终点切线反方向, 与 ArrowStyle._Curve._get_arrow_wedge 相同
+        curve = ~loops
+        back = -tangent_end[curve]
+        norm = np.hypot(*back.T)[:, None]
+        norm[norm == 0] = 1
+        back = back / norm
+        tip = b[curve] + 0.5 * linewidth / sin_t * back
+        rot1 = np.column_stack([cos_t * back[:, 0] + sin_t * back[:, 1], -sin_t * back[:, 0] + cos_t * back[:, 1]])
+        rot2 = np.column_stack([cos_t * back[:, 0] - sin_t * back[:, 1], sin_t * back[:, 0] + cos_t * back[:, 1]])
+        wing1, wing2 = tip + head_dist * rot1, tip + head_dist * rot2
+        has_head = np.hypot(*tangent_end[curve].T) > 0
+        codes = [Path.MOVETO, Path.CURVE3, Path.CURVE3]
+        head_codes = [Path.MOVETO, Path.LINETO, Path.LINETO, Path.CLOSEPOLY]
+        for j, i in enumerate(np.flatnonzero(curve)):
+            end = tip[j] if has_head[j] else b[i]
+            shafts[i] = Path([a[i], sub_c[i], end], codes)
+            heads[i] = Path([wing1[j], tip[j], wing2[j], tip[j]], head_codes) if has_head[j] else Path(np.empty((0, 2)))
+        return shafts + heads
+
+    def _loop(self, i, trans, head_dist, cos_t, sin_t, linewidth):
+        """自环, 与 networkx 的 self_loop 连接相同 (不缩进)。"""
+        v_shift = 0.1 * self.selfloop_height
+        h_shift = v_shift * 0.5
+        offsets = np.array([
+            [0, v_shift], [h_shift, v_shift], [h_shift, 0], [0, 0], [-h_shift, 0], [-h_shift, v_shift], [0, v_shift],
+        ])
+        vertices = trans.transform(self.starts[i] + offsets)
+        back = vertices[-2] - vertices[-1]
+        back = back / (np.hypot(*back) or 1)
+        tip = vertices[-1] + 0.5 * linewidth / sin_t * back
+        wing1 = tip + head_dist * np.array([cos_t * back[0] + sin_t * back[1], -sin_t * back[0] + cos_t * back[1]])
+        wing2 = tip + head_dist * np.array([cos_t * back[0] - sin_t * back[1], sin_t * back[0] + cos_t * back[1]])
+        vertices[-1] = tip
+        shaft = Path(vertices, [Path.MOVETO] + [Path.CURVE4] * 6)
+        head = Path([wing1, tip, wing2, tip], [Path.MOVETO, Path.LINETO, Path.LINETO, Path.CLOSEPOLY])
+        return shaft, head
+
+    def draw(self, renderer):
+        if not self.get_visible() or self.axes is None:
+            return
+        self.set_paths(self._geometry(renderer))
+        super().draw(renderer)
+
+
+class LabelCollection(PathCollection):
+    """
+    一组文本标签, 以字形轮廓绘制在同一个集合中。
+
+    :param texts: 标签文本
+    :param anchors: 标签中心的数据坐标 (N, 2)
+    :param colors: 每个标签的颜色
+    :param fontsize: 字号
+    :param directions: 可选的 (N, 2, 2) 数据坐标线段, 给定时标签沿线段方向旋转 (保持文字正向)
+    :param background: 可选的底框颜色, 给定时在文字下方绘制外扩 LABEL_PAD 的矩形
+    """
+
+    def __init__(self, texts, anchors, colors, fontsize=10, directions=None, background=None, **kwargs):
+        colors = list(colors)
+        family = tuple(np.atleast_1d(plt.rcParams['font.family']))
+        glyphs = [_glyphs(str(text), fontsize, family) for text in texts]
+        facecolors = colors
+        if background is not None:
+            # 底框与文字交替排列, 重叠的标签与逐个 Text 绘制时的遮挡顺序相同
+            facecolors = [c for color in colors for c in (background, color)]
+        super().__init__([], facecolors=facecolors, edgecolors='none', linewidths=0, **kwargs)
+        self.set_transform(IdentityTransform())
+        self.set_in_layout(False)
+        self.anchors = np.asarray(anchors, dtype=float).reshape(-1, 2)
+        self.directions = None if directions is None else np.asarray(directions, dtype=float).reshape(-1, 2, 2)
+        self.glyphs = glyphs
+        self.background = background
+
+    def _geometry(self, renderer):
+        trans = self.axes.transData
+        scale = renderer.points_to_pixels(1.0)
+        centers = trans.transform(self.anchors)
+        if self.directions is None:
+            angles = np.zeros(len(centers))
+        else:
+            p0 = trans.transform(self.directions[:, 0])
+            p1 = trans.transform(self.directions[:, 1])
+            delta = p1 - p0
+            angles = _upright(np.degrees(np.arctan2(delta[:, 1], delta[:, 0])))
+        cos, sin = np.cos(np.radians(angles)), np.sin(np.radians(angles))
+        rotations = np.stack([np.column_stack([cos, sin]), np.column_stack([-sin, cos])], axis=1) * scale
+
+        paths = []
+        for (vertices, codes, width, height), rotation, center in zip(self.glyphs, rotations, centers):
+            if self.background is not None:
+                w, h = width / 2 + LABEL_PAD, height / 2 + LABEL_PAD
+                corners = np.array([[-w, -h], [w, -h], [w, h], [-w, h], [-w, -h]])
+                paths.append(Path(corners @ rotation + center, closed=True))
+            paths.append(Path(vertices @ rotation + center, codes) if len(vertices) else Path(np.empty((0, 2))))
+        return paths
+
+    def draw(self, renderer):
+        if not self.get_visible() or self.axes is None:
+            return
+        self.set_paths(self._geometry(renderer))
+        super().draw(renderer)
+
+
+def _edge_colors(G, edges, default, colors):
+    overrides = (colors or {}).get('edge') or {}
+    return [overrides.get(G.edges[u, v].get('id', (u, v)), default) for u, v in edges]
+
+
+def _node_colors(nodes, fill, border, colors):
+    overrides = (colors or {}).get('node') or {}
+    pairs = [overrides.get(n, (fill, border)) for n in nodes]
+    return [p[0] for p in pairs], [p[1] for p in pairs]
+
+
+def draw_G_fast(
+    G,
+    ax=None,
+    figsize=(6, 6),
+    title='',
+    node_fontsize=10,
+    edge_fontsize=10,
+    node_size=800,
+    dpi=300,
+    show_node_value=True,
+    show_edge_value=True,
+    object_node_color='skyblue',
+    attribute_node_color='pink',
+    relation_edge_color='black',
+    attribute_edge_color='lightgray',
+    object_node_edge_color='white',
+    attribute_node_edge_color='white',
+    colors=None,
+    layout='spring',
+    attribute_node_shape='o',
+    object_node_shape='o',
+    pos=None,
+):
+    """
+    与 sg.draw_G 参数相同、输出相同的场景图, 每类元素 (边、节点、标签) 只创建一个集合, 见模块说明。
+
+    :return: 未传入 ax 时返回 matplotlib.figure.Figure 对象
+    """
+    G = as_G(G)
+    if pos is None:
+        pos = compute_layout(G, layout)
+
+    returnfig = False
+    if ax is None:
+        returnfig = True
+        fig, ax = plt.subplots(figsize=figsize, dpi=dpi)
+
+    def xy(nodes):
+        return np.array([pos[n] for n in nodes], dtype=float).reshape(-1, 2)
+
+    # 边: 关系边为 arc3 弧线, 属性边为直线; 自环的高度同 networkx 按 y 方向的跨度计算
+    for edge_type, default, rad in (
+        ('relation_edge', relation_edge_color, RELATION_RAD),
+        ('attribute_edge', attribute_edge_color, 0.0),
+    ):
+        edges = [(u, v) for u, v, data in G.edges(data=True) if data.get('type') == edge_type]
+        if not edges:
+            continue
+        starts, ends = xy([u for u, _ in edges]), xy([v for _, v in edges])
+        span = np.ptp(np.concatenate([starts[:, 1], ends[:, 1]]))
+        ax.add_collection(
+            ArrowCollection(
+                starts, ends, _edge_colors(G, edges, default, colors), rad=rad,
+                selfloop_height=span if span != 0 else 0.005 * 300,
+            ), autolim=False,
+        )
+
+    # 节点: 每类一个 scatter
+    for node_type, fill, border, shape in (
+        ('object_node', object_node_color, object_node_edge_color, object_node_shape),
+        ('attribute_node', attribute_node_color, attribute_node_edge_color, attribute_node_shape),
+    ):
+        nodes = [n for n, d in G.nodes(data=True) if d.get('type') == node_type]
+        if not nodes:
+            continue
+        fills, borders = _node_colors(nodes, fill, border, colors)
+        coords = xy(nodes)
+        ax.scatter(
+            coords[:, 0], coords[:, 1], s=node_size, c=fills, marker=shape, edgecolors=borders, linewidths=1.5,
+        ).set_zorder(2)
+
+    label_colors = (colors or {}).get('label') or {}
+    if show_node_value:
+        nodes = [n for n, d in G.nodes(data=True) if str(d.get('value', n))]
+        ax.add_collection(
+            LabelCollection(
+                [G.nodes[n].get('value', n) for n in nodes], xy(nodes),
+                [label_colors.get(n, 'black') for n in nodes], fontsize=node_fontsize, zorder=3,
+            ), autolim=False,
+        )
+
+    if show_edge_value:
+        edges = [
+            (u, v) for u, v, d in G.edges(data=True) if d.get('type') == 'relation_edge' and str(d.get('value', ''))
+        ]
+        if edges:
+            starts, ends = xy([u for u, _ in edges]), xy([v for _, v in edges])
+            anchors = (starts + ends) / 2
+            span = np.ptp(np.concatenate([starts[:, 1], ends[:, 1]]))
+            loops = np.all(starts == ends, axis=1)
+            anchors[loops] += (0, 0.1 * (span if span != 0 else 0.005 * 300))
+            ax.add_collection(
+                LabelCollection(
+                    [G.edges[e].get('value', '') for e in edges], anchors,
+                    [label_colors.get(e, 'black') for e in edges], fontsize=edge_fontsize,
+                    directions=np.stack([starts, ends], axis=1), background='white', zorder=1,
+                ), autolim=False,
+            )
+
+    # draw_networkx_* 默认隐藏刻度
+    ax.tick_params(axis='both', which='both', bottom=False, left=False, labelbottom=False, labelleft=False)
+
+    # 调整坐标轴范围
+    coords = np.array(list(pos.values()), dtype=float)
+    (x_min, y_min), (x_max, y_max) = coords.min(axis=0), coords.max(axis=0)
+    x_padding = (x_max - x_min) * 0.2
+    y_padding = (y_max - y_min) * 0.2
+    ax.set_xlim(x_min - x_padding, x_max + x_padding)
+    ax.set_ylim(y_min - y_padding, y_max + y_padding)
+    ax.set_title(title, fontsize=16)
+
+    if returnfig:
+        for spine in ax.spines.values():
+            spine.set_visible(False)
+        ax.axis('off')
+        fig.tight_layout()
+        plt.close(fig)
+        return fig
@@ -0,0 +1,485 @@
+"""
+不经过 matplotlib 的场景图导出: 直接从 dic_G (或 nx.DiGraph / GraphOverlay) 生成自包含的 SVG 与 HTML。
+
+批量运行后审阅几百个条目时不需要 300 dpi 的 tif; 这里按 draw_G / draw_G_cue_highlight 的样式语义
+(节点类型的颜色与形状、colors 覆盖、弧形关系边与箭头、边标签沿边方向) 直接拼出 SVG 文本,
+一张图只需计算布局 (经 layout.LAYOUT_CACHE, 与 draw_G 的坐标相同) 与字符串拼接。
+
+- svg_G / svg_G_cue_highlight / svg_Gs: 单图、cue 高亮图与 VNG 组图的 SVG 文本
+- interactive=True 时在页面中内嵌一小段脚本, 可以拖动节点 (边与标签随之更新), 悬停显示节点与边的属性;
+  页面不引用任何外部资源, 离线可用
+- export_campaign: 把 campaign 数据库中的每个条目写为一个 HTML 页面, 并生成按特质分组、
+  带缩略图 (惰性加载的 SVG 文件) 的静态索引页
+
+用法:
+    open('O_1.svg', 'w').write(svg_G(dic_G(G), title='O_1'))
+    export_campaign('results/final/campaign.sqlite', 'results/final/html', interactive=True)
+
+命令行:
+    python -m src.viz.html_export results/final/campaign.sqlite results/final/html --interactive
+"""
+from __future__ import annotations
+
+import argparse
+import html
+import math
+import os
+from itertools import chain
+
+from ..utils.graph_overlay import as_G
+from ..utils.graph_utils import build_G
+from .layout import LAYOUT_CACHE
+from .style import cue_colors
+from .style import CUE_HIGHLIGHT_STYLE
+from .style import VNG_TITLES
+
+# 与 draw_G 一致的几何参数 (单位: point, SVG 中 1 个用户单位为 1 point)
+EDGE_WIDTH = 2
+EDGE_MARGIN = 15
+HEAD_LENGTH = 8
+HEAD_WIDTH = 4
+RELATION_RAD = 0.1
+TITLE_HEIGHT = 28
+FONT_FAMILY = "'Times New Roman', 'DejaVu Serif', serif"
+
+_DRAG_SCRIPT = """
+(function () {
+  const R = __RAD__, M = __MARGIN__, HL = __HEAD_LENGTH__, HW = __HEAD_WIDTH__;
+  function unit(x, y) { const n = Math.hypot(x, y) || 1; return [x / n, y / n]; }
+  function edge(p0, p1, rad) {
+    const dx = p1[0] - p0[0], dy = p1[1] - p0[1];
+    const c = [(p0[0] + p1[0]) / 2 - rad * dy, (p0[1] + p1[1]) / 2 + rad * dx];
+    const u0 = unit(c[0] - p0[0], c[1] - p0[1]), u1 = unit(p1[0] - c[0], p1[1] - c[1]);
+    const a = [p0[0] + M * u0[0], p0[1] + M * u0[1]], tip = [p1[0] - M * u1[0], p1[1] - M * u1[1]];
+    const end = [tip[0] - HL / 2 * u1[0], tip[1] - HL / 2 * u1[1]];
+    const base = [tip[0] - HL * u1[0], tip[1] - HL * u1[1]];
+    let angle = Math.atan2(dy, dx) * 180 / Math.PI;
+    if (angle > 90) angle -= 180; else if (angle < -90) angle += 180;
+    return {
+      d: `M${a[0]},${a[1]} Q${c[0]},${c[1]} ${end[0]},${end[1]}`,
+      head: `${base[0] - HW * u1[1]},${base[1] + HW * u1[0]} ${tip[0]},${tip[1]} ${base[0] + HW * u1[1]},${base[1] - HW * u1[0]}`,
+      mid: [(p0[0] + p1[0]) / 2, (p0[1] + p1[1]) / 2], angle: angle,
+    };
+  }
+  document.querySelectorAll('svg.sg').forEach(function (svg) {
+    const nodes = {};
+    svg.querySelectorAll('g.node').forEach(function (g) {
+      nodes[g.dataset.n] = {g: g, x: +g.dataset.x, y: +g.dataset.y};
+    });
+    const edges = Array.from(svg.querySelectorAll('g.edge'));
+    function update(n) {
+      edges.forEach(function (g) {
+        if (g.dataset.u !== n && g.dataset.v !== n) return;
+        const u = nodes[g.dataset.u], v = nodes[g.dataset.v];
+        if (u === v) return;
+        const e = edge([u.x, u.y], [v.x, v.y], +g.dataset.rad);
+        g.querySelector('path').setAttribute('d', e.d);
+        g.querySelector('polygon').setAttribute('points', e.head);
+        const text = g.querySelector('text');
+        if (text) {
+          text.setAttribute('x', e.mid[0]); text.setAttribute('y', e.mid[1]);
+          text.setAttribute('transform', `rotate(${e.angle} ${e.mid[0]} ${e.mid[1]})`);
+        }
+      });
+    }
+    let drag = null;
+    svg.addEventListener('pointerdown', function (ev) {
+      const g = ev.target.closest('g.node');
+      if (!g) return;
+      drag = nodes[g.dataset.n];
+      svg.setPointerCapture(ev.pointerId);
+    });
+    svg.addEventListener('pointermove', function (ev) {
+      if (!drag) return;
+      const p = new DOMPoint(ev.clientX, ev.clientY).matrixTransform(svg.getScreenCTM().inverse());
+      drag.x = p.x; drag.y = p.y;
+      drag.g.setAttribute('transform', `translate(${p.x},${p.y})`);
+      update(drag.g.dataset.n);
+    });
+    svg.addEventListener('pointerup', function () { drag = null; });
+  });
+})();
+"""
+# JS 中大量使用 {} 与 ${}, 几何参数以占位符替换, 不用 % / str.format
+for _name, _value in (
+    ('__RAD__', RELATION_RAD), ('__MARGIN__', EDGE_MARGIN),
+    ('__HEAD_LENGTH__', HEAD_LENGTH), ('__HEAD_WIDTH__', HEAD_WIDTH),
+):
+    _DRAG_SCRIPT = _DRAG_SCRIPT.replace(_name, str(_value))
+del _name, _value
+
+_PAGE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ font-family: {font}; margin: 24px; color: #222; }}
+h1 {{ font-size: 20px; }} h2 {{ font-size: 16px; margin-top: 28px; }}
+.panels {{ display: flex; flex-wrap: wrap; }}
+.panels svg {{ border-right: 1px solid #000; }}
+.panels svg:last-child {{ border-right: none; }}
+svg.sg g.node {{ cursor: grab; }}
+table {{ border-collapse: collapse; }} td, th {{ padding: 4px 10px; text-align: left; border-bottom: 1px solid #ddd; }}
+.thumbs {{ display: flex; flex-wrap: wrap; gap: 12px; }}
+.thumbs a {{ display: block; width: 180px; text-align: center; color: inherit; text-decoration: none; }}
+.thumbs img {{ width: 180px; height: 180px; border: 1px solid #ddd; }}
+.failed {{ color: #b00; }}
+</style>
+</head>
+<body>
+{body}
+{script}
+</body>
+</html>
+"""
+
+
+def _color(color) -> str:
+    """matplotlib 颜色 (名称、十六进制或 0-1 的 RGB(A) 元组) 转为 CSS 颜色。"""
+    if isinstance(color, str):
+        return color
+    r, g, b, *a = color
+    return f'rgba({round(r * 255)},{round(g * 255)},{round(b * 255)},{a[0] if a else 1:g})'
+
+
+def _esc(value) -> str:
+    return html.escape(str(value), quote=True)
+
+
+def _graph(G):
+    """dic_G 字典转为 nx.DiGraph; nx.DiGraph 与 GraphOverlay 原样返回 (overlay 的布局以其 base 为父图)。"""
+    if isinstance(G, dict):
+        return build_G(G)
+    return G
+
+
+def _marker(shape, r, fill, stroke) -> str:
+    """与 matplotlib 的 marker 相同大小的节点形状 (以原点为中心, SVG 的 y 轴向下)。"""
+    style = f'fill="{_esc(_color(fill))}" stroke="{_esc(_color(stroke))}" stroke-width="1.5"'
+    if shape in ('^', 'v'):
+        sign = 1 if shape == '^' else -1
+        points = f'0,{-sign * r:.2f} {-r:.2f},{sign * r:.2f} {r:.2f},{sign * r:.2f}'
+        return f'<polygon points="{points}" {style}/>'
+    if shape == 's':
+        return f'<rect x="{-r:.2f}" y="{-r:.2f}" width="{2 * r:.2f}" height="{2 * r:.2f}" {style}/>'
+    if shape == 'D':
+        d = r * math.sqrt(2)
+        return f'<polygon points="0,{-d:.2f} {d:.2f},0 0,{d:.2f} {-d:.2f},0" {style}/>'
+    return f'<circle r="{r:.2f}" {style}/>'
+
+
+def _edge_geometry(p0, p1, rad):
+    """
+    arc3 弧形边 (与 FancyArrowPatch 的 connectionstyle='arc3' 相同, 在 y 轴向下的坐标中), 两端缩进
+    EDGE_MARGIN, 终点处为 '-|>' 箭头。与 _DRAG_SCRIPT 中的 edge() 相同。
+
+    :return: (边身的 path d, 箭头的 polygon points, 标签位置, 标签角度)
+    """
+    (x0, y0), (x1, y1) = p0, p1
+    dx, dy = x1 - x0, y1 - y0
+    cx, cy = (x0 + x1) / 2 - rad * dy, (y0 + y1) / 2 + rad * dx
+
+    def unit(x, y):
+        n = math.hypot(x, y) or 1
+        return x / n, y / n
+
+    u0, u1 = unit(cx - x0, cy - y0), unit(x1 - cx, y1 - cy)
+    ax, ay = x0 + EDGE_MARGIN * u0[0], y0 + EDGE_MARGIN * u0[1]
+    tx, ty = x1 - EDGE_MARGIN * u1[0], y1 - EDGE_MARGIN * u1[1]
+    # 边身止于箭头中部, 圆头线帽不会露出箭头尖端
+    ex, ey = tx - HEAD_LENGTH / 2 * u1[0], ty - HEAD_LENGTH / 2 * u1[1]
+    bx, by = tx - HEAD_LENGTH * u1[0], ty - HEAD_LENGTH * u1[1]
+    d = f'M{ax:.2f},{ay:.2f} Q{cx:.2f},{cy:.2f} {ex:.2f},{ey:.2f}'
+    head = (
+        f'{bx - HEAD_WIDTH * u1[1]:.2f},{by + HEAD_WIDTH * u1[0]:.2f} {tx:.2f},{ty:.2f} '
+        f'{bx + HEAD_WIDTH * u1[1]:.2f},{by - HEAD_WIDTH * u1[0]:.2f}'
+    )
+    # 边标签在直线的中点, 沿直线方向且文字不倒置 (同 draw_networkx_edge_labels)
+    angle = math.degrees(math.atan2(dy, dx))
+    if angle > 90:
+        angle -= 180
+    elif angle < -90:
+        angle += 180
+    return d, head, ((x0 + x1) / 2, (y0 + y1) / 2), angle
+
+
+def _loop_geometry(p, height):
+    """自环 (同 networkx 的 self_loop 连接, 在节点上方)。"""
+    x, y = p
+    v, h = height, height / 2
+    d = (
+        f'M{x:.2f},{y - v:.2f} C{x + h:.2f},{y - v:.2f} {x + h:.2f},{y:.2f} {x:.2f},{y:.2f} '
+        f'C{x - h:.2f},{y:.2f} {x - h:.2f},{y - v:.2f} {x:.2f},{y - v:.2f}'
+    )
+    head = (
+        f'{x - HEAD_LENGTH:.2f},{y - v - HEAD_WIDTH:.2f} {x:.2f},{y - v:.2f} '
+        f'{x - HEAD_LENGTH:.2f},{y - v + HEAD_WIDTH:.2f}'
+    )
+    return d, head, (x, y - v), 0.0
+
+
+def svg_G(
+    G,
+    pos=None,
+    figsize=(6, 6),
+    title='',
+    node_fontsize=10,
+    edge_fontsize=10,
+    node_size=800,
+    show_node_value=True,
+    show_edge_value=True,
+    object_node_color='skyblue',
+    attribute_node_color='pink',
+    relation_edge_color='black',
+    attribute_edge_color='lightgray',
+    object_node_edge_color='white',
+    attribute_node_edge_color='white',
+    colors=None,
+    layout='spring',
+    attribute_node_shape='o',
+    object_node_shape='o',
+    interactive=False,
+):
+    """
+    以 SVG 绘制场景图, 参数与 sg.draw_G 相同 (dpi 除外), 返回 SVG 文本。
+
+    :param G: dic_G 字典、nx.DiGraph 或 GraphOverlay
+    :param pos: 预先计算的布局 {node: (x, y)}, 默认取自 layout.LAYOUT_CACHE (与 draw_G 的坐标相同)
+    :param interactive: 为 True 时写入拖动脚本所需的数据属性 (脚本由 html_page 内嵌)
+    """
+    G = _graph(G)
+    if pos is None:
+        pos = LAYOUT_CACHE.get(G, layout)
+    G = as_G(G)
+    colors = colors or {}
+    node_colors = colors.get('node') or {}
+    edge_colors = colors.get('edge') or {}
+    label_colors = colors.get('label') or {}
+
+    # 坐标范围与 draw_G 相同 (四周留出 20%), y 轴翻转
+    width, height = figsize[0] * 72, figsize[1] * 72
+    top = TITLE_HEIGHT if title else 0
+    xs = [float(p[0]) for p in pos.values()] or [0.0]
+    ys = [float(p[1]) for p in pos.values()] or [0.0]
+    x_span, y_span = (max(xs) - min(xs)) or 1.0, (max(ys) - min(ys)) or 1.0
+    x_min, y_max = min(xs) - 0.2 * x_span, max(ys) + 0.2 * y_span
+    sx, sy = width / (1.4 * x_span), (height - top) / (1.4 * y_span)
+
+    def to_svg(node):
+        x, y = pos[node]
+        return (float(x) - x_min) * sx, top + (y_max - float(y)) * sy
+
+    points = {node: to_svg(node) for node in G}
+    index = {node: i for i, node in enumerate(G)}
+
+    out = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" class="sg" width="{width:g}" height="{height:g}" '
+        f'viewBox="0 0 {width:g} {height:g}" font-family="{_esc(FONT_FAMILY)}">',
+    ]
+    if title:
+        out.append(
+            f'<text x="{width / 2:.2f}" y="{TITLE_HEIGHT * 0.7:.2f}" font-size="16" text-anchor="middle">{_esc(title)}</text>',
+        )
+
+    # 边 (先画, 位于节点下方); 自环高度同 networkx: 边端点 y 跨度的 10%
+    loop_height = 0.1 * y_span * sy
+    for edge_type, default, rad in (
+        ('relation_edge', relation_edge_color, RELATION_RAD),
+        ('attribute_edge', attribute_edge_color, 0.0),
+    ):
+        for u, v, data in G.edges(data=True):
+            if data.get('type') != edge_type:
+                continue
+            color = _esc(_color(edge_colors.get(data.get('id', (u, v)), default)))
+            if u == v:
+                d, head, mid, angle = _loop_geometry(points[u], loop_height)
+            else:
+                d, head, mid, angle = _edge_geometry(points[u], points[v], rad)
+            attrs = f' data-u="{index[u]}" data-v="{index[v]}" data-rad="{rad}"' if interactive else ''
+            out.append(f'<g class="edge"{attrs}><title>{_esc(u)} → {_esc(v)}: {_esc(data.get("value", ""))}</title>')
+            out.append(
+                f'<path d="{d}" fill="none" stroke="{color}" stroke-width="{EDGE_WIDTH}" '
+                'stroke-linecap="round" stroke-linejoin="round"/>',
+            )
+            out.append(f'<polygon points="{head}" fill="{color}" stroke="{color}" stroke-width="{EDGE_WIDTH}" stroke-linejoin="round"/>')
+            value = data.get('value', '')
+            if show_edge_value and edge_type == 'relation_edge' and str(value):
+                label_color = _esc(_color(label_colors.get((u, v), 'black')))
+                out.append(
+                    f'<text x="{mid[0]:.2f}" y="{mid[1]:.2f}" transform="rotate({angle:.2f} {mid[0]:.2f} {mid[1]:.2f})" '
+                    f'font-size="{edge_fontsize}" fill="{label_color}" stroke="white" stroke-width="3" '
+                    f'paint-order="stroke" text-anchor="middle" dominant-baseline="central">{_esc(value)}</text>',
+                )
+            out.append('</g>')
+
+    # 节点
+    r = math.sqrt(node_size) / 2
+    styles = {
+        'object_node': (object_node_color, object_node_edge_color, object_node_shape),
+        'attribute_node': (attribute_node_color, attribute_node_edge_color, attribute_node_shape),
+    }
+    for node, data in G.nodes(data=True):
+        if data.get('type') not in styles:
+            continue
+        fill, stroke, shape = styles[data['type']]
+        fill, stroke = node_colors.get(node, (fill, stroke))
+        x, y = points[node]
+        attrs = f' data-n="{index[node]}" data-x="{x:.2f}" data-y="{y:.2f}"' if interactive else ''
+        tooltip = _esc(f'{node}: ' + ', '.join(f'{k}={v}' for k, v in data.items()))
+        out.append(f'<g class="node" transform="translate({x:.2f},{y:.2f})"{attrs}><title>{tooltip}</title>')
+        out.append(_marker(shape, r, fill, stroke))
+        if show_node_value:
+            label_color = _esc(_color(label_colors.get(node, 'black')))
+            out.append(
+                f'<text font-size="{node_fontsize}" fill="{label_color}" text-anchor="middle" '
+                f'dominant-baseline="central">{_esc(data.get("value", node))}</text>',
+            )
+        out.append('</g>')
+    out.append('</svg>')
+    return '\n'.join(out)
+
+
+def svg_G_cue_highlight(G, cues, cmap='hsv', title=None, **kwargs):
+    """
+    与 sg.draw_G_cue_highlight 相同: 每个 cue 对应的边与标签使用 cmap 中的一种颜色, 节点为灰色,
+    属性节点为三角形。其他参数传给 svg_G。
+    """
+    G = _graph(G)
+    kwargs = {**CUE_HIGHLIGHT_STYLE, 'title': title or '', **kwargs}
+    return svg_G(G, colors=cue_colors(as_G(G), cues, cmap=cmap), **kwargs)
+
+
+def svg_Gs(Gs, pos=None, interactive=False):
+    """
+    与 sg.draw_Gs 相同的 VNG 组图: 每个面板一个 4x4 英寸的 SVG, 面板之间以竖线分隔 (见 html_page 的样式)。
+
+    :param Gs: {vng: dic_G 字典 / nx.DiGraph / GraphOverlay}
+    :param pos: 可选的 {vng: {node: (x, y)}}; 其余面板经 LAYOUT_CACHE, 富化图 (GraphOverlay) 在其 base 的布局上增量布局
+    """
+    panels = []
+    for vng, G in Gs.items():
+        panels.append(
+            svg_G(
+                G, pos=(pos or {}).get(vng), figsize=(4, 4), title=VNG_TITLES.get(vng, vng),
+                node_fontsize=8, edge_fontsize=8, interactive=interactive,
+            ),
+        )
+    return '<div class="panels">\n' + '\n'.join(panels) + '\n</div>'
+
+
+def html_page(title, body, interactive=False):
+    """把 body (HTML 片段) 包装为自包含的页面; interactive 时内嵌拖动脚本。"""
+    script = f'<script>{_DRAG_SCRIPT}</script>' if interactive else ''
+    return _PAGE.format(title=_esc(title), body=body, script=script, font=FONT_FAMILY)
+
+
+def result_html(res, title='', interactive=False):
+    """
+    一个条目 (fit() 输出或 CampaignStore.read 的结果) 的页面: 情景图 (有 cues 时高亮)、VNG 图与富化图。
+    """
+    sections = [f'<h1>{_esc(title)}</h1>']
+    G = res.get('situation_graph')
+    if G is not None and not isinstance(G, str):
+        cues = list(chain.from_iterable((res.get('cues') or {}).values()))
+        sections.append('<h2>Situation graph</h2>')
+        sections.append(svg_G(G, interactive=interactive))
+        if cues:
+            sections.append('<h2>Situation cues</h2>')
+            sections.append(svg_G_cue_highlight(G, cues, interactive=interactive))
+    vngs = res.get('vng_graphs')
+    vngs = {vng: _graph(G) for vng, G in vngs.items()} if vngs and not isinstance(vngs, str) else {}
+    if vngs:
+        sections.append('<h2>VNG graphs</h2>')
+        sections.append(svg_Gs(vngs, interactive=interactive))
+    enriched = res.get('intergrated_Gs')
+    if enriched and not isinstance(enriched, str):
+        # 从数据库读出的富化图是普通的 DiGraph, 以同一面板的 VNG 图为父图增量布局, 节点位置与上方一致
+        enriched = {vng: _graph(G) for vng, G in enriched.items()}
+        pos = {vng: LAYOUT_CACHE.get(G, parent=vngs.get(vng)) for vng, G in enriched.items()}
+        sections.append('<h2>Enriched graphs</h2>')
+        sections.append(svg_Gs(enriched, pos=pos, interactive=interactive))
+    for key in ('Gs_prompt_polished', 'Gs_prompt'):
+        prompts = res.get(key)
+        if prompts and not isinstance(prompts, str):
+            sections.append('<h2>Prompts</h2><table>')
+            sections.extend(
+                f'<tr><th>{_esc(VNG_TITLES.get(vng, vng))}</th><td>{_esc(prompt)}</td></tr>' for vng, prompt in prompts.items()
+            )
+            sections.append('</table>')
+            break
+    return html_page(title, '\n'.join(sections), interactive=interactive)
+
+
+def _write(path, text):
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def export_campaign(campaign, out_dir, traits=None, interactive=False) -> str:
+    """
+    把 campaign 数据库中的全部条目导出为静态页面:
+
+        <out_dir>/index.html                   按特质分组的索引 (缩略图 + 节点/边数 + 失败的条目)
+        <out_dir>/<trait>/<trait>_<item>.html  条目页面, 见 result_html
+        <out_dir>/<trait>/<trait>_<item>.svg   情景图, 同时用作索引页的缩略图
+
+    :param campaign: CampaignStore 或数据库路径
+    :param traits: 只导出这些特质
+    :return: 索引页路径
+    """
+    from ..datasets.campaign import CampaignStore
+
+    if isinstance(campaign, str):
+        campaign = CampaignStore(campaign)
+    kinds = ['situation_graph', 'vng_graphs', 'intergrated_Gs', 'cues', 'Gs_prompt', 'Gs_prompt_polished']
+    groups = {}
+    for trait, item in campaign.items():
+        if traits is not None and trait not in traits:
+            continue
+        res = campaign.read(trait, item, kinds=kinds) or {}
+        directory = os.path.join(out_dir, trait)
+        os.makedirs(directory, exist_ok=True)
+        name = f'{trait}_{item}'
+        _write(os.path.join(directory, f'{name}.html'), result_html(res, title=name, interactive=interactive))
+        G = res.get('situation_graph')
+        stats = ''
+        if G is not None and not isinstance(G, str):
+            G = _graph(G)
+            _write(os.path.join(directory, f'{name}.svg'), svg_G(G, title=name))
+            stats = f'{G.number_of_nodes()} nodes, {G.number_of_edges()} edges'
+        groups.setdefault(trait, []).append((name, stats))
+
+    body = [f'<h1>{_esc(os.path.basename(str(campaign.path)))}</h1>']
+    for trait, entries in groups.items():
+        body.append(f'<h2>{_esc(trait)} ({len(entries)} items)</h2><div class="thumbs">')
+        for name, stats in entries:
+            body.append(
+                f'<a href="{_esc(trait)}/{_esc(name)}.html"><img src="{_esc(trait)}/{_esc(name)}.svg" '
+                f'loading="lazy" alt="{_esc(name)}"><div>{_esc(name)}</div><small>{_esc(stats)}</small></a>',
+            )
+        body.append('</div>')
+    failed = [row for row in campaign.failed() if traits is None or row['trait'] in traits]
+    if failed:
+        body.append('<h2 class="failed">Failed items</h2><table>')
+        body.extend(
+            f'<tr><td>{_esc(row["trait"])}_{_esc(row["item"])}</td><td>{_esc(row["error"] or "")}</td></tr>' for row in failed
+        )
+        body.append('</table>')
+    index = os.path.join(out_dir, 'index.html')
+    os.makedirs(out_dir, exist_ok=True)
+    _write(index, html_page('campaign', '\n'.join(body)))
+    return index
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='将 campaign 数据库导出为静态 HTML/SVG 页面')
+    parser.add_argument('database')
+    parser.add_argument('out_dir')
+    parser.add_argument('--traits', nargs='*')
+    parser.add_argument('--interactive', action='store_true', help='内嵌拖动节点的脚本')
+    args = parser.parse_args()
+    index = export_campaign(args.database, args.out_dir, traits=args.traits, interactive=args.interactive)
+    print(f'wrote {index}')
@@ -0,0 +1,162 @@
+"""
+场景图布局的计算与缓存。
+
+draw_G 每次都重新计算 spring 布局; 批量绘图时同一张图常被画多次 (单图、VNG 组图、
+重绘不同格式), 因此按 (结构哈希, 节点 id, 布局方式) 缓存坐标。结构哈希与节点 id 都相同时
+spring 布局的结果 (固定 seed) 也相同, 缓存命中时直接复用。
+
+派生图 (如 intergrated_Gs 中以 GraphOverlay 表示的富化图, 只比 vng_graphs 多几个属性节点)
+不重新布局: 以父图的缓存坐标为起点, 父图节点保持不动, 新节点放在其邻居附近, 再只对新节点做
+几轮 spring 迭代 (incremental_layout)。原图与富化图的同一节点位置相同, 两张图可以直接对照。
+"""
+from __future__ import annotations
+
+import math
+import threading
+from collections import OrderedDict
+
+import networkx as nx
+import numpy as np
+
+from ..utils.graph_hash import hash_G
+from ..utils.graph_overlay import as_G
+from ..utils.graph_overlay import GraphOverlay
+
+LAYOUTS = ('spring', 'circular', 'kamada_kawai', 'shell')
+
+
+def compute_layout(G, layout='spring') -> dict:
+    """与 draw_G 相同的布局计算, 返回 {node: (x, y)}。"""
+    G = as_G(G)
+    if layout == 'spring':
+        return nx.spring_layout(G, seed=42, k=3)
+    elif layout == 'circular':
+        return nx.circular_layout(G)
+    elif layout == 'kamada_kawai':
+        return nx.kamada_kawai_layout(G)
+    elif layout == 'shell':
+        return nx.shell_layout(G)
+    return nx.spring_layout(G, seed=42, k=0.8)
+
+
+def incremental_layout(G, parent_pos: dict, iterations: int = 15, k: float = 3) -> dict:
+    """
+    在父图布局的基础上为派生图 G 布局: parent_pos 中的节点位置不变, 新节点初始放在已放置邻居的
+    重心附近 (按序号错开角度, 没有已放置邻居时放在父图包围盒外侧), 再以 spring 迭代 iterations 轮
+    (只移动新节点), 参数与 draw_G 的 spring 布局一致。
+
+    :param G: 派生图 (或 GraphOverlay)
+    :param parent_pos: 父图的 {node: (x, y)}
+    """
+    G = as_G(G)
+    fixed = [n for n in G if n in parent_pos]
+    new = [n for n in G if n not in parent_pos]
+    pos = {n: np.asarray(parent_pos[n], dtype=float) for n in fixed}
+    if not new:
+        return pos
+    if not fixed:
+        return compute_layout(G)
+
+    coords = np.array(list(pos.values()))
+    center = coords.mean(axis=0)
+    radius = max(float(np.abs(coords - center).max()), 1e-3)
+    step = radius / 4
+    for i, node in enumerate(new):
+        angle = 2 * math.pi * ((i * 0.618034) % 1)
+        placed = [pos[m] for m in nx.all_neighbors(G, node) if m in pos]
+        if placed:
+            anchor = np.mean(placed, axis=0)
+        else:
+            anchor = center + radius * np.array([math.cos(angle), math.sin(angle)])
+        pos[node] = anchor + step * np.array([math.cos(angle), math.sin(angle)])
+    refined = nx.spring_layout(G, pos=pos, fixed=fixed, iterations=iterations, k=k, seed=42)
+    return {n: np.asarray(p) for n, p in refined.items()}
+
+
+def layout_key(G, layout='spring', parent=None):
+    """缓存键; 派生图的键包含父图的键, 同一张图独立布局与增量布局的结果分别缓存。"""
+    G = as_G(G)
+    return hash_G(G), tuple(G), layout, parent
+
+
+class LayoutCache:
+    """
+    线程安全的布局缓存 (LRU)。
+
+    :param maxsize: 最多缓存的布局数, None 表示不限
+    """
+
+    def __init__(self, maxsize: int | None = 4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        return f'LayoutCache({len(self)} layouts, hits={self.hits}, misses={self.misses})'
+
+    def lookup(self, key):
+        with self._lock:
+            pos = self._data.get(key)
+            if pos is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+            return pos
+
+    def store(self, key, pos):
+        with self._lock:
+            self._data[key] = pos
+            self._data.move_to_end(key)
+            if self.maxsize is not None and len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def key(self, G, layout='spring', parent=None):
+        """
+        G 的缓存键。GraphOverlay 默认以其 base 为父图; 只有 spring 布局支持增量布局。
+        """
+        if parent is None and isinstance(G, GraphOverlay):
+            parent = G.base
+        if parent is None or layout != 'spring':
+            return layout_key(G, layout)
+        return layout_key(G, layout, parent=self.key(parent, layout))
+
+    def get(self, G, layout='spring', parent=None) -> dict:
+        """
+        G 的布局坐标, 未缓存时计算并缓存。
+
+        :param parent: 父图; G 为 GraphOverlay 时默认为其 base。给定时先取父图的坐标
+                       (同样经过缓存), 再以 incremental_layout 只放置新增的节点
+        """
+        if parent is None and isinstance(G, GraphOverlay):
+            parent = G.base
+        if layout != 'spring':
+            parent = None
+        key = self.key(G, layout, parent)
+        pos = self.lookup(key)
+        if pos is None:
+            with self._lock:
+                self.misses += 1
+            if parent is None:
+                pos = compute_layout(G, layout)
+            else:
+                pos = incremental_layout(G, self.get(parent, layout))
+            self.store(key, pos)
+        return pos
+
+    def snapshot(self) -> dict:
+        """当前缓存内容的浅拷贝 {key: pos}。"""
+        with self._lock:
+            return dict(self._data)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+
+# 进程内共享的布局缓存
+LAYOUT_CACHE = LayoutCache()
@@ -2,9 +2,13 @@ from __future__ import annotations
 
 import matplotlib.pyplot as plt
 import networkx as nx
-from matplotlib import colormaps as cm
 
-from ..utils.graph_utils import map_knowledge
+from ..utils.graph_overlay import as_G
+from .layout import compute_layout
+from .layout import LAYOUT_CACHE
+from .style import cue_colors
+from .style import CUE_HIGHLIGHT_STYLE
+from .style import VNG_TITLES
 plt.rcParams['font.family'] = 'Comic Sans MS'
 plt.rcParams['font.family'] = 'Times New Roman'
 
@@ -30,6 +34,7 @@ def draw_G(
     layout='spring',
     attribute_node_shape='o',
     object_node_shape='o',
+    pos=None,
 ):
     """
     绘制场景图 G, 并提供以下可配置功能:
@@ -48,7 +53,7 @@ def draw_G(
           }
       - 可选择绘制图的布局(如 'spring', 'circular', 'kamada_kawai', 'shell')
 
-    :param G: nx.DiGraph 对象
+    :param G: nx.DiGraph 对象 (或 GraphOverlay)
     :param figsize: 图形大小
     :param title: 图标题
     :param node_fontsize: 节点标签字体大小
@@ -65,23 +70,17 @@ def draw_G(
     :param attribute_node_edge_color: attribute_node 节点的默认边框颜色
     :param colors: 指定节点、边及标签颜色的字典, 格式见上文说明
     :param layout: 图的布局方式, 可选 'spring', 'circular', 'kamada_kawai', 'shell'
+    :param pos: 预先计算的布局 {node: (x, y)} (如 layout.LayoutCache 的结果), 给定时不再计算 layout
     :return: matplotlib.figure.Figure 对象
     """
     import matplotlib.pyplot as plt
     import networkx as nx
 
+    G = as_G(G)
     # 根据参数选择布局
     plt.close('all')
-    if layout == 'spring':
-        pos = nx.spring_layout(G, seed=42, k=3)
-    elif layout == 'circular':
-        pos = nx.circular_layout(G)
-    elif layout == 'kamada_kawai':
-        pos = nx.kamada_kawai_layout(G)
-    elif layout == 'shell':
-        pos = nx.shell_layout(G)
-    else:
-        pos = nx.spring_layout(G, seed=42, k=0.8)
+    if pos is None:
+        pos = compute_layout(G, layout)
 
     returnfig = False
     if ax is None:
@@ -274,7 +273,7 @@ def draw_G(
     ax.set_ylim(y_min - y_padding, y_max + y_padding)
 
     ax.set_title(title, fontsize=16)
-    plt.tight_layout()
+    # 传入 ax 时由调用方在所有面板画完后统一 tight_layout, 避免每个面板各算一次
     plt.close('all')
 
     if returnfig:
@@ -288,15 +287,17 @@ def draw_G(
         return fig
 
 
+def draw_Gs(Gs, pos=None):
+    """
+    将一组 VNG 图并排绘制在一张图中。
 
-def draw_Gs(Gs):
+    :param Gs: {vng: nx.DiGraph}
+    :param pos: 可选的 {vng: {node: (x, y)}}; 其余面板的布局取自 layout.LAYOUT_CACHE,
+                富化图 (GraphOverlay) 在其 base 的布局上增量布局, 与原 VNG 图的节点位置一致
+    """
     plt.close('all')
-    vng_map = {
-        'E': 'Establisher',
-        'I': 'Initial',
-        'Pr': 'Prolongation',
-        'P': 'Peak',
-    }
+    vng_map = VNG_TITLES
+    pos = {vng: (pos or {}).get(vng) or LAYOUT_CACHE.get(G) for vng, G in Gs.items()}
     if len(Gs) == 1:
         fig_width = 4
         fig_height = 4
@@ -305,12 +306,13 @@ def draw_Gs(Gs):
         vng = list(Gs.keys())[0]
         draw_G(
             Gs[vng], ax=axs, title=vng_map[vng],
-            node_fontsize=8, edge_fontsize=8,
+            node_fontsize=8, edge_fontsize=8, pos=pos.get(vng),
         )
         axs.spines['top'].set_visible(False)
         axs.spines['bottom'].set_visible(False)
         axs.spines['left'].set_visible(False)
         axs.spines['right'].set_visible(False)
+        fig.tight_layout()
         return fig
     else:
 
@@ -322,7 +324,7 @@ def draw_Gs(Gs):
         for i, (vng, G) in enumerate(Gs.items()):
             draw_G(
                 G, ax=axs[i], title=vng_map[vng],
-                node_fontsize=8, edge_fontsize=8,
+                node_fontsize=8, edge_fontsize=8, pos=pos.get(vng),
             )
             axs[i].spines['top'].set_visible(False)
             axs[i].spines['bottom'].set_visible(False)
@@ -330,7 +332,7 @@ def draw_Gs(Gs):
             if i == len(Gs) - 1:
                 axs[i].spines['right'].set_visible(False)
 
-        plt.tight_layout()
+        fig.tight_layout()
         return fig
 
 def draw_G_cue_highlight(G, cues, cmap='hsv', title=None, **kwargs):
@@ -348,39 +350,12 @@ def draw_G_cue_highlight(G, cues, cmap='hsv', title=None, **kwargs):
     matplotlib.figure.Figure 对象
     """
 
-    def get_colors_by_cues(G, cues, cmap='gist_ncar'):
-        def custom_cmap(value):
-            colormap = cm.get_cmap(cmap)
-            return colormap(value)
-
-        colors_cue = [custom_cmap(i / len(cues)) for i in range(len(cues))]
-        gh_id = [map_knowledge(G, cue['content'], cue['type']) for cue in cues]
-        colors = {'edge': {}, 'label': {}}
-        for i, cue in enumerate(gh_id):
-            color = colors_cue[i]
-            # 检查cue是否为None
-            if cue is None:
-                continue
-            for j in cue:
-                if isinstance(j, tuple):  # 处理关系边
-                    colors['edge'][j] = color
-                    colors['label'][j] = color
-                if 'attribute' in j:  # 处理属性边
-                    colors['edge'][(j, f'object_{j.split("|")[-2]}')] = color
-                    colors['label'][(j, f'object_{j.split("|")[-2]}')] = color
-        return colors
-
     # 获取高亮颜色
-    colors = get_colors_by_cues(G, cues, cmap=cmap)
+    G = as_G(G)
+    colors = cue_colors(G, cues, cmap=cmap)
 
     # 设置默认参数
-    default_kwargs = {
-        'attribute_edge_color': 'black',
-        'attribute_node_shape': '^',
-        'object_node_color': 'lightgray',
-        'attribute_node_color': 'lightgray',
-        'title': title,
-    }
+    default_kwargs = {**CUE_HIGHLIGHT_STYLE, 'title': title}
 
     # 更新参数
     for key, value in default_kwargs.items():
@@ -0,0 +1,53 @@
+"""
+sg.draw_G 系列与 html 导出共用的样式约定 (面板标题、cue 高亮配色), 不依赖 pyplot。
+"""
+from __future__ import annotations
+
+from ..utils.graph_utils import map_knowledge
+
+VNG_TITLES = {
+    'E': 'Establisher',
+    'I': 'Initial',
+    'Pr': 'Prolongation',
+    'P': 'Peak',
+}
+
+# draw_G_cue_highlight 在 draw_G 默认参数之上的改动
+CUE_HIGHLIGHT_STYLE = {
+    'attribute_edge_color': 'black',
+    'attribute_node_shape': '^',
+    'object_node_color': 'lightgray',
+    'attribute_node_color': 'lightgray',
+}
+
+
+def cue_colors(G, cues, cmap='hsv'):
+    """
+    按 cues 为图中对应的边及其标签着色, 每个 cue 一种颜色 (取自 matplotlib 的 colormap cmap)。
+
+    :param G: nx.DiGraph 对象
+    :param cues: [{'content': ..., 'type': ...}, ...]
+    :return: draw_G 的 colors 参数 {'edge': {edge: rgba}, 'label': {edge: rgba}}
+    """
+    from matplotlib import colormaps
+
+    colormap = colormaps.get_cmap(cmap)
+    colors_cue = [colormap(i / len(cues)) for i in range(len(cues))]
+    gh_id = [map_knowledge(G, cue['content'], cue['type']) for cue in cues]
+    colors = {'edge': {}, 'label': {}}
+    for i, cue in enumerate(gh_id):
+        color = colors_cue[i]
+        # 检查cue是否为None
+        if cue is None:
+            continue
+        for j in cue:
+            # 部分元素未在图中找到时为 None
+            if j is None:
+                continue
+            if isinstance(j, tuple):  # 处理关系边
+                colors['edge'][j] = color
+                colors['label'][j] = color
+            if 'attribute' in j:  # 处理属性边
+                colors['edge'][(j, f'object_{j.split("|")[-2]}')] = color
+                colors['label'][(j, f'object_{j.split("|")[-2]}')] = color
+    return colors